@@ -0,0 +1,5 @@
+# analyze.py
+from yoga_app.utils.batch_analysis import main
+
+if __name__ == "__main__":
+    main()
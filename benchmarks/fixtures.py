@@ -0,0 +1,139 @@
+# benchmarks/fixtures.py
+import argparse
+import os
+
+import cv2
+import mediapipe as mp
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+from yoga_app.config import Config
+from yoga_app.utils.frame_source import FrameSource, SyntheticSource
+from yoga_app.utils.pose_detection import landmarks_to_array
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+LANDMARKS_PATH = os.path.join(FIXTURES_DIR, "demo_landmarks.npy")
+DEMO_CLIP = os.path.join(ROOT, "Demo.webm")
+# Frames of Demo.webm showing a person, the only part worth running a model on
+DEMO_FRAMES = (350, 460)
+
+
+def load_clip(source="demo", width=Config.CAMERA_WIDTH):
+    """
+    Load a short clip into memory as BGR frames.
+
+    Parameters:
+        source (str): "demo" for the person segment of Demo.webm, or
+            "synthetic" for generated frames that need no video decoder.
+        width (int): Width the frames are scaled to, keeping the aspect ratio.
+
+    Returns:
+        list: BGR frames as uint8 arrays.
+    """
+    if source == "synthetic":
+        return synthetic_clip(width=width)
+    if source != "demo":
+        raise ValueError(f"Unknown clip {source!r}, expected 'demo' or 'synthetic'")
+
+    cap = cv2.VideoCapture(DEMO_CLIP)
+    frames = []
+    try:
+        index = 0
+        while index < DEMO_FRAMES[1]:
+            success, frame = cap.read()
+            if not success:
+                break
+            if index >= DEMO_FRAMES[0]:
+                height = round(frame.shape[0] * width / frame.shape[1])
+                frames.append(cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA))
+            index += 1
+    finally:
+        cap.release()
+    if not frames:
+        raise RuntimeError(f"Could not read frames {DEMO_FRAMES} from {DEMO_CLIP}")
+    return frames
+
+
+def synthetic_clip(count=60, width=Config.CAMERA_WIDTH, height=Config.CAMERA_HEIGHT, seed=0):
+    """Generate a deterministic clip of a figure moving across a textured background."""
+    source = SyntheticSource(width, height, period=count, seed=seed)
+    return [source._grab(None) for _ in range(count)]
+
+
+def load_landmarks(count=None, seed=0, jitter=0.01):
+    """
+    Load the recorded landmark fixture, optionally extended to count frames.
+
+    Frames beyond the recording repeat it with seeded Gaussian jitter on the
+    coordinates, so every run classifies the same inputs.
+
+    Returns:
+        np.ndarray: Array of shape (count, 33, 4) holding x, y, z and visibility.
+    """
+    recorded = np.load(LANDMARKS_PATH)
+    if count is None or count <= len(recorded):
+        return recorded[:count].copy()
+    rng = np.random.default_rng(seed)
+    repeats = -(-count // len(recorded))
+    landmarks = np.tile(recorded, (repeats, 1, 1))[:count]
+    noise = rng.normal(0, jitter, (count - len(recorded), landmarks.shape[1], 3)).astype(np.float32)
+    landmarks[len(recorded):, :, :3] += noise
+    return landmarks
+
+
+def to_landmark_lists(landmarks):
+    """Turn an array of shape (N, 33, 4) into the MediaPipe landmark lists detect_poses receives."""
+    frames = []
+    for frame in landmarks:
+        landmark_list = landmark_pb2.NormalizedLandmarkList()
+        for x, y, z, visibility in frame:
+            landmark_list.landmark.add(x=float(x), y=float(y), z=float(z), visibility=float(visibility))
+        frames.append(landmark_list.landmark)
+    return frames
+
+
+class ReplaySource(FrameSource):
+    """
+    Frame source that replays in-memory frames in a loop, as fast as they are
+    read or paced to fps, like a live camera.
+    """
+
+    def __init__(self, frames, **kwargs):
+        super().__init__(**kwargs)
+        self.frames = frames
+        self.index = 0
+
+    def _grab(self, image):
+        frame = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        if image is None or image.shape != frame.shape:
+            return frame.copy()
+        np.copyto(image, frame)
+        return image
+
+
+def record_landmarks(frames, model_complexity=Config.MODEL_COMPLEXITY):
+    """Run pose tracking over a clip and return the landmarks of every frame with a person."""
+    recorded = []
+    with mp.solutions.pose.Pose(model_complexity=model_complexity) as pose:
+        for frame in frames:
+            results = pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            if results.pose_landmarks:
+                recorded.append(landmarks_to_array(results.pose_landmarks.landmark))
+    return np.stack(recorded)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-record the landmark fixture from the demo clip.")
+    parser.add_argument("-o", "--output", default=LANDMARKS_PATH, help="Where to write the fixture (.npy)")
+    args = parser.parse_args(argv)
+
+    landmarks = record_landmarks(load_clip("demo"))
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    np.save(args.output, landmarks)
+    print(f"Recorded {len(landmarks)} frames of landmarks into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+# benchmarks/run.py
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+from threading import Event, Thread
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from benchmarks.fixtures import ReplaySource, load_clip, load_landmarks, to_landmark_lists
+from yoga_app.config import Config
+from yoga_app.utils.camera import PART_HEADER, PART_TRAILER, Camera
+from yoga_app.utils.multi_person import MultiPoseEstimator, PersonTracker
+from yoga_app.utils.pose_detection import PoseDetector
+from yoga_app.utils.pose_features import PoseFeatures
+from yoga_app.utils.pose_pool import get_pose_pool
+
+HIGHER = "higher"
+LOWER = "lower"
+MODEL_COMPLEXITIES = (0, 1, 2)
+PEOPLE_COUNTS = (1, 2, 4, 8)
+# Resident memory moves by several MB between identical runs as allocator arenas grow
+MEMORY_NOISE_MB = 10.0
+
+
+def metric(value, unit, better, noise=0.0):
+    """
+    Describe one measurement.
+
+    Parameters:
+        value (float): The measured value.
+        unit (str): Unit shown next to the value.
+        better (str): HIGHER or LOWER, the direction of an improvement.
+        noise (float): Absolute changes up to this size never count as regressions.
+    """
+    return {"value": float(value), "unit": unit, "better": better, "noise": noise}
+
+
+def best_time(function, number, repeat):
+    """Seconds per call of function, the fastest of repeat runs of number calls each."""
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def rss_mb():
+    """Resident memory of this process in MB, or None where /proc isn't available."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def bench_checks(options):
+    """Throughput of each pose rule on its own, including the features it computes."""
+    detector = PoseDetector()
+    frames = to_landmark_lists(load_landmarks(options.frames))
+    results = {}
+    for rule in detector.rules.rules:
+        def run(rule=rule):
+            for landmarks in frames:
+                rule(PoseFeatures(landmarks))
+        seconds = best_time(run, 1, options.repeat)
+        results[f"checks.{rule.name}"] = metric(len(frames) / seconds, "frames/s", HIGHER)
+    return results
+
+
+def bench_classifier(options):
+    """Throughput of the full classifier, per frame and batched; both gate the rules by orientation."""
+    detector = PoseDetector()
+    landmarks = load_landmarks(options.frames)
+    frames = to_landmark_lists(landmarks)
+
+    def run():
+        for frame in frames:
+            detector.detect_poses(frame)
+
+    per_frame = best_time(run, 1, options.repeat)
+    batched = best_time(lambda: detector.classify_batch(landmarks), 1, options.repeat)
+    return {
+        "classifier.detect_poses": metric(len(frames) / per_frame, "frames/s", HIGHER),
+        "classifier.classify_batch": metric(len(frames) / batched, "frames/s", HIGHER),
+    }
+
+
+def bench_inference(options):
+    """Latency of pose.process on the clip at every model complexity whose model is available."""
+    clip = [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in load_clip(options.clip)]
+    results = {}
+    for complexity in MODEL_COMPLEXITIES:
+        try:
+            pose = mp.solutions.pose.Pose(
+                model_complexity=complexity,
+                min_detection_confidence=Config.MIN_DETECTION_CONFIDENCE,
+                min_tracking_confidence=Config.MIN_TRACKING_CONFIDENCE
+            )
+        except Exception as e:
+            print(f"Skipping model complexity {complexity}: {e}")
+            continue
+        with pose:
+            for frame in clip[:5]:
+                pose.process(frame)
+            pose.reset()
+            latencies = []
+            for frame in clip:
+                started = time.perf_counter()
+                pose.process(frame)
+                latencies.append(time.perf_counter() - started)
+        latencies = np.array(latencies) * 1000.0
+        prefix = f"inference.complexity_{complexity}"
+        results[f"{prefix}.median_ms"] = metric(np.median(latencies), "ms", LOWER)
+        results[f"{prefix}.p95_ms"] = metric(np.percentile(latencies, 95), "ms", LOWER)
+    return results
+
+
+class Viewer:
+    """A client consuming one of the camera's streams on its own thread, counting what arrives."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.received = 0
+        self._stop = Event()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            for part in self.stream:
+                # Video streams yield header, JPEG and trailer per frame
+                if part is not PART_HEADER and part is not PART_TRAILER:
+                    self.received += 1
+                if self._stop.is_set():
+                    break
+        finally:
+            self.stream.close()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def _start_camera(options):
+    """A Camera replaying the clip, with the quality level pinned so runs are comparable."""
+    clip = load_clip(options.clip)
+    camera = Camera(source_factory=lambda: ReplaySource(clip, fps=options.capture_fps))
+    camera.quality.set_level(auto=False)
+    # Build the pose graphs before anything is timed, as create_app does
+    get_pose_pool(camera.quality.model_complexity)
+    return camera
+
+
+def _stop_camera(camera, viewers):
+    timeout = Config.CAMERA_IDLE_TIMEOUT
+    Config.CAMERA_IDLE_TIMEOUT = 0
+    try:
+        for viewer in viewers:
+            viewer.stop()
+        thread = camera._thread
+        if thread is not None:
+            thread.join()
+    finally:
+        Config.CAMERA_IDLE_TIMEOUT = timeout
+
+
+def bench_pipeline(options):
+    """End-to-end frames per second delivered by generate_frames and generate_pose_events."""
+    camera = _start_camera(options)
+    viewers = [Viewer(camera.generate_frames()), Viewer(camera.generate_pose_events())]
+    try:
+        # Let the first frames through before measuring
+        time.sleep(1.0)
+        counts = [viewer.received for viewer in viewers]
+        time.sleep(options.duration)
+        fps = [(viewer.received - count) / options.duration for viewer, count in zip(viewers, counts)]
+    finally:
+        _stop_camera(camera, viewers)
+    return {
+        "pipeline.annotated_fps": metric(fps[0], "frames/s", HIGHER),
+        "pipeline.pose_events_fps": metric(fps[1], "events/s", HIGHER),
+    }
+
+
+def bench_memory(options):
+    """Resident memory added by the camera pipeline, by each extra viewer and by each pose graph."""
+    if rss_mb() is None:
+        print("Skipping memory: /proc/self/statm is not available")
+        return {}
+    camera = _start_camera(options)
+    settle = max(1.0, options.duration / 2)
+    idle = rss_mb()
+    viewers = [Viewer(camera.generate_frames())]
+    try:
+        time.sleep(settle)
+        one_viewer = rss_mb()
+        viewers += [Viewer(camera.generate_frames()) for _ in range(options.viewers - 1)]
+        time.sleep(settle)
+        many_viewers = rss_mb()
+    finally:
+        _stop_camera(camera, viewers)
+
+    before = rss_mb()
+    graphs = []
+    for _ in range(3):
+        graph = mp.solutions.pose.Pose(model_complexity=Config.MODEL_COMPLEXITY)
+        graph.process(np.zeros((Config.CAMERA_HEIGHT, Config.CAMERA_WIDTH, 3), dtype=np.uint8))
+        graphs.append(graph)
+    per_graph = (rss_mb() - before) / len(graphs)
+    for graph in graphs:
+        graph.close()
+
+    return {
+        "memory.pipeline_mb": metric(one_viewer - idle, "MB", LOWER, MEMORY_NOISE_MB),
+        "memory.per_viewer_mb": metric(
+            (many_viewers - one_viewer) / max(options.viewers - 1, 1), "MB", LOWER, MEMORY_NOISE_MB
+        ),
+        "memory.per_pose_graph_mb": metric(per_graph, "MB", LOWER, MEMORY_NOISE_MB),
+    }
+
+
+def _tile(frame, count):
+    """Place count copies of a frame side by side, at most four per row."""
+    columns = min(count, 4)
+    rows = -(-count // columns)
+    height, width = frame.shape[:2]
+    tiled = np.zeros((rows * height, columns * width, 3), dtype=frame.dtype)
+    for i in range(count):
+        row, column = divmod(i, columns)
+        tiled[row * height:(row + 1) * height, column * width:(column + 1) * width] = frame
+    return tiled
+
+
+def bench_people(options):
+    """Per-frame cost of tracking and classifying 1 to 8 people, batched and person by person."""
+    detector = PoseDetector()
+    landmarks = load_landmarks(options.frames)
+    results = {}
+    batched_ms = {}
+    for count in PEOPLE_COUNTS:
+        # Different recorded frames stand in for different people
+        batches = [landmarks[np.arange(i, i + count) % len(landmarks)] for i in range(len(landmarks))]
+        lists = [to_landmark_lists(batch) for batch in batches]
+
+        def batched():
+            tracker = PersonTracker(Config.MULTI_PERSON_MATCH_DISTANCE, Config.MULTI_PERSON_MAX_MISSED)
+            for batch in batches:
+                tracker.update(batch)
+                detector.detect_poses_batch(batch)
+
+        def one_by_one():
+            for people in lists:
+                for person in people:
+                    detector.detect_poses(person)
+
+        batched_ms[count] = best_time(batched, 1, options.repeat) / len(batches) * 1000.0
+        loop_ms = best_time(one_by_one, 1, options.repeat) / len(batches) * 1000.0
+        results[f"people.{count}.classify_ms"] = metric(batched_ms[count], "ms", LOWER)
+        results[f"people.{count}.classify_per_person_ms"] = metric(loop_ms, "ms", LOWER)
+    most = PEOPLE_COUNTS[-1]
+    results[f"people.scaling_{most}_vs_1"] = metric(batched_ms[most] / batched_ms[1], "x", LOWER)
+
+    try:
+        estimator = MultiPoseEstimator(Config.MULTI_PERSON_MODEL_PATH, most)
+    except Exception as e:
+        print(f"Skipping multi-person inference: {e}")
+        return results
+    clip = [cv2.resize(frame, (320, 180)) for frame in load_clip(options.clip)]
+    timestamp = 0.0
+    for count in PEOPLE_COUNTS:
+        frames = [cv2.cvtColor(_tile(frame, count), cv2.COLOR_BGR2RGB) for frame in clip]
+        latencies = []
+        for frame in frames:
+            timestamp += 0.04
+            started = time.perf_counter()
+            estimator.process(frame, timestamp)
+            latencies.append(time.perf_counter() - started)
+        results[f"people.{count}.inference_ms"] = metric(np.median(latencies) * 1000.0, "ms", LOWER)
+    estimator.close()
+    return results
+
+
+BENCHMARKS = {
+    "checks": bench_checks,
+    "classifier": bench_classifier,
+    "inference": bench_inference,
+    "people": bench_people,
+    "pipeline": bench_pipeline,
+    "memory": bench_memory,
+}
+
+
+def environment():
+    """Versions and hardware the results were measured with."""
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "mediapipe": mp.__version__,
+    }
+
+
+def compare(baseline, current, tolerance):
+    """
+    Compare two sets of results.
+
+    Parameters:
+        baseline (dict): Metrics of a saved run, by name.
+        current (dict): Metrics of this run, by name.
+        tolerance (float): Relative change in the worse direction allowed
+            before a metric counts as a regression, e.g. 0.1 for 10%.
+
+    Returns:
+        list: (name, baseline value, current value, relative change, status)
+            rows, where status is "ok", "improved", "regressed" or "missing".
+    """
+    rows = []
+    for name, base in sorted(baseline.items()):
+        result = current.get(name)
+        if result is None:
+            rows.append((name, base["value"], None, None, "missing"))
+            continue
+        old, new = base["value"], result["value"]
+        change = (new - old) / abs(old) if old else 0.0
+        worse = -change if base["better"] == HIGHER else change
+        if abs(new - old) <= base.get("noise", 0.0):
+            status = "ok"
+        elif worse > tolerance:
+            status = "regressed"
+        elif worse < -tolerance:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append((name, old, new, change, status))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pose detection pipeline on recorded fixtures.")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS),
+                        help="Run only this benchmark; repeat for several (default: all)")
+    parser.add_argument("-o", "--output", help="Write the results as JSON to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="Flag regressions against results saved with --output")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Relative slowdown allowed by --compare (default: 0.1)")
+    parser.add_argument("--clip", choices=("demo", "synthetic"), default="demo",
+                        help="Clip replayed for inference and the pipeline (default: demo)")
+    parser.add_argument("--frames", type=int, default=2000, help="Landmark frames to classify (default: 2000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs, the fastest counts (default: 5)")
+    parser.add_argument("--duration", type=float, default=5.0,
+                        help="Seconds the pipeline is measured for (default: 5)")
+    parser.add_argument("--capture-fps", type=float, default=None,
+                        help="Pace the replayed capture to this rate (default: as fast as possible)")
+    parser.add_argument("--viewers", type=int, default=8, help="Viewers connected for the memory benchmark")
+    args = parser.parse_args(argv)
+
+    metrics = {}
+    for name in args.only or BENCHMARKS:
+        print(f"Running {name}...")
+        metrics.update(BENCHMARKS[name](args))
+
+    for name, result in sorted(metrics.items()):
+        print(f"{name:50} {result['value']:12.2f} {result['unit']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment(), "metrics": metrics}, f, indent=2, sort_keys=True)
+        print(f"Wrote {len(metrics)} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["metrics"]
+        rows = compare(baseline, metrics, args.tolerance)
+        print(f"\n{'metric':50} {'baseline':>12} {'current':>12} {'change':>8}  status")
+        for name, old, new, change, status in rows:
+            new_text = f"{new:12.2f}" if new is not None else f"{'-':>12}"
+            change_text = f"{change:+8.1%}" if change is not None else f"{'-':>8}"
+            print(f"{name:50} {old:12.2f} {new_text} {change_text}  {status}")
+        regressions = [row[0] for row in rows if row[4] == "regressed"]
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+# hub.py
+from yoga_app.utils.hub import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+# tests/test_batch_analysis.py
+import os
+
+from yoga_app.utils.batch_analysis import plan_video
+
+DEMO_VIDEO = os.path.join(os.path.dirname(os.path.dirname(__file__)), "Demo.webm")
+
+
+def test_last_chunk_reads_to_the_end(tmp_path):
+    # The WebM container overstates the frame count (55003 for 469 frames);
+    # a count that falls short must not cut the video off either
+    tasks, pending = plan_video(DEMO_VIDEO, str(tmp_path), 10.0, {})
+    assert len(tasks) > 1
+    assert tasks[-1]["frames"] is None
+    assert all(task["frames"] for task in tasks[:-1])
+    assert pending == tasks
@@ -0,0 +1,52 @@
+# tests/test_camera.py
+import time
+
+import pytest
+
+from yoga_app.config import Config
+from yoga_app.utils.camera import Camera
+from yoga_app.utils.camera_registry import CameraRegistry
+from yoga_app.utils.frame_source import SyntheticSource
+
+
+def test_viewers_end_when_the_source_cannot_be_created():
+    def broken_source():
+        raise ValueError("no such source")
+
+    camera = Camera(source_factory=broken_source)
+    assert list(camera.frames()) == []
+    assert camera._thread is None
+
+
+def test_registry_rejects_invalid_source_settings():
+    registry = CameraRegistry({"front": {"source": "synthetic"}, "side": {"source": "file"}})
+    with pytest.raises(ValueError, match="'side'"):
+        registry.check_sources()
+
+
+@pytest.mark.parametrize("camera_id", ["raw", "stats", "front/left"])
+def test_registry_rejects_ids_the_routes_cannot_reach(camera_id):
+    with pytest.raises(ValueError, match="clashes"):
+        CameraRegistry({camera_id: {"source": "synthetic"}})
+
+
+def test_single_person_fallback_crops_and_reports_no_people(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "MULTI_PERSON_ENABLED", True)
+    monkeypatch.setattr(Config, "MULTI_PERSON_MODEL_PATH", str(tmp_path / "missing.task"))
+    monkeypatch.setattr(Config, "ROI_ENABLED", True)
+    monkeypatch.setattr(Config, "CAMERA_IDLE_TIMEOUT", 0.0)
+    camera = Camera(source_factory=lambda: SyntheticSource(fps=30))
+    camera.quality.set_level(auto=False)
+    frames = camera.frames()
+    try:
+        for _ in range(5):
+            next(frames)
+        stats = camera.get_pipeline_stats()
+    finally:
+        frames.close()
+        # Don't leave the Pose graph running into interpreter shutdown
+        deadline = time.monotonic() + 10
+        while camera._thread is not None and time.monotonic() < deadline:
+            time.sleep(0.05)
+    assert "roi" in stats
+    assert "people" not in stats
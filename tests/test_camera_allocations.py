@@ -0,0 +1,42 @@
+# tests/test_camera_allocations.py
+import tracemalloc
+
+from yoga_app.config import Config
+from yoga_app.utils.camera import Camera
+from yoga_app.utils.frame_source import SyntheticSource
+
+WARMUP_FRAMES = 30
+MEASURED_FRAMES = 40
+# A pipeline that reuses its buffers allocates the JPEG and small objects per
+# frame (under 500 KB here); a copy of the frame itself exceeds the budget
+FRAME_BYTES = Config.CAMERA_WIDTH * Config.CAMERA_HEIGHT * 3
+MAX_PEAK_PER_FRAME = FRAME_BYTES * 3 // 4
+MAX_GROWTH_PER_FRAME = 16 * 1024
+
+
+def test_steady_state_allocations_stay_within_budget():
+    camera = Camera(source_factory=lambda: SyntheticSource(fps=30))
+    # A model switch midway would allocate a new graph
+    camera.quality.set_level(auto=False)
+    frames = camera.frames(annotate=True)
+    try:
+        for _ in range(WARMUP_FRAMES):
+            next(frames)
+
+        tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0]
+            peaks = []
+            for _ in range(MEASURED_FRAMES):
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                next(frames)
+                peaks.append(tracemalloc.get_traced_memory()[1] - before)
+            growth = tracemalloc.get_traced_memory()[0] - start
+        finally:
+            tracemalloc.stop()
+    finally:
+        frames.close()
+
+    assert max(peaks) < MAX_PEAK_PER_FRAME, f"a frame allocated {max(peaks)} bytes at its peak"
+    assert growth / MEASURED_FRAMES < MAX_GROWTH_PER_FRAME, f"memory grew by {growth} bytes"
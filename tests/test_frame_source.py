@@ -0,0 +1,10 @@
+# tests/test_frame_source.py
+from yoga_app.config import Config
+from yoga_app.utils.frame_source import create_frame_source
+
+
+def test_explicit_zero_fps_is_kept(monkeypatch):
+    monkeypatch.setattr(Config, "FRAME_SOURCE_FPS", 15)
+    assert create_frame_source("file", path="video.mp4", fps=0).fps == 0
+    assert create_frame_source("images", path="frames", fps=0).fps == 0
+    assert create_frame_source("file", path="video.mp4").fps == 15
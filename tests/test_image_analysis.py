@@ -0,0 +1,59 @@
+# tests/test_image_analysis.py
+import io
+
+import cv2
+import numpy as np
+import pytest
+from flask import Flask
+
+from yoga_app.config import Config
+from yoga_app.routes.main import main_bp
+from yoga_app.routes.upload import upload_bp
+from yoga_app.utils.image_analysis import image_size
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.secret_key = "test"
+    app.register_blueprint(main_bp)
+    app.register_blueprint(upload_bp)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = 1
+    return client
+
+
+@pytest.mark.parametrize("ext, params", [
+    (".jpg", []),
+    (".jpg", [cv2.IMWRITE_JPEG_PROGRESSIVE, 1]),
+    (".png", []),
+    (".webp", [cv2.IMWRITE_WEBP_QUALITY, 80]),
+    (".webp", [cv2.IMWRITE_WEBP_QUALITY, 101]),
+])
+def test_image_size_reads_the_header(ext, params):
+    ok, encoded = cv2.imencode(ext, np.zeros((37, 53, 3), dtype=np.uint8), params)
+    assert ok
+    assert image_size(encoded.tobytes()) == (53, 37)
+
+
+def test_image_size_rejects_other_data():
+    assert image_size(b"GIF89a") is None
+    assert image_size(b"\xff\xd8\xff") is None
+
+
+def test_oversized_images_are_rejected_before_decoding(client, monkeypatch):
+    monkeypatch.setattr(Config, "IMAGE_MAX_PIXELS", 100 * 100)
+    # A blank PNG compresses to a few KB whatever its size
+    ok, encoded = cv2.imencode(".png", np.zeros((200, 300, 3), dtype=np.uint8))
+    response = client.post("/analyze_image", data=encoded.tobytes(), content_type="image/png")
+    assert response.status_code == 400
+    assert "300x200" in response.get_json()["error"]
+
+
+@pytest.mark.parametrize("route", ["/analyze_image", "/analyze_images", "/analyze_frame"])
+def test_chunked_upload_is_411(client, route):
+    # A chunked body has no Content-Length to check against the size limit
+    response = client.post(route, input_stream=io.BytesIO(b"data"), content_type="image/png",
+                           headers={"Transfer-Encoding": "chunked"})
+    assert response.status_code == 411
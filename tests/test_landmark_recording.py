@@ -0,0 +1,23 @@
+# tests/test_landmark_recording.py
+import numpy as np
+
+from yoga_app.config import Config
+from yoga_app.utils.landmark_recording import LandmarkRecording, open_session_recorder
+
+
+def test_sessions_started_in_the_same_second_get_their_own_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "RECORDING_ENABLED", True)
+    monkeypatch.setattr(Config, "RECORDING_DIR", str(tmp_path))
+    # Both sessions start in the same second
+    monkeypatch.setattr("time.strftime", lambda fmt: "20240101-090000")
+    landmarks = np.random.RandomState(0).rand(33, 4).astype(np.float32)
+
+    first = open_session_recorder("camera", ["Tree Pose"])
+    first.append(1.0, landmarks, ["Tree Pose"])
+    first.close()
+    second = open_session_recorder("camera", ["Tree Pose"])
+    second.close()
+
+    assert second.path == str(tmp_path / "camera-20240101-090000-2.lmrec")
+    assert len(LandmarkRecording(first.path)) == 1
+    assert len(LandmarkRecording(second.path)) == 0
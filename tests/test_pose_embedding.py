@@ -0,0 +1,67 @@
+# tests/test_pose_embedding.py
+import numpy as np
+
+from yoga_app.config import Config
+from yoga_app.utils import pose_embedding as pose_embedding_module
+from yoga_app.utils.pose_embedding import PoseIndex, get_pose_index, pose_embedding
+
+
+def test_query_returns_k_poses_with_many_samples_per_pose():
+    rng = np.random.RandomState(0)
+    # Hundreds of references per pose; with mirrors, the nearest few dozen
+    # samples all belong to the queried pose
+    shapes = rng.rand(6, 1, 33, 4)
+    samples = [(f"pose-{i}", shape + rng.rand(300, 33, 4) * 0.02) for i, shape in enumerate(shapes)]
+    index = PoseIndex.build(samples)
+    frame = samples[2][1][0]
+
+    matches = index.query(frame, k=3)
+
+    embedding = pose_embedding(frame)
+    nearest = {}
+    for label_id, reference in zip(index.label_ids, index.embeddings):
+        distance = float(np.linalg.norm(reference - embedding))
+        label = index.labels[label_id]
+        nearest[label] = min(nearest.get(label, np.inf), distance)
+    expected = sorted(nearest.items(), key=lambda item: item[1])[:3]
+    assert [label for label, _ in matches] == [label for label, _ in expected]
+    np.testing.assert_allclose([d for _, d in matches], [d for _, d in expected], rtol=1e-5, atol=1e-6)
+
+
+def test_query_returns_every_pose_when_k_exceeds_them():
+    rng = np.random.RandomState(1)
+    index = PoseIndex.build([(name, rng.rand(50, 33, 4)) for name in ("a", "b")])
+    assert sorted(label for label, _ in index.query(rng.rand(33, 4), k=5)) == ["a", "b"]
+
+
+def test_query_stops_widening_at_max_neighbours(monkeypatch):
+    monkeypatch.setattr(pose_embedding_module, "MAX_NEIGHBOURS", 64)
+    rng = np.random.RandomState(2)
+    # The queried pose has far more references than the search may visit
+    shapes = rng.rand(2, 1, 33, 4)
+    index = PoseIndex.build([("crowded", shapes[0] + rng.rand(200, 33, 4) * 0.02), ("far", shapes[1])])
+    searched = []
+    tree = index.tree
+
+    class RecordingTree:
+        def query(self, x, k):
+            searched.append(k)
+            return tree.query(x, k=k)
+
+    index.tree = RecordingTree()
+
+    matches = index.query(shapes[0][0], k=2)
+
+    assert max(searched) == 64
+    assert [label for label, _ in matches] == ["crowded"]
+
+
+def test_pose_index_is_loaded_once(tmp_path, monkeypatch):
+    path = tmp_path / "index.npz"
+    PoseIndex.build([("a", np.random.RandomState(3).rand(5, 33, 4))]).save(path)
+    monkeypatch.setattr(Config, "POSE_INDEX_PATH", str(path))
+    monkeypatch.setattr(pose_embedding_module, "_index", None)
+    monkeypatch.setattr(pose_embedding_module, "_index_loaded", False)
+    index = get_pose_index()
+    assert index is not None and index.labels == ["a"]
+    assert get_pose_index() is index
@@ -0,0 +1,213 @@
+# tests/test_pose_rules.py
+import os
+
+import numpy as np
+import pytest
+
+from yoga_app.config import Config
+from yoga_app.utils.pose_detection import L, ORIENTATIONS, PoseDetector, array_to_landmarks
+from yoga_app.utils.pose_features import PoseFeatures
+from yoga_app.utils.pose_rules import RuleEngine
+
+# Outputs of the is_* methods as they were before the rules moved to JSON,
+# over parity_frames(): "expected" is an (N, 21) bool matrix with columns
+# named by "names", and "cat_cow" the label is_cat_cow_pose returned.
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "rule_parity.npz")
+
+LIMBS = [
+    (L.LEFT_SHOULDER, L.LEFT_ELBOW, L.LEFT_WRIST),
+    (L.RIGHT_SHOULDER, L.RIGHT_ELBOW, L.RIGHT_WRIST),
+    (L.LEFT_HIP, L.LEFT_KNEE, L.LEFT_ANKLE),
+    (L.RIGHT_HIP, L.RIGHT_KNEE, L.RIGHT_ANKLE),
+    (L.LEFT_SHOULDER, L.LEFT_HIP, L.LEFT_KNEE),
+    (L.RIGHT_SHOULDER, L.RIGHT_HIP, L.RIGHT_KNEE),
+]
+
+
+def parity_frames(count=6000, seed=0):
+    """
+    Random landmark frames that reach every rule's thresholds.
+
+    A third of the frames is uniform noise and the rest is squeezed into a
+    small box so the alignment and distance checks pass. In two thirds of
+    the frames each arm and leg is straightened with probability 0.7, and
+    each shoulder-hip-knee line with 0.3, which the angle checks need.
+    """
+    rng = np.random.RandomState(seed)
+    frames = rng.rand(count, 33, 4).astype(np.float32)
+    third = count // 3
+    box = frames[third:2 * third, :, :3]
+    box[:] = rng.rand(third, 1, 3) * 0.5 + 0.25 + (box - 0.5) * rng.rand(third, 1, 3) * 0.3
+    limbs = frames[third:]
+    # Straight torsos rule out the hips-highest poses, so they are rarer
+    straighten = rng.rand(len(limbs), len(LIMBS)) < [0.7, 0.7, 0.7, 0.7, 0.3, 0.3]
+    along = rng.rand(len(limbs), len(LIMBS)).astype(np.float32) * 0.6 + 0.2
+    for i, (start, middle, end) in enumerate(LIMBS):
+        rows = straighten[:, i]
+        t = along[rows, i, np.newaxis]
+        limbs[rows, middle, :2] = limbs[rows, start, :2] * (1 - t) + limbs[rows, end, :2] * t
+    return frames
+
+
+@pytest.fixture(scope="module")
+def parity():
+    fixture = np.load(FIXTURE)
+    rules = RuleEngine(Config.POSE_RULES_DIRS)
+    return {
+        "frames": parity_frames(),
+        "names": fixture["names"].tolist(),
+        "expected": fixture["expected"],
+        "cat_cow": fixture["cat_cow"],
+        "rules": {rule.name: rule for rule in rules.rules},
+    }
+
+
+def test_builtin_rules_cover_the_methods(parity):
+    assert sorted(parity["rules"]) == sorted(parity["names"])
+
+
+def test_builtin_rules_match_the_methods(parity):
+    features = PoseFeatures(parity["frames"])
+    for column, name in enumerate(parity["names"]):
+        if name == "Cat-Cow Pose":
+            continue
+        matched = np.asarray(parity["rules"][name](features))
+        mismatches = np.flatnonzero(matched != parity["expected"][:, column])
+        assert not len(mismatches), f"{name} differs on frames {mismatches[:10].tolist()}"
+
+
+def test_single_frame_rules_match_batched(parity):
+    batch = PoseFeatures(parity["frames"][:300])
+    for rule in parity["rules"].values():
+        batched = np.asarray(rule(batch))
+        single = [bool(rule(PoseFeatures(array_to_landmarks(frame).landmark))) for frame in parity["frames"][:300]]
+        assert batched.tolist() == single, rule.name
+
+
+def test_classify_batch_matches_detect_poses(parity):
+    detector = PoseDetector()
+    frames = parity["frames"][:300]
+    scores = detector.classify_batch(frames)
+    names = detector.rules.names
+    assert scores.shape == (len(frames), len(names))
+    assert scores.any()
+    for frame, row in zip(frames, scores):
+        expected = detector.detect_poses(array_to_landmarks(frame).landmark)
+        assert [name for name, matched in zip(names, row) if matched] == expected
+
+
+def test_cat_cow_rule_matches_only_cat_or_cow(parity):
+    # Deliberate change: is_cat_cow_pose returns the label "Neither" for other
+    # postures, which is truthy, so the method-based detector reported
+    # Cat-Cow on every frame. The rule matches only the cat or cow shape.
+    column = parity["names"].index("Cat-Cow Pose")
+    assert parity["expected"][:, column].all()
+    matched = np.asarray(parity["rules"]["Cat-Cow Pose"](PoseFeatures(parity["frames"])))
+    assert matched.tolist() == (parity["cat_cow"] != "Neither").tolist()
+
+
+def body(shoulders, hips, knees, ankles, nose_y=None, ear_y=None):
+    """A frame with both sides of the body at the given (x, y) points, fully visible."""
+    frame = np.full((33, 4), 0.5, dtype=np.float32)
+    frame[:, 3] = 1.0
+    for (left, right), (x, y) in [
+        ((L.LEFT_SHOULDER, L.RIGHT_SHOULDER), shoulders),
+        ((L.LEFT_HIP, L.RIGHT_HIP), hips),
+        ((L.LEFT_KNEE, L.RIGHT_KNEE), knees),
+        ((L.LEFT_ANKLE, L.RIGHT_ANKLE), ankles),
+    ]:
+        frame[[left, right], 0] = x
+        frame[[left, right], 1] = y
+    if nose_y is not None:
+        frame[L.NOSE, 1] = nose_y
+        frame[[L.LEFT_EAR, L.RIGHT_EAR], 1] = ear_y
+    return frame
+
+
+@pytest.mark.parametrize("frame, orientation", [
+    (body((0.5, 0.3), (0.5, 0.5), (0.5, 0.7), (0.5, 0.9)), "standing"),
+    (body((0.5, 0.3), (0.5, 0.5), (0.7, 0.52), (0.9, 0.53)), "seated"),
+    (body((0.5, 0.7), (0.5, 0.5), (0.5, 0.3), (0.5, 0.1)), "inverted"),
+    (body((0.3, 0.5), (0.6, 0.5), (0.8, 0.5), (0.95, 0.5), nose_y=0.45, ear_y=0.5), "supine"),
+    (body((0.3, 0.5), (0.6, 0.5), (0.8, 0.5), (0.95, 0.5), nose_y=0.55, ear_y=0.5), "prone"),
+])
+def test_orientation_of_basic_postures(frame, orientation):
+    detector = PoseDetector()
+    assert detector.classify_orientation(array_to_landmarks(frame).landmark) == orientation
+    assert ORIENTATIONS[detector.classify_orientation_batch(frame)[0]] == orientation
+
+
+def test_orientation_batch_matches_single_frames(parity):
+    detector = PoseDetector()
+    frames = parity["frames"]
+    batched = detector.classify_orientation_batch(frames)
+    # The parity frames reach every orientation
+    assert set(batched.tolist()) == set(range(len(ORIENTATIONS)))
+    single = [detector.classify_orientation(array_to_landmarks(frame).landmark) for frame in frames[:1000]]
+    assert single == [ORIENTATIONS[i] for i in batched[:1000]]
+
+
+def expected_detections(parity, detector, rows):
+    """
+    What detect_poses should return on the parity frames: the original methods'
+    results, kept only for rules registered for the frame's orientation
+    whose landmarks are visible enough.
+    """
+    orientations = detector.classify_orientation_batch(parity["frames"])
+    expected = []
+    for row in rows:
+        features = PoseFeatures(array_to_landmarks(parity["frames"][row]).landmark)
+        orientation = ORIENTATIONS[orientations[row]]
+        names = []
+        for rule in detector.rules.rules:
+            if rule.name == "Cat-Cow Pose":
+                matched = parity["cat_cow"][row] != "Neither"
+            else:
+                matched = parity["expected"][row, parity["names"].index(rule.name)]
+            if matched and orientation in rule.orientations and rule.is_visible(features):
+                names.append(rule.name)
+        expected.append(names)
+    return expected
+
+
+def test_detect_poses_drops_only_other_orientations_and_hidden_landmarks(parity):
+    detector = PoseDetector()
+    rows = range(2000)
+    expected = expected_detections(parity, detector, rows)
+    detected = [detector.detect_poses(array_to_landmarks(parity["frames"][row]).landmark) for row in rows]
+    assert detected == expected
+
+    # The gate and the visibility check both remove matches on these frames
+    features = PoseFeatures(parity["frames"][:2000])
+    orientation = detector.classify_orientation_batch(features)
+    ungated = gated = 0
+    for rule in detector.rules.rules:
+        matched = np.asarray(rule(features))
+        applies = np.isin(orientation, [ORIENTATIONS.index(o) for o in rule.orientations])
+        ungated += int(matched.sum())
+        gated += int((matched & applies).sum())
+    assert ungated > gated > sum(map(len, detected)) > 0
+
+
+def test_stage_counters_account_for_every_rule(parity):
+    detector = PoseDetector()
+    frames = parity["frames"][:500]
+    rules = detector.rules.rules
+    groups = {o: [rule for rule in rules if o in rule.orientations] for o in ORIENTATIONS}
+    orientations = [ORIENTATIONS[i] for i in detector.classify_orientation_batch(frames)]
+    hidden = sum(
+        not rule.is_visible(PoseFeatures(array_to_landmarks(frame).landmark))
+        for frame, orientation in zip(frames, orientations)
+        for rule in groups[orientation]
+    )
+
+    detector.reset_stage_stats()
+    for frame in frames:
+        detector.detect_poses(array_to_landmarks(frame).landmark)
+    stats = detector.get_stage_stats()
+
+    assert stats["orientation"] == {o: orientations.count(o) for o in ORIENTATIONS}
+    assert stats["checks_skipped"] == sum(len(rules) - len(groups[o]) for o in orientations)
+    assert stats["checks_hidden"] == hidden
+    assert stats["checks_run"] + stats["checks_hidden"] == sum(len(groups[o]) for o in orientations)
+    assert stats["checks_skipped"] > stats["checks_run"]
@@ -0,0 +1,30 @@
+# tests/test_practice_log.py
+from flask import Flask
+
+from yoga_app.config import Config
+from yoga_app.models import PracticeSession, db
+from yoga_app.utils.practice_log import PracticeLog
+
+
+def test_sessions_are_saved_when_frames_are_dropped(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "PRACTICE_MAX_PENDING", 0)
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'practice.db'}"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    log = PracticeLog()
+    log.init_app(app)
+    try:
+        key = log.start_session("test")
+        for i in range(10):
+            log.record(key, float(i), ["Tree Pose"])
+        log.end_session(key)
+        assert log.flush()
+        with app.app_context():
+            session = db.session.execute(db.select(PracticeSession)).scalar_one()
+            assert session.ended_at is not None
+            assert session.frames == 0
+        assert log.get_stats()["dropped"] == 10
+    finally:
+        log.close()
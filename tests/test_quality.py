@@ -0,0 +1,41 @@
+# tests/test_quality.py
+import pytest
+from flask import Flask
+
+from yoga_app.config import Config
+from yoga_app.models import User, db
+from yoga_app.routes.admin import admin_bp
+from yoga_app.utils.quality import QualityController
+
+
+@pytest.mark.parametrize("settings", [{"auto": "false"}, {"auto": 0}, {"level": True}, {"level": "1"}])
+def test_set_level_rejects_wrong_types(settings):
+    quality = QualityController([(1, 640), (0, 480)], target_ms=50.0)
+    with pytest.raises(ValueError):
+        quality.set_level(**settings)
+    assert quality.get_state()["level"] == 0
+    assert quality.get_state()["auto"] is True
+
+
+def test_quality_endpoint_reports_an_unreachable_hub(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "ADMIN_USERNAMES", ["admin"])
+    monkeypatch.setattr(Config, "HUB_ENABLED", True)
+    monkeypatch.setattr(Config, "HUB_SOCKET", str(tmp_path / "hub.sock"))
+    app = Flask(__name__)
+    app.secret_key = "test"
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'users.db'}"
+    db.init_app(app)
+    app.register_blueprint(admin_bp)
+    with app.app_context():
+        db.create_all()
+        admin = User(username="admin", email="admin@example.com")
+        admin.set_password("secret")
+        db.session.add(admin)
+        db.session.commit()
+        admin_id = admin.id
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = admin_id
+
+    assert client.get("/admin/quality").status_code == 503
+    assert client.post("/admin/quality", json={"level": 1}).status_code == 503
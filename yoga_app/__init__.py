@@ -14,14 +14,36 @@ def create_app(config_class=Config):
     
     db.init_app(app)
 
+    # Fail at startup rather than when the first viewer opens a camera
+    from yoga_app.utils.camera_registry import get_camera_registry
+    get_camera_registry().check_sources()
+
     # Register blueprints
     from yoga_app.routes.main import main_bp
     from yoga_app.routes.video import video_bp
+    from yoga_app.routes.upload import upload_bp
+    from yoga_app.routes.admin import admin_bp
+    from yoga_app.routes.metrics import metrics_bp
     
     app.register_blueprint(main_bp)
     app.register_blueprint(video_bp)
+    app.register_blueprint(upload_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(metrics_bp)
     
+    # Before the first connection, so it gets the SQLite pragmas too
+    from yoga_app.utils.practice_log import practice_log
+    practice_log.init_app(app)
+
     with app.app_context():
         db.create_all()
+
+    # Build the Pose graphs now rather than on the first stream. Inference
+    # workers start on first use instead: scripts such as run.py call
+    # create_app() at import, which spawned workers repeat while they
+    # bootstrap, and starting processes then fails.
+    if not Config.INFERENCE_WORKERS:
+        from yoga_app.utils.pose_pool import get_pose_pool
+        get_pose_pool()
     
     return app
\ No newline at end of file
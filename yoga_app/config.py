@@ -1,11 +1,118 @@
 # yoga_app/config.py
+import os
+
+
 class Config:
     DEBUG = True
     CAMERA_WIDTH = 640
     CAMERA_HEIGHT = 480
+    CAMERA_IDLE_TIMEOUT = 5.0  # seconds the camera stays open after the last viewer leaves
+    # Where the camera pipeline reads frames from: 'device', 'file' (video file),
+    # 'images' (directory of images), 'url' (network stream) or 'synthetic'
+    FRAME_SOURCE = 'device'
+    FRAME_SOURCE_DEVICE = 0
+    FRAME_SOURCE_PATH = None  # video file, image directory or stream URL
+    FRAME_SOURCE_LOOP = True  # restart files and image directories at the end
+    FRAME_SOURCE_FPS = None  # pace files, images and synthetic frames; None uses the file's own rate or 30, 0 doesn't pace
+    FRAME_SOURCE_READ_AHEAD = 2  # frames decoded ahead of the pipeline
+    # Cameras served at /video_feed/<camera_id>, each with its own capture and
+    # inference pipeline. An entry's 'source', 'device', 'path', 'fps' and
+    # 'loop' override the FRAME_SOURCE_* settings above, and 'cpus' pins its
+    # pipeline threads to those CPUs. /video_feed shows DEFAULT_CAMERA.
+    CAMERAS = {'default': {}}
+    DEFAULT_CAMERA = 'default'
+    INFERENCE_CONCURRENCY = None  # frames in inference at once across cameras; None uses the CPU count
+    # Run the camera pipeline once in a hub process (`python hub.py`) and
+    # have every web worker relay its streams over a Unix domain socket
+    HUB_ENABLED = False
+    HUB_SOCKET = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance', 'hub.sock')
+    HUB_TIMEOUT = 5.0  # seconds to connect and to answer a command
+    HUB_RECONNECT_ATTEMPTS = 5  # per stream, before giving up on a lost hub
+    HUB_RECONNECT_DELAY = 1.0
+    # Frames queued between the capture, inference and encode stages, and what
+    # to do when a stage falls behind: "drop_oldest" or "drop_newest"
+    PIPELINE_QUEUE_SIZE = 2
+    PIPELINE_DROP_POLICY = 'drop_oldest'
+    # Skip pose inference on frames that barely differ from the last processed one
+    MOTION_GATE_ENABLED = True
+    MOTION_GATE_THRESHOLD = 2.0  # mean absolute difference in gray levels on a 64x48 thumbnail
+    MOTION_GATE_REFRESH_FRAMES = 15  # process at least one frame in this many
+    # Crop inference input to a padded square around the tracked person
+    ROI_ENABLED = True
+    ROI_PADDING = 0.5  # fraction of the person's size added on every side
+    ROI_MIN_VISIBILITY = 0.5  # mean torso visibility below which the full frame is used
+    ROI_MAX_AREA_RATIO = 0.7  # larger regions use the full frame
+    # Inference quality ladder of (model complexity, inference width), best first.
+    # The camera pipeline steps down when inference exceeds the target frame time.
+    QUALITY_LEVELS = [(2, 640), (1, 640), (1, 480), (0, 480), (0, 320)]
+    QUALITY_START_LEVEL = 1
+    QUALITY_TARGET_FRAME_MS = 66.0
+    QUALITY_AUTO = True
+    ADMIN_USERNAMES = []  # users allowed to change runtime settings under /admin
+    # Pre-initialized Pose graphs shared by the camera and upload sessions
+    POSE_POOL_SIZE = 5
+    POSE_POOL_WARM = True  # run a blank frame through each graph at startup
+    # Frames uploaded by browsers to /analyze_frame
+    UPLOAD_MAX_SESSIONS = 4  # concurrent users with their own pose tracker
+    UPLOAD_MAX_FPS = 15  # per session
+    UPLOAD_SESSION_TIMEOUT = 30.0  # seconds without frames before a session is closed
+    UPLOAD_MAX_FRAME_BYTES = 2 * 1024 * 1024
+    # Photos posted to /analyze_image(s), analyzed with static-image Pose graphs
+    IMAGE_MAX_BYTES = 10 * 1024 * 1024  # per request
+    IMAGE_MAX_PIXELS = 25 * 1000 * 1000  # per photo, checked in its header before decoding
+    IMAGE_MAX_SIDE = 1280  # larger photos are scaled down before analysis
+    IMAGE_BATCH_MAX_IMAGES = 16
+    IMAGE_WORKERS = 2  # static-image Pose graphs, and threads analyzing a batch
+    # Landmarks of analyzed photos, keyed by a hash of the decoded pixels
+    IMAGE_CACHE_SIZE = 1024  # entries kept in memory
+    IMAGE_CACHE_DIR = None  # directory that evicted entries spill to; None drops them
+    IMAGE_CACHE_DISK_SIZE = 100000  # entries kept in IMAGE_CACHE_DIR
     MIN_DETECTION_CONFIDENCE = 0.5
     MIN_TRACKING_CONFIDENCE = 0.5
     MODEL_COMPLEXITY = 1
+    # Run pose inference in this many worker processes instead of the web
+    # process; 0 keeps it in process. Frames are handed over in shared memory.
+    INFERENCE_WORKERS = 0
+    INFERENCE_WORKER_SLOTS = 4  # frames in flight per worker
+    INFERENCE_SLOT_BYTES = 1280 * 720 * 3  # larger frames are scaled down to fit
+    INFERENCE_HEALTH_INTERVAL = 2.0  # seconds between worker health checks
+    INFERENCE_HEALTH_TIMEOUT = 10.0  # seconds without an answer before a worker is restarted
+    INFERENCE_TIMEOUT = 5.0  # seconds to wait for a frame's result
+    # Track up to MULTI_PERSON_MAX_PEOPLE people per camera frame, e.g. for
+    # group classes. Needs a MediaPipe pose landmarker bundle (.task) and
+    # runs in the web process; ROI cropping is off in this mode.
+    MULTI_PERSON_ENABLED = False
+    MULTI_PERSON_MAX_PEOPLE = 4
+    MULTI_PERSON_MODEL_PATH = os.path.join(os.path.dirname(__file__), 'pose_landmarker_full.task')
+    MULTI_PERSON_MATCH_DISTANCE = 0.2  # torso centre movement between frames, as a fraction of the frame
+    MULTI_PERSON_MAX_MISSED = 15  # frames a person may go undetected and keep their track ID
+    # Pose rule files; later directories override rules of the same name
+    POSE_RULES_DIRS = [os.path.join(os.path.dirname(__file__), 'rules')]
+    POSE_RULES_MIN_VISIBILITY = 0.5
+    POSE_RULES_RELOAD_INTERVAL = 2.0  # seconds between rule file checks, None disables
+    # Reference pose index built with `python -m yoga_app.utils.pose_embedding`
+    POSE_INDEX_PATH = os.path.join(os.path.dirname(__file__), 'pose_index.npz')
+    POSE_INDEX_NEIGHBOURS = 3
+    # Record landmarks and detected poses of every camera and upload session
+    # (about 250 bytes per frame); replay with `python -m yoga_app.utils.landmark_recording`
+    RECORDING_ENABLED = False
+    RECORDING_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'instance', 'recordings')
     SECRET_KEY = 'e11aa36470f4a9a632ff25e045d52a5df09e354c6b3bd8f8b1c8bc03f04ae38c'  # Change this to a secure secret key
     SQLALCHEMY_DATABASE_URI = 'sqlite:///users.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Applied to every SQLite connection: WAL lets requests read while the
+    # practice log writes, and NORMAL sync is safe with WAL
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+        'cache_size': -16000,  # KiB
+    }
+    # Detected poses saved as practice sessions and pose events
+    PRACTICE_HOLD_GAP = 0.5  # seconds a pose may go undetected without ending the hold
+    PRACTICE_MIN_HOLD_SECONDS = 1.0  # shorter holds aren't saved
+    PRACTICE_BATCH_SIZE = 500  # pose events per transaction
+    PRACTICE_FLUSH_INTERVAL = 2.0  # seconds between commits
+    PRACTICE_MAX_PENDING = 100000  # queued frames beyond this are dropped
+    PRACTICE_FLUSH_TIMEOUT = 30.0  # seconds PracticeLog.flush() waits by default
@@ -14,4 +14,35 @@ class User(db.Model):
         self.password_hash = generate_password_hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
\ No newline at end of file
+        return check_password_hash(self.password_hash, password)
+
+class PracticeSession(db.Model):
+    """One stretch of practice in front of the camera or through browser uploads."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    source = db.Column(db.String(20), nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False)
+    ended_at = db.Column(db.DateTime, nullable=True)
+    frames = db.Column(db.Integer, nullable=False, default=0)
+    events = db.relationship('PoseEvent', backref='session', lazy='dynamic')
+
+    __table_args__ = (
+        db.Index('ix_practice_session_user_started', 'user_id', 'started_at'),
+    )
+
+
+class PoseEvent(db.Model):
+    """An asana held without interruption during a practice session."""
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.Integer, db.ForeignKey('practice_session.id'), nullable=False, index=True)
+    # Copied from the session so a user's history is one index scan
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    pose = db.Column(db.String(80), nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False)
+    ended_at = db.Column(db.DateTime, nullable=False)
+    duration_seconds = db.Column(db.Float, nullable=False)
+    frames = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_pose_event_user_started', 'user_id', 'started_at'),
+    )
@@ -0,0 +1,44 @@
+# yoga_app/routes/admin.py
+from functools import wraps
+from flask import Blueprint, jsonify, request, session
+from yoga_app.config import Config
+from yoga_app.models import User
+from yoga_app.utils.hub import HubError, get_camera
+
+admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
+
+def admin_required(f):
+    """Allow only logged-in users listed in Config.ADMIN_USERNAMES."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        user = User.query.get(session['user_id']) if 'user_id' in session else None
+        if user is None or user.username not in Config.ADMIN_USERNAMES:
+            return jsonify(error="Admin access required"), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
+@admin_bp.route("/quality", methods=["GET", "POST"])
+@admin_required
+def quality():
+    """
+    Show or change a camera pipeline's inference quality.
+
+    ?camera= picks the camera, Config.DEFAULT_CAMERA by default. POST a
+    JSON object with "level" (index into Config.QUALITY_LEVELS) and/or
+    "auto" (whether the latency controller may change the level).
+    """
+    try:
+        camera = get_camera(request.args.get("camera"))
+    except KeyError:
+        return jsonify(error="Unknown camera"), 404
+    try:
+        if request.method == "POST":
+            settings = request.get_json(silent=True) or {}
+            try:
+                camera.quality.set_level(level=settings.get("level"), auto=settings.get("auto"))
+            except ValueError as e:
+                return jsonify(error=str(e)), 400
+        return jsonify(camera.quality.get_state())
+    except HubError as e:
+        # Web workers relaying a camera hub that is down or restarting
+        return jsonify(error=str(e)), 503
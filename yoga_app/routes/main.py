@@ -1,8 +1,11 @@
 # yoga_app/routes/main.py
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, g
 from yoga_app.models import User, db
 from yoga_app.models.recommendations import AsanaRecommendations
+from yoga_app.utils.metrics import REQUEST_SECONDS
+from yoga_app.utils.pose_detection import POSE_CONNECTIONS
 import re
+import time
 from functools import wraps
 
 main_bp = Blueprint('main', __name__)
@@ -17,6 +20,18 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+@main_bp.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@main_bp.after_request
+def record_request_latency(response):
+    if 'request_started' in g:
+        REQUEST_SECONDS.labels(request.endpoint, request.method, response.status_code).observe(
+            time.perf_counter() - g.request_started
+        )
+    return response
+
 @main_bp.route("/")
 def home():
     if 'user_id' in session:
@@ -49,7 +64,7 @@ def index():
 @main_bp.route("/pose_analysis")
 @login_required
 def pose_analysis():
-    return render_template("pose_analysis.html")
+    return render_template("pose_analysis.html", pose_connections=POSE_CONNECTIONS)
 
 @main_bp.route("/register", methods=["GET", "POST"])
 def register():
@@ -0,0 +1,10 @@
+# yoga_app/routes/metrics.py
+from flask import Blueprint, Response
+from yoga_app.utils.metrics import REGISTRY
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route("/metrics")
+def metrics():
+    """Expose every metric in the Prometheus text format."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,100 @@
+# yoga_app/routes/upload.py
+import math
+from flask import Blueprint, jsonify, request, session
+from yoga_app.config import Config
+from yoga_app.routes.main import login_required
+from yoga_app.utils.image_analysis import get_image_analyzer
+from yoga_app.utils.pose_pool import PoolExhausted
+from yoga_app.utils.upload_sessions import AdmissionError, get_upload_sessions
+
+upload_bp = Blueprint('upload', __name__)
+
+@upload_bp.route("/analyze_frame", methods=["POST"])
+@login_required
+def analyze_frame():
+    """
+    Analyze one frame captured by the browser.
+
+    The request body is the encoded image (JPEG, PNG or WebP). Clients send
+    frames one after another over a kept-alive connection; tracking state
+    carries over between the frames of a logged-in user.
+    """
+    if request.content_length is None:
+        return jsonify(error="Content-Length required"), 411
+    if request.content_length > Config.UPLOAD_MAX_FRAME_BYTES:
+        return jsonify(error="Frame too large"), 413
+
+    try:
+        result = get_upload_sessions().analyze(session['user_id'], request.get_data())
+    except AdmissionError as e:
+        response = jsonify(error=str(e), retry_after=round(e.retry_after, 3))
+        response.status_code = e.status
+        response.headers['Retry-After'] = str(max(1, math.ceil(e.retry_after)))
+        return response
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    return jsonify(result)
+
+@upload_bp.route("/analyze_frame", methods=["DELETE"])
+@login_required
+def end_frame_session():
+    get_upload_sessions().close_session(session['user_id'])
+    return "", 204
+
+@upload_bp.route("/analyze_frame/stats")
+def analyze_frame_stats():
+    return jsonify(get_upload_sessions().get_stats())
+
+@upload_bp.route("/analyze_image", methods=["POST"])
+@login_required
+def analyze_image():
+    """
+    Analyze a photo of a pose.
+
+    The photo (JPEG, PNG or WebP) is the request body or the "image" field
+    of a multipart form. Returns its landmarks, the detected poses and,
+    unless ?annotate=0, the photo with the skeleton drawn on it as base64
+    JPEG (see ImageAnalyzer.analyze).
+    """
+    if request.content_length is None:
+        return jsonify(error="Content-Length required"), 411
+    if request.content_length > Config.IMAGE_MAX_BYTES:
+        return jsonify(error="Image is too large"), 413
+
+    upload = request.files.get("image")
+    data = upload.read() if upload is not None else request.get_data()
+    try:
+        result = get_image_analyzer().analyze(data, annotate=request.args.get("annotate") != "0")
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    except PoolExhausted as e:
+        return jsonify(error=str(e)), 503
+    return jsonify(result)
+
+@upload_bp.route("/analyze_images", methods=["POST"])
+@login_required
+def analyze_images():
+    """
+    Analyze several photos, posted as "images" fields of a multipart form.
+
+    Returns {"results": [...]} with one result per photo, in order, or an
+    "error" for photos that couldn't be analyzed.
+    """
+    if request.content_length is None:
+        return jsonify(error="Content-Length required"), 411
+    if request.content_length > Config.IMAGE_MAX_BYTES:
+        return jsonify(error="Images are too large"), 413
+    uploads = request.files.getlist("images")
+    if not uploads:
+        return jsonify(error="No images posted"), 400
+    if len(uploads) > Config.IMAGE_BATCH_MAX_IMAGES:
+        return jsonify(error=f"At most {Config.IMAGE_BATCH_MAX_IMAGES} images per request"), 413
+
+    results = get_image_analyzer().analyze_batch(
+        [upload.read() for upload in uploads], annotate=request.args.get("annotate") != "0"
+    )
+    return jsonify(results=results)
+
+@upload_bp.route("/analyze_image/stats")
+def analyze_image_stats():
+    return jsonify(get_image_analyzer().get_stats())
@@ -1,14 +1,60 @@
 # yoga_app/routes/video.py
-from flask import Blueprint, Response
-from yoga_app.utils.camera import Camera
+from flask import Blueprint, Response, abort, jsonify, request
+from yoga_app.utils.hub import get_camera, get_cameras_stats
+from yoga_app.utils.inference_workers import get_inference_service
+from yoga_app.utils.pose_pool import get_pose_pool
 
 video_bp = Blueprint('video', __name__)
-camera = Camera()
 
-@video_bp.route("/video_feed")
-def video_feed():
+def _camera(camera_id):
+    """The pipeline of a camera in Config.CAMERAS, or a 404."""
+    try:
+        return get_camera(camera_id)
+    except KeyError:
+        abort(404, description=f"Unknown camera {camera_id!r}")
+
+@video_bp.route("/video_feed", defaults={"camera_id": None})
+@video_bp.route("/video_feed/<camera_id>")
+def video_feed(camera_id):
+    return Response(
+        _camera(camera_id).generate_frames(),
+        mimetype='multipart/x-mixed-replace; boundary=frame'
+    )
+
+@video_bp.route("/video_feed/raw", defaults={"camera_id": None})
+@video_bp.route("/video_feed/<camera_id>/raw")
+def raw_video_feed(camera_id):
+    """Mirrored camera frames without annotations, for clients that draw the skeleton themselves."""
     return Response(
-        camera.generate_frames(),
+        _camera(camera_id).generate_frames(annotate=False),
         mimetype='multipart/x-mixed-replace; boundary=frame'
     )
 
+@video_bp.route("/pose_stream", defaults={"camera_id": None})
+@video_bp.route("/pose_stream/<camera_id>")
+def pose_stream(camera_id):
+    """Server-Sent Events carrying landmarks and detected poses; ?delta=1 enables delta frames."""
+    return Response(
+        _camera(camera_id).generate_pose_events(delta=request.args.get("delta") == "1"),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@video_bp.route("/video_feed/stats", defaults={"camera_id": None})
+@video_bp.route("/video_feed/<camera_id>/stats")
+def video_feed_stats(camera_id):
+    return jsonify(_camera(camera_id).get_pipeline_stats())
+
+@video_bp.route("/cameras/stats")
+def cameras_stats():
+    """Frame rate, latency and queue stats of every camera, and how they share inference."""
+    return jsonify(get_cameras_stats())
+
+@video_bp.route("/pose_pool/stats")
+def pose_pool_stats():
+    return jsonify(get_pose_pool().get_stats())
+
+@video_bp.route("/inference_workers/stats")
+def inference_worker_stats():
+    service = get_inference_service()
+    return jsonify(service.get_stats() if service is not None else {"workers": []})
@@ -0,0 +1,307 @@
+# yoga_app/utils/batch_analysis.py
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from yoga_app.config import Config
+from yoga_app.utils.frame_source import DEFAULT_FPS, MAX_NATIVE_FPS
+from yoga_app.utils.pose_detection import NUM_LANDMARKS, PoseDetector, landmarks_to_array
+
+MANIFEST_VERSION = 1
+
+# Per-process state of a pool worker, set up by _init_worker
+_worker = {}
+
+
+def _init_worker(model_complexity, width):
+    # Workers already run in parallel; OpenCV's own threads would only contend
+    cv2.setNumThreads(1)
+    _worker["pose"] = mp.solutions.pose.Pose(
+        model_complexity=model_complexity,
+        min_detection_confidence=Config.MIN_DETECTION_CONFIDENCE,
+        min_tracking_confidence=Config.MIN_TRACKING_CONFIDENCE
+    )
+    _worker["detector"] = PoseDetector()
+    _worker["width"] = width
+
+
+def analyze_chunk(task):
+    """
+    Pool worker: run pose detection and the pose checks over one chunk of a video.
+
+    Parameters:
+        task (dict): The video path, the chunk's first frame ("start"), its
+            frame count ("frames", None to read to the end) and the file
+            the chunk's results are written to ("output").
+
+    Returns:
+        dict: The task with the number of frames read added.
+    """
+    pose, detector, width = _worker["pose"], _worker["detector"], _worker["width"]
+    names = detector.rules.names
+    column = {name: i for i, name in enumerate(names)}
+    # Tracking state from the previous chunk doesn't apply here
+    pose.reset()
+
+    cap = cv2.VideoCapture(task["path"])
+    frame_indices, timestamps, landmarks, poses = [], [], [], []
+    try:
+        if task["start"]:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, task["start"])
+        index = task["start"]
+        while task["frames"] is None or index < task["start"] + task["frames"]:
+            success, frame = cap.read()
+            if not success:
+                break
+            timestamps.append(cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0)
+            frame_indices.append(index)
+            index += 1
+
+            height, frame_width = frame.shape[:2]
+            if width and frame_width > width:
+                frame = cv2.resize(frame, (width, round(height * width / frame_width)),
+                                   interpolation=cv2.INTER_LINEAR)
+            results = pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+            detected = np.zeros(len(names), dtype=bool)
+            if results.pose_landmarks:
+                landmarks.append(landmarks_to_array(results.pose_landmarks.landmark))
+                for name in detector.detect_poses(results.pose_landmarks.landmark):
+                    detected[column[name]] = True
+            else:
+                landmarks.append(np.full((NUM_LANDMARKS, 4), np.nan, dtype=np.float32))
+            poses.append(detected)
+    finally:
+        cap.release()
+
+    _save_npz(
+        task["output"],
+        frame=np.array(frame_indices, dtype=np.int64),
+        time=np.array(timestamps, dtype=np.float64),
+        landmarks=np.array(landmarks, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 4),
+        poses=np.array(poses, dtype=bool).reshape(-1, len(names)),
+        pose_names=np.array(names),
+    )
+    return dict(task, read=len(frame_indices))
+
+
+def _save_npz(path, **arrays):
+    # Write next to the target and rename, so an interrupted run never
+    # leaves a partial chunk that a resumed run would trust
+    partial = path + ".partial.npz"
+    np.savez(partial, **arrays)
+    os.replace(partial, path)
+
+
+def _write_json(path, data):
+    partial = path + ".partial"
+    with open(partial, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(partial, path)
+
+
+def plan_video(path, output_dir, chunk_seconds, settings, restart=False):
+    """
+    Split a video into chunks and list those that still need analyzing.
+
+    Chunk results live in output_dir/chunks. A manifest records the video
+    and settings they were made with; finished chunks are reused when the
+    manifest still matches, otherwise the video starts over.
+
+    Returns:
+        tuple: (all chunk tasks, tasks still to run)
+    """
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            raise IOError(f"Could not open video {path}")
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+    finally:
+        cap.release()
+    if not 0 < fps <= MAX_NATIVE_FPS:
+        fps = DEFAULT_FPS
+
+    stat = os.stat(path)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "video": os.path.abspath(path),
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "settings": dict(settings, chunk_seconds=chunk_seconds),
+    }
+    chunk_dir = os.path.join(output_dir, "chunks")
+    manifest_path = os.path.join(output_dir, "manifest.json")
+    if not restart and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            if json.load(f) != manifest:
+                print(f"{path}: video or settings changed since the last run, starting over")
+                restart = True
+    os.makedirs(chunk_dir, exist_ok=True)
+    if restart:
+        for name in os.listdir(chunk_dir):
+            os.remove(os.path.join(chunk_dir, name))
+    _write_json(manifest_path, manifest)
+
+    chunk_frames = max(1, int(chunk_seconds * fps))
+    # Unknown length: one chunk
+    starts = range(0, frame_count, chunk_frames) if frame_count > 0 else [0]
+    tasks = [
+        {
+            "path": path,
+            "start": start,
+            "frames": chunk_frames,
+            "output": os.path.join(chunk_dir, f"{i:06d}.npz"),
+        }
+        for i, start in enumerate(starts)
+    ]
+    # CAP_PROP_FRAME_COUNT is an estimate from the container (Demo.webm
+    # reports 55003 frames for 469), so the last chunk reads to the end
+    # instead of stopping at the estimate; chunks past the real end read none
+    tasks[-1]["frames"] = None
+    pending = [task for task in tasks if not os.path.exists(task["output"])]
+    return tasks, pending
+
+
+def merge_chunks(tasks, output_dir):
+    """Concatenate a video's chunk results into output_dir/frames.npz and return them."""
+    parts = [np.load(task["output"]) for task in tasks]
+    merged = {
+        key: np.concatenate([part[key] for part in parts])
+        for key in ("frame", "time", "landmarks", "poses")
+    }
+    merged["pose_names"] = parts[0]["pose_names"]
+    _save_npz(os.path.join(output_dir, "frames.npz"), **merged)
+    return merged
+
+
+def summarize(results):
+    """
+    Total the time spent in each asana.
+
+    Each frame lasts until the next frame's timestamp; the last frame gets the
+    median frame duration. Holding a pose means consecutive frames detecting it.
+
+    Parameters:
+        results (dict): Merged per-frame results (see merge_chunks).
+
+    Returns:
+        dict: Frame count, duration and seconds with a person in view, and
+            per detected asana its seconds, frames and longest hold in seconds.
+    """
+    times, poses = results["time"], results["poses"]
+    if len(times) == 0:
+        return {"frames": 0, "duration_seconds": 0.0, "person_seconds": 0.0, "poses": {}}
+    durations = np.diff(times)
+    last = float(np.median(durations)) if len(durations) else 1.0 / DEFAULT_FPS
+    durations = np.clip(np.append(durations, last), 0.0, None)
+    person = ~np.isnan(results["landmarks"][:, 0, 0])
+
+    summary = {}
+    for column, name in enumerate(results["pose_names"]):
+        detected = poses[:, column]
+        if not detected.any():
+            continue
+        # Split into runs of consecutive detections
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], detected.astype(np.int8), [0]))))
+        holds = [durations[start:end].sum() for start, end in zip(edges[::2], edges[1::2])]
+        summary[str(name)] = {
+            "seconds": round(float(durations[detected].sum()), 3),
+            "frames": int(detected.sum()),
+            "longest_hold_seconds": round(float(max(holds)), 3),
+        }
+    return {
+        "frames": int(len(times)),
+        "duration_seconds": round(float(durations.sum()), 3),
+        "person_seconds": round(float(durations[person].sum()), 3),
+        "poses": dict(sorted(summary.items(), key=lambda item: -item[1]["seconds"])),
+    }
+
+
+def analyze_videos(paths, output, workers=None, chunk_seconds=60.0, model_complexity=Config.MODEL_COMPLEXITY,
+                   width=Config.CAMERA_WIDTH, restart=False):
+    """
+    Analyze video files in parallel, one MediaPipe Pose per worker process.
+
+    Every video is split into chunks of chunk_seconds; chunks of all videos
+    share one process pool, so a single long video uses every worker. For each
+    video, output/<name>/ receives frames.npz with per-frame landmarks (NaN
+    without a person) and pose labels, and summary.json with the time spent
+    in each asana. Chunks finished by an interrupted run are kept and skipped
+    when the same command is run again.
+
+    Returns:
+        dict: The summary of each video, by path.
+    """
+    settings = {"model_complexity": model_complexity, "width": width}
+    names = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    if len(set(names)) != len(names):
+        raise ValueError("Videos must have distinct file names; they name the output directories")
+
+    videos = {}
+    pending = []
+    for path, name in zip(paths, names):
+        output_dir = os.path.join(output, name)
+        tasks, todo = plan_video(path, output_dir, chunk_seconds, settings, restart)
+        videos[path] = {"dir": output_dir, "tasks": tasks, "remaining": len(todo)}
+        pending += todo
+        if len(todo) < len(tasks):
+            print(f"{path}: resuming, {len(tasks) - len(todo)} of {len(tasks)} chunks already done")
+
+    def finish(path):
+        video = videos[path]
+        summary = summarize(merge_chunks(video["tasks"], video["dir"]))
+        summary = dict(video=os.path.abspath(path), settings=settings, **summary)
+        _write_json(os.path.join(video["dir"], "summary.json"), summary)
+        print(f"{path}: {summary['frames']} frames, results in {video['dir']}")
+        return summary
+
+    summaries = {path: finish(path) for path, video in videos.items() if video["remaining"] == 0}
+    if pending:
+        workers = min(workers or os.cpu_count() or 1, len(pending))
+        started = time.monotonic()
+        frames = 0
+        # Spawned rather than forked: MediaPipe and OpenCV threads in the
+        # parent don't survive a fork
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(workers, _init_worker, (model_complexity, width)) as pool:
+            for done, result in enumerate(pool.imap_unordered(analyze_chunk, pending), 1):
+                frames += result["read"]
+                elapsed = time.monotonic() - started
+                eta = elapsed / done * (len(pending) - done)
+                print(f"[{done}/{len(pending)} chunks] {frames} frames, {frames / elapsed:.1f} frames/s, "
+                      f"ETA {eta:.0f}s", file=sys.stderr, flush=True)
+                video = videos[result["path"]]
+                video["remaining"] -= 1
+                if video["remaining"] == 0:
+                    summaries[result["path"]] = finish(result["path"])
+    return {path: summaries[path] for path in paths}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Detect asanas in recorded videos with a pool of worker processes.")
+    parser.add_argument("videos", nargs="+", help="Video files to analyze")
+    parser.add_argument("-o", "--output", required=True, help="Directory receiving one results directory per video")
+    parser.add_argument("-j", "--workers", type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-seconds", type=float, default=60.0,
+                        help="Length of the pieces videos are split into (default: 60)")
+    parser.add_argument("--model-complexity", type=int, choices=(0, 1, 2), default=Config.MODEL_COMPLEXITY,
+                        help=f"MediaPipe Pose model complexity (default: {Config.MODEL_COMPLEXITY})")
+    parser.add_argument("--width", type=int, default=Config.CAMERA_WIDTH,
+                        help=f"Scale wider frames down to this width before inference (default: {Config.CAMERA_WIDTH})")
+    parser.add_argument("--restart", action="store_true", help="Discard results of earlier runs")
+    args = parser.parse_args(argv)
+
+    analyze_videos(args.videos, args.output, args.workers, args.chunk_seconds,
+                   args.model_complexity, args.width, args.restart)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,76 +1,643 @@
 # yoga_app/utils/camera.py
+import os
+import time
+from contextlib import nullcontext
 import cv2
-from threading import Lock
+from threading import Condition, Lock, Thread
 import mediapipe as mp
 from yoga_app.config import Config
-from yoga_app.utils.pose_detection import PoseDetector
+from yoga_app.utils.frame_source import create_frame_source
+from yoga_app.utils.inference_workers import InferenceError, ModelUnavailable, get_inference_service
+from yoga_app.utils.landmark_recording import open_session_recorder
+from yoga_app.utils.metrics import (
+    ACTIVE_STREAMS, CAMERA_FRAMES, CAMERA_LATENCY_SECONDS, FRAMES_CAPTURED, FRAMES_DROPPED, FRAMES_ENCODED,
+    FRAMES_FAILED, STAGE_SECONDS
+)
+from yoga_app.utils.motion_gate import MotionGate
+from yoga_app.utils.multi_person import MultiPoseEstimator, PersonTracker
+from yoga_app.utils.pipeline import DropQueue, FramePool, FrameStats, reuse
+from yoga_app.utils.pose_detection import PoseDetector, array_to_landmarks, landmarks_to_array
+from yoga_app.utils.pose_pool import PoolExhausted, get_pose_pool
+from yoga_app.utils.practice_log import practice_log
+from yoga_app.utils.quality import QualityController
+from yoga_app.utils.roi import RoiTracker
+from yoga_app.utils.pose_stream import PoseStreamEncoder
+
+PART_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+PART_TRAILER = b'\r\n'
+
+# Seconds the inference stage waits before asking an exhausted pose pool again
+POOL_BACKOFF = 0.5
+POOL_MAX_BACKOFF = 8.0
+
+LANDMARK_STYLE = mp.solutions.drawing_utils.DrawingSpec(color=(245,117,66), thickness=2, circle_radius=2)
+CONNECTION_STYLE = mp.solutions.drawing_utils.DrawingSpec(color=(245,66,230), thickness=2, circle_radius=2)
+
+
+def draw_pose(frame, pose_landmarks, detected_poses):
+    """
+    Draw one person's skeleton and detected poses onto a BGR frame in place.
+
+    Parameters:
+        frame (np.ndarray): The frame, BGR.
+        pose_landmarks: MediaPipe pose landmarks (NormalizedLandmarkList).
+        detected_poses (list): Names of the detected poses.
+    """
+    mp.solutions.drawing_utils.draw_landmarks(
+        frame,
+        pose_landmarks,
+        mp.solutions.pose.POSE_CONNECTIONS,
+        LANDMARK_STYLE,
+        CONNECTION_STYLE
+    )
+
+    pose_text = "Detected: " + ", ".join(detected_poses) if detected_poses else "No pose detected"
+    cv2.putText(
+        frame,
+        pose_text,
+        (10, 30),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        1,
+        (0, 255, 0) if detected_poses else (0, 0, 255),
+        2
+    )
+
 
 class Camera:
-    def __init__(self):
-        self.lock = Lock()
+    """
+    One capture and inference pipeline shared by every viewer of the video feed.
+
+    The camera is opened by the first subscriber. Capture, pose inference and
+    annotate/encode run on their own threads, connected by bounded DropQueues
+    (Config.PIPELINE_QUEUE_SIZE, Config.PIPELINE_DROP_POLICY), so the stages
+    overlap instead of adding up.
+
+    Viewers subscribe to one of three streams: annotated JPEGs ("annotated"),
+    plain mirrored JPEGs ("raw") for clients that draw the skeleton themselves,
+    or the pose results alone ("pose"). Frames are only encoded, and only
+    annotated, while someone subscribes to that stream. Subscribers always
+    receive the newest item; a slow client skips frames instead of queueing
+    them. Once the last subscriber leaves, the camera is released after
+    Config.CAMERA_IDLE_TIMEOUT seconds unless someone subscribes again.
+
+    source_factory is called each time the pipeline starts and returns the
+    FrameSource to read from; by default the one selected in Config (see
+    create_frame_source).
+
+    With several cameras (see CameraRegistry), camera_id names this one in
+    stats, metrics, recordings and practice sessions, cpus pins its
+    pipeline threads to those CPUs, and a shared FairScheduler gives every
+    camera its turn at inference.
+    """
+
+    def __init__(self, source_factory=None, camera_id=None, cpus=None, scheduler=None):
+        self.source_factory = source_factory or create_frame_source
+        self.camera_id = camera_id or Config.DEFAULT_CAMERA
+        self.name = "camera" if self.camera_id == Config.DEFAULT_CAMERA else f"camera-{self.camera_id}"
+        self.cpus = set(cpus) if cpus else None
+        self.scheduler = scheduler
+        self.frame_stats = FrameStats()
+        self._pool_backoff = 0.0
+        self._pool_retry_at = 0.0
         self.detector = PoseDetector()
+        self.lock = Lock()
+        self._frame_ready = Condition(self.lock)
+        self._frames = {"annotated": None, "raw": None}
+        self._frame_id = 0
+        self._pose_result = None
+        self._pose_id = 0
+        self._subscribers = {"annotated": 0, "raw": 0, "pose": 0}
+        self._idle_since = None
+        self._thread = None
+        self._queues = {}
+        self.motion_gate = None
+        self.roi = None
+        self.people_tracker = None
+        self.recorder = None
+        self.practice_session = None
+        self.buffers = FramePool(Config.PIPELINE_QUEUE_SIZE * 2 + 4)
+        self.quality = QualityController(
+            Config.QUALITY_LEVELS,
+            Config.QUALITY_TARGET_FRAME_MS,
+            start_level=Config.QUALITY_START_LEVEL,
+            auto=Config.QUALITY_AUTO
+        )
+
+    def generate_frames(self, annotate=True):
+        """
+        Yield the shared stream as multipart JPEG parts until the client leaves.
+
+        Parameters:
+            annotate (bool): Draw the skeleton and detected poses onto the frames.
+        """
+        for frame_bytes in self.frames(annotate):
+            # The JPEG is shared by every viewer; yielding the part in
+            # pieces avoids copying it into a new bytes object per viewer.
+            yield PART_HEADER
+            yield frame_bytes
+            yield PART_TRAILER
 
-    def generate_frames(self):
+    def frames(self, annotate=True):
+        """Yield each new JPEG of the annotated or raw stream until the client leaves."""
+        kind = "annotated" if annotate else "raw"
+        self._subscribe(kind)
+        try:
+            last_id = 0
+            while True:
+                frame = self._wait_for_frame(last_id, kind)
+                if frame is None:
+                    break
+                last_id, frame_bytes = frame
+                yield frame_bytes
+        finally:
+            self._unsubscribe(kind)
+
+    def generate_pose_events(self, delta=False):
+        """
+        Yield the pose results as Server-Sent Events until the client leaves.
+
+        Parameters:
+            delta (bool): Send landmarks as differences from the previous event
+                where possible (see PoseStreamEncoder).
+        """
+        encoder = PoseStreamEncoder(delta=delta)
+        self._subscribe("pose")
+        try:
+            last_id = 0
+            while True:
+                result = self._wait_for_pose(last_id)
+                if result is None:
+                    break
+                last_id, (timestamp, landmarks, poses, people, nearest) = result
+                yield encoder.encode(last_id, timestamp, landmarks, poses, people, nearest)
+        finally:
+            self._unsubscribe("pose")
+
+    def _subscribe(self, kind):
+        ACTIVE_STREAMS.labels(kind).inc()
+        with self.lock:
+            self._subscribers[kind] += 1
+            self._idle_since = None
+            if self._thread is None:
+                self._start_capture()
+
+    def _unsubscribe(self, kind):
+        ACTIVE_STREAMS.labels(kind).dec()
+        with self.lock:
+            self._subscribers[kind] -= 1
+            if not any(self._subscribers.values()):
+                self._idle_since = time.monotonic()
+
+    def _wait_for_frame(self, last_id, kind):
+        """Block until a frame newer than last_id exists; None once capture has stopped."""
+        with self.lock:
+            while self._frames[kind] is None or self._frame_id <= last_id:
+                if self._thread is None:
+                    return None
+                self._frame_ready.wait(timeout=1.0)
+            return self._frame_id, self._frames[kind]
+
+    def _wait_for_pose(self, last_id):
+        """Block until a pose result newer than last_id exists; None once capture has stopped."""
+        with self.lock:
+            while self._pose_result is None or self._pose_id <= last_id:
+                if self._thread is None:
+                    return None
+                self._frame_ready.wait(timeout=1.0)
+            return self._pose_id, self._pose_result
+
+    def _start_capture(self):
+        # Called with self.lock held
+        self._frames = {"annotated": None, "raw": None}
+        self._pose_result = None
+        self._thread = Thread(target=self._capture_loop, name=f"{self.name}-capture", daemon=True)
+        self._thread.start()
+
+    def _is_idle(self):
+        # Called with self.lock held
+        return (
+            not any(self._subscribers.values()) and
+            self._idle_since is not None and
+            time.monotonic() - self._idle_since >= Config.CAMERA_IDLE_TIMEOUT
+        )
+
+    def _publish(self, frames):
+        with self.lock:
+            self._frames = frames
+            self._frame_id += 1
+            self._frame_ready.notify_all()
+
+    def _publish_pose(self, result):
         with self.lock:
-            cap = cv2.VideoCapture(0)
-            
-            if not cap.isOpened():
-                print("Error: Could not open camera")
+            self._pose_result = result
+            self._pose_id += 1
+            self._frame_ready.notify_all()
+
+    def _capture_loop(self):
+        # Before the source starts its read-ahead thread, which inherits the CPUs
+        self._pin()
+        stopped_idle = False
+        source = None
+        # Frame buffers travel capture -> inference -> encode and come back
+        # here when encoded or dropped
+        inference_queue = DropQueue(Config.PIPELINE_QUEUE_SIZE, Config.PIPELINE_DROP_POLICY,
+                                    on_drop=self._drop_captured)
+        encode_queue = DropQueue(Config.PIPELINE_QUEUE_SIZE, Config.PIPELINE_DROP_POLICY,
+                                 on_drop=self._drop_inferred)
+        stages = [
+            Thread(target=self._inference_loop, args=(inference_queue, encode_queue),
+                   name=f"{self.name}-inference", daemon=True),
+            Thread(target=self._encode_loop, args=(encode_queue,), name=f"{self.name}-encode", daemon=True),
+        ]
+        try:
+            try:
+                source = self.source_factory()
+            except Exception as e:
+                # E.g. a misconfigured source; viewers are told below that the stream ended
+                print(f"Error: Could not create the frame source of {self.name}: {e}")
                 return
-            
-            cap.set(cv2.CAP_PROP_FRAME_WIDTH, Config.CAMERA_WIDTH)
-            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, Config.CAMERA_HEIGHT)
-            
-            with self.detector.mp_pose.Pose(
-                min_detection_confidence=Config.MIN_DETECTION_CONFIDENCE,
-                min_tracking_confidence=Config.MIN_TRACKING_CONFIDENCE,
-                model_complexity=Config.MODEL_COMPLEXITY
-            ) as pose:
+            if not source.open(self.buffers):
+                print(f"Error: Could not open {source}")
+                return
+
+            with self.lock:
+                self._queues = {"inference": inference_queue, "encode": encode_queue}
+                if Config.MOTION_GATE_ENABLED:
+                    self.motion_gate = MotionGate(Config.MOTION_GATE_THRESHOLD, Config.MOTION_GATE_REFRESH_FRAMES)
+                self.recorder = open_session_recorder(self.name, self.detector.rules.names, {"source": repr(source)})
+                self.practice_session = practice_log.start_session(self.name)
+            for stage in stages:
+                stage.start()
+
+            while True:
+                with self.lock:
+                    if self._is_idle():
+                        stopped_idle = True
+                        break
+
+                success, frame = source.read()
+                if not success:
+                    if not source.finished:
+                        FRAMES_FAILED.labels("capture").inc()
+                    break
+                FRAMES_CAPTURED.inc()
+                if inference_queue.closed:
+                    break
+                inference_queue.put((time.time(), frame))
+        finally:
+            # Closing the first queue drains the pipeline stage by stage
+            inference_queue.close()
+            for stage in stages:
+                if stage.is_alive():
+                    stage.join()
+            if source is not None:
+                source.release()
+            if self.recorder is not None:
+                self.recorder.close()
+            practice_log.end_session(self.practice_session)
+            with self.lock:
+                self._thread = None
+                # A viewer may have arrived while an idle camera was shutting down
+                if stopped_idle and any(self._subscribers.values()):
+                    self._start_capture()
+                self._frame_ready.notify_all()
+
+    def _inference_loop(self, inference_queue, encode_queue):
+        """Pipeline stage: run pose detection on captured frames."""
+        self._pin()
+        estimator = self._open_estimator() if Config.MULTI_PERSON_ENABLED else None
+        service = get_inference_service() if estimator is None else None
+        try:
+            with self.lock:
+                # Multi-person detection needs the whole frame; single-person
+                # detection, also when the landmarker failed to load, can crop
+                self.people_tracker = self.roi = None
+                if estimator is not None:
+                    self.people_tracker = PersonTracker(Config.MULTI_PERSON_MATCH_DISTANCE,
+                                                        Config.MULTI_PERSON_MAX_MISSED)
+                elif Config.ROI_ENABLED:
+                    self.roi = RoiTracker(Config.ROI_PADDING, Config.ROI_MIN_VISIBILITY, Config.ROI_MAX_AREA_RATIO)
+            complexity = self.quality.model_complexity
+            self._pool_backoff = 0.0
+            self._pool_retry_at = 0.0
+            # With inference workers, the pose graph lives in a worker process
+            needs_pose = service is None and estimator is None
+            pose = self._checkout_pose(complexity) if needs_pose else None
+            buffers = {}
+            try:
+                pose_landmarks = landmarks = detected_poses = people = nearest = None
                 while True:
-                    success, frame = cap.read()
-                    if not success:
+                    item = inference_queue.get()
+                    if item is None:
                         break
+                    timestamp, frame = item
+
+                    cv2.flip(frame, 1, dst=frame)
+                    # While the user holds still, reuse the previous result
+                    if self.motion_gate is None or self.motion_gate.should_process(frame):
+                        if needs_pose and pose is None:
+                            complexity = self.quality.model_complexity
+                            pose = self._checkout_pose(complexity)
+                        elif pose is not None and self.quality.model_complexity != complexity:
+                            pose, complexity = self._switch_model(pose, complexity)
+
+                        image, box = self.roi.crop(frame) if self.roi is not None else (frame, None)
+                        # Waits for a turn while other cameras use the inference capacity
+                        with self._inference_slot():
+                            started = time.perf_counter()
+                            if estimator is not None:
+                                people = self._detect_people(estimator, image, timestamp, buffers)
+                                elapsed = time.perf_counter() - started
+                                # The longest tracked person also fills the single-person fields
+                                pose_landmarks = None
+                                landmarks, detected_poses = people[0][1:] if people else (None, None)
+                            elif needs_pose and pose is None:
+                                # No pose graph was free; pass the frame on without landmarks
+                                pose_landmarks = landmarks = detected_poses = elapsed = None
+                                if self.motion_gate is not None:
+                                    self.motion_gate.reset()
+                            elif service is None:
+                                pose_landmarks = pose.process(self._inference_input(image, buffers)).pose_landmarks
+                                elapsed = time.perf_counter() - started
+                                landmarks = detected_poses = None
+                                if pose_landmarks:
+                                    if self.roi is not None:
+                                        self.roi.remap(pose_landmarks, box, frame.shape)
+                                    landmarks = landmarks_to_array(pose_landmarks.landmark)
+                                    with STAGE_SECONDS.labels("classify").time():
+                                        detected_poses = self.detector.detect_poses(pose_landmarks.landmark)
+                            else:
+                                landmarks, detected_poses, complexity = self._process_remote(
+                                    service, self._scaled(image, buffers), box, frame.shape, complexity
+                                )
+                                elapsed = time.perf_counter() - started
+                                pose_landmarks = array_to_landmarks(landmarks) if landmarks is not None else None
+                        if elapsed is not None:
+                            # The landmarker has a single model, so only the
+                            # single-person graphs follow the latency controller
+                            if estimator is None:
+                                self.quality.record(elapsed)
+                            STAGE_SECONDS.labels("inference").observe(elapsed)
+                        if self.roi is not None:
+                            self.roi.update(landmarks, frame.shape)
+                        # Closest reference poses, when a pose index is installed
+                        nearest = self.detector.nearest_poses(landmarks) if landmarks is not None else None
+                    self._publish_pose((timestamp, landmarks, detected_poses, people, nearest))
+                    latency = time.time() - timestamp
+                    self.frame_stats.record(latency)
+                    CAMERA_FRAMES.labels(self.camera_id).inc()
+                    CAMERA_LATENCY_SECONDS.labels(self.camera_id).observe(latency)
+                    if self.recorder is not None:
+                        self.recorder.append(timestamp, landmarks, detected_poses)
+                    practice_log.record(self.practice_session, timestamp, detected_poses)
+                    encode_queue.put((frame, pose_landmarks, detected_poses, people))
+            finally:
+                if pose is not None:
+                    get_pose_pool(complexity).checkin(pose)
+                if estimator is not None:
+                    estimator.close()
+                if service is not None:
+                    service.release_stream(self.name)
+        finally:
+            # Stop the capture loop too if this stage fails
+            inference_queue.close()
+            encode_queue.close()
+
+    def _inference_slot(self):
+        return self.scheduler.slot(self.camera_id) if self.scheduler is not None else nullcontext()
+
+    def _pin(self):
+        """Restrict the calling pipeline thread to self.cpus, where the OS supports it."""
+        if self.cpus and hasattr(os, "sched_setaffinity"):
+            try:
+                os.sched_setaffinity(0, self.cpus)
+            except OSError as e:
+                print(f"Error pinning {self.name} to CPUs {sorted(self.cpus)}: {e}")
+
+    def _open_estimator(self):
+        """Start multi-person detection; None, and single-person detection, if the model can't be loaded."""
+        try:
+            return MultiPoseEstimator(
+                Config.MULTI_PERSON_MODEL_PATH,
+                Config.MULTI_PERSON_MAX_PEOPLE,
+                min_detection_confidence=Config.MIN_DETECTION_CONFIDENCE,
+                min_tracking_confidence=Config.MIN_TRACKING_CONFIDENCE
+            )
+        except Exception as e:
+            print(f"Error starting multi-person detection: {e}")
+            return None
+
+    def _detect_people(self, estimator, frame, timestamp, buffers):
+        """
+        Find everyone in a frame and run the pose checks on all of them at once.
+
+        Returns:
+            list: (track ID, landmarks, detected poses) of each person, by track ID.
+        """
+        found = estimator.process(self._inference_input(frame, buffers), timestamp)
+        track_ids = self.people_tracker.update(found)
+        with STAGE_SECONDS.labels("classify").time():
+            detected_poses = self.detector.detect_poses_batch(found) if len(found) else []
+        return sorted(zip(track_ids, found, detected_poses), key=lambda person: person[0])
+
+    def _process_remote(self, service, image, box, frame_shape, complexity):
+        """
+        Run a frame through the inference workers.
 
-                    frame = cv2.flip(frame, 1)
-                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    rgb_frame.flags.writeable = False
-                    results = pose.process(rgb_frame)
-                    rgb_frame.flags.writeable = True
-
-                    if results.pose_landmarks:
-                        self.detector.mp_drawing.draw_landmarks(
-                            frame,
-                            results.pose_landmarks,
-                            self.detector.mp_pose.POSE_CONNECTIONS,
-                            self.detector.mp_drawing.DrawingSpec(color=(245,117,66), thickness=2, circle_radius=2),
-                            self.detector.mp_drawing.DrawingSpec(color=(245,66,230), thickness=2, circle_radius=2)
-                        )
-
-                        detected_poses = [
-                            pose_name for pose_name, check_func in self.detector.get_pose_checks().items()
-                            if check_func(results.pose_landmarks.landmark)
-                        ]
-
-                        pose_text = "Detected: " + ", ".join(detected_poses) if detected_poses else "No pose detected"
-                        cv2.putText(
-                            frame,
-                            pose_text,
-                            (10, 30),
-                            cv2.FONT_HERSHEY_SIMPLEX,
-                            1,
-                            (0, 255, 0) if detected_poses else (0, 0, 255),
-                            2
-                        )
-
-                    try:
-                        ret, buffer = cv2.imencode('.jpg', frame)
-                        if not ret:
-                            continue
-                        frame_bytes = buffer.tobytes()
-                        yield (b'--frame\r\n'
-                               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-                    except Exception as e:
-                        print(f"Error encoding frame: {e}")
-                        continue
-
-            cap.release()
\ No newline at end of file
+        Returns:
+            tuple: (landmarks, detected_poses, complexity): the results, or
+                None for both if the frame was lost, and the model complexity
+                that is known to work.
+        """
+        new_complexity = self.quality.model_complexity
+        try:
+            landmarks, detected_poses = service.process(
+                self.name, image, new_complexity, box, frame_shape, timeout=Config.INFERENCE_TIMEOUT
+            )
+            return landmarks, detected_poses, new_complexity
+        except ModelUnavailable as e:
+            print(f"Error loading pose model complexity {new_complexity}: {e}")
+            self.quality.mark_unavailable(new_complexity, complexity)
+        except (InferenceError, TimeoutError) as e:
+            FRAMES_FAILED.labels("inference").inc()
+            print(f"Error running pose inference: {e}")
+        return None, None, complexity
+
+    def _drop_captured(self, item):
+        FRAMES_DROPPED.labels("inference").inc()
+        self.buffers.release(item[1])
+
+    def _drop_inferred(self, item):
+        FRAMES_DROPPED.labels("encode").inc()
+        self.buffers.release(item[0])
+
+    def _checkout_pose(self, complexity):
+        """
+        Take a graph of a model complexity from the shared pool.
+
+        Returns:
+            The Pose instance, or None if none became free within
+            Config.INFERENCE_TIMEOUT. After a failure the pool isn't asked
+            again for a backoff that doubles up to POOL_MAX_BACKOFF seconds,
+            so the pipeline keeps delivering frames meanwhile.
+        """
+        if time.monotonic() < self._pool_retry_at:
+            return None
+        try:
+            pose = get_pose_pool(complexity).checkout(timeout=Config.INFERENCE_TIMEOUT)
+        except PoolExhausted as e:
+            FRAMES_FAILED.labels("inference").inc()
+            self._pool_backoff = min(self._pool_backoff * 2 or POOL_BACKOFF, POOL_MAX_BACKOFF)
+            self._pool_retry_at = time.monotonic() + self._pool_backoff
+            print(f"Error: {self.name} got no pose graph ({e}), retrying in {self._pool_backoff:.1f}s")
+            return None
+        self._pool_backoff = 0.0
+        return pose
+
+    def _switch_model(self, pose, complexity):
+        """Swap pose for a graph of the controller's model complexity, keeping it if that fails."""
+        new_complexity = self.quality.model_complexity
+        try:
+            new_pose = self._checkout_pose(new_complexity)
+        except Exception as e:
+            print(f"Error loading pose model complexity {new_complexity}: {e}")
+            self.quality.mark_unavailable(new_complexity, complexity)
+            return pose, complexity
+        if new_pose is None:
+            # The pool is busy, not the model missing; try again after the backoff
+            return pose, complexity
+        get_pose_pool(complexity).checkin(pose)
+        return new_pose, new_complexity
+
+    def _scaled(self, frame, buffers):
+        """Scale a BGR image down to the controller's inference width, into an array kept in buffers."""
+        height, width = frame.shape[:2]
+        target_width = self.quality.width
+        if target_width < width:
+            height, width = round(height * target_width / width), target_width
+            frame = cv2.resize(frame, (width, height), dst=reuse(buffers, "scaled", (height, width, 3)),
+                               interpolation=cv2.INTER_LINEAR)
+        return frame
+
+    def _inference_input(self, frame, buffers):
+        """
+        Scale a BGR image down to the controller's inference width and convert it to RGB.
+
+        The result is written into arrays kept in buffers and reused while
+        the shape stays the same; MediaPipe copies its input, so they are
+        free again once pose.process returns.
+        """
+        frame = self._scaled(frame, buffers)
+        rgb_frame = reuse(buffers, "rgb", frame.shape)
+        rgb_frame.flags.writeable = True
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb_frame)
+        rgb_frame.flags.writeable = False
+        return rgb_frame
+
+    def _encode_loop(self, encode_queue):
+        """Pipeline stage: encode frames as JPEG for the video streams that have viewers."""
+        self._pin()
+        while True:
+            item = encode_queue.get()
+            if item is None:
+                break
+            frame, pose_landmarks, detected_poses, people = item
+            with self.lock:
+                wants_raw = self._subscribers["raw"] > 0
+                wants_annotated = self._subscribers["annotated"] > 0
+
+            if wants_raw or wants_annotated:
+                frames = {"annotated": None, "raw": None}
+                if wants_raw:
+                    frames["raw"] = self._encode_jpeg(frame, "raw")
+                if wants_annotated:
+                    with STAGE_SECONDS.labels("draw").time():
+                        self._annotate(frame, pose_landmarks, detected_poses, people)
+                    frames["annotated"] = self._encode_jpeg(frame, "annotated")
+                self._publish(frames)
+            self.buffers.release(frame)
+
+    def _annotate(self, frame, pose_landmarks, detected_poses, people=None):
+        """Draw the landmarks and detected poses onto a BGR frame in place."""
+        if people is not None:
+            self._annotate_people(frame, people)
+        elif pose_landmarks:
+            draw_pose(frame, pose_landmarks, detected_poses)
+
+    def _annotate_people(self, frame, people):
+        """Draw every tracked person, labelled with their track ID and detected poses."""
+        height, width = frame.shape[:2]
+        for track_id, landmarks, detected_poses in people:
+            self.detector.mp_drawing.draw_landmarks(
+                frame,
+                array_to_landmarks(landmarks),
+                self.detector.mp_pose.POSE_CONNECTIONS,
+                LANDMARK_STYLE,
+                CONNECTION_STYLE
+            )
+            pose_text = ", ".join(detected_poses) if detected_poses else "No pose detected"
+            x = int(min(max(landmarks[:, 0].min(), 0.0), 1.0) * width)
+            y = int(min(max(landmarks[:, 1].min(), 0.0), 1.0) * height)
+            cv2.putText(
+                frame,
+                f"#{track_id}: {pose_text}",
+                (x, max(20, y - 10)),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.6,
+                (0, 255, 0) if detected_poses else (0, 0, 255),
+                2
+            )
+
+    def _encode_jpeg(self, frame, stream):
+        try:
+            with STAGE_SECONDS.labels("encode").time():
+                ret, buffer = cv2.imencode('.jpg', frame)
+            if not ret:
+                FRAMES_FAILED.labels("encode").inc()
+                return None
+            FRAMES_ENCODED.labels(stream).inc()
+            return buffer.tobytes()
+        except Exception as e:
+            print(f"Error encoding frame: {e}")
+            FRAMES_FAILED.labels("encode").inc()
+            return None
+
+    def get_pipeline_stats(self):
+        """
+        Return per-stage queue counters of the running (or last) pipeline.
+
+        Returns:
+            dict: The "camera" ID, its "fps" and capture-to-result
+                "latency_ms" over recent frames (see FrameStats). For the
+                "inference" and "encode" stages, the depth of the queue
+                feeding the stage and how many frames were offered to
+                and dropped from it (see DropQueue.stats). A stage whose queue
+                keeps dropping is slower than the stage before it. With the
+                motion gate enabled, "motion_gate" counts frames that went
+                through inference and frames that reused the last result;
+                with ROI cropping, "roi" counts cropped and full-frame
+                inferences and fallbacks to the full frame. While landmarks
+                are recorded, "recording" counts records, chunks and frames
+                dropped by the recorder. In multi-person mode, "people"
+                counts current and started person tracks.
+        """
+        with self.lock:
+            queues = dict(self._queues)
+            running = self._thread is not None
+            motion_gate = self.motion_gate
+            roi = self.roi
+            people_tracker = self.people_tracker
+            recorder = self.recorder
+        stats = {name: queue.stats() for name, queue in queues.items()}
+        stats["camera"] = self.camera_id
+        stats["running"] = running
+        stats.update(self.frame_stats.get_stats())
+        if motion_gate is not None:
+            stats["motion_gate"] = motion_gate.get_stats()
+        if roi is not None:
+            stats["roi"] = roi.get_stats()
+        if people_tracker is not None:
+            stats["people"] = people_tracker.get_stats()
+        if recorder is not None:
+            stats["recording"] = recorder.get_stats()
+        return stats
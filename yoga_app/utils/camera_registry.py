@@ -0,0 +1,120 @@
+# yoga_app/utils/camera_registry.py
+import os
+from functools import partial
+from threading import Lock
+
+from yoga_app.config import Config
+from yoga_app.utils.camera import Camera
+from yoga_app.utils.frame_source import create_frame_source
+from yoga_app.utils.scheduler import FairScheduler
+
+# Keys of a Config.CAMERAS entry passed on to create_frame_source
+SOURCE_SETTINGS = {"source": "kind", "device": "device", "path": "path", "fps": "fps", "loop": "loop"}
+CAMERA_SETTINGS = set(SOURCE_SETTINGS) | {"cpus"}
+# /video_feed/raw and /video_feed/stats would shadow cameras with these IDs
+RESERVED_CAMERA_IDS = {"raw", "stats"}
+
+
+class CameraRegistry:
+    """
+    The cameras of Config.CAMERAS, each with its own Camera pipeline.
+
+    Pipelines are created on first use and, like a single Camera, only
+    capture while someone watches. All of them share one FairScheduler,
+    so at most `concurrency` frames are in pose inference at once and a
+    busy camera can't starve the others.
+    """
+
+    def __init__(self, cameras=None, concurrency=None):
+        self.settings = dict(Config.CAMERAS if cameras is None else cameras)
+        for camera_id, settings in self.settings.items():
+            if camera_id in RESERVED_CAMERA_IDS or "/" in camera_id:
+                raise ValueError(f"Camera ID {camera_id!r} clashes with the video routes; "
+                                 f"use one without '/' other than {sorted(RESERVED_CAMERA_IDS)}")
+            unknown = set(settings) - CAMERA_SETTINGS
+            if unknown:
+                raise ValueError(f"Unknown settings {sorted(unknown)} for camera {camera_id!r}")
+        concurrency = concurrency or Config.INFERENCE_CONCURRENCY or os.cpu_count() or 1
+        self.scheduler = FairScheduler(concurrency)
+        self._cameras = {}
+        self._lock = Lock()
+
+    def ids(self):
+        return list(self.settings)
+
+    def get(self, camera_id=None):
+        """
+        Return the pipeline of a camera, creating it on first use.
+
+        Parameters:
+            camera_id (str): A key of the registry's cameras, Config.DEFAULT_CAMERA by default.
+
+        Returns:
+            Camera: The camera's pipeline.
+
+        Raises:
+            KeyError: If no camera has that ID.
+        """
+        camera_id = camera_id or Config.DEFAULT_CAMERA
+        settings = self.settings[camera_id]
+        with self._lock:
+            camera = self._cameras.get(camera_id)
+            if camera is None:
+                camera = self._cameras[camera_id] = Camera(
+                    source_factory=self._source_factory(camera_id),
+                    camera_id=camera_id,
+                    cpus=settings.get("cpus"),
+                    scheduler=self.scheduler,
+                )
+            return camera
+
+    def check_sources(self):
+        """
+        Build every camera's frame source, without opening it, to check its settings.
+
+        Raises:
+            ValueError: If a camera's source settings are invalid, e.g. a
+                'file' source without a path.
+        """
+        for camera_id in self.settings:
+            try:
+                self._source_factory(camera_id)()
+            except ValueError as e:
+                raise ValueError(f"Camera {camera_id!r}: {e}") from e
+
+    def get_stats(self):
+        """
+        Return the pipeline stats of every camera and the scheduler's.
+
+        Returns:
+            dict: "cameras" maps each camera ID to its pipeline stats
+                ({"running": False} for cameras never opened), and
+                "scheduler" holds FairScheduler.get_stats().
+        """
+        with self._lock:
+            cameras = dict(self._cameras)
+        return {
+            "cameras": {
+                camera_id: cameras[camera_id].get_pipeline_stats() if camera_id in cameras else {"running": False}
+                for camera_id in self.settings
+            },
+            "scheduler": self.scheduler.get_stats(),
+        }
+
+    def _source_factory(self, camera_id):
+        settings = self.settings[camera_id]
+        options = {option: settings[key] for key, option in SOURCE_SETTINGS.items() if key in settings}
+        return partial(create_frame_source, **options)
+
+
+_registry = None
+_registry_lock = Lock()
+
+
+def get_camera_registry():
+    """Return the process-wide CameraRegistry, created on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = CameraRegistry()
+        return _registry
@@ -0,0 +1,340 @@
+# yoga_app/utils/frame_source.py
+import glob
+import os
+import time
+from threading import Thread
+
+import cv2
+import numpy as np
+
+from yoga_app.config import Config
+from yoga_app.utils.metrics import FRAMES_DROPPED, STAGE_SECONDS
+from yoga_app.utils.pipeline import BLOCK, DROP_OLDEST, DropQueue
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+# Some containers report a nonsensical frame rate; play those at DEFAULT_FPS
+MAX_NATIVE_FPS = 120
+DEFAULT_FPS = 30.0
+
+
+class FrameSource:
+    """
+    Where the camera pipeline gets its BGR frames from.
+
+    open() starts a read-ahead thread that decodes up to read_ahead frames
+    ahead of the consumer, so decoding overlaps with inference; read()
+    returns them in order. Live sources (devices, network streams, the
+    synthetic generator) drop their oldest unread frame when the consumer
+    falls behind, like a camera would. Files and image directories wait for
+    the consumer instead, so no frame is lost.
+
+    Subclasses implement _open(), _grab() and _close(). Frames are paced to
+    fps frames per second when fps is set.
+    """
+
+    live = True
+
+    def __init__(self, fps=None, read_ahead=2):
+        self.fps = fps
+        self.read_ahead = read_ahead
+        self.finished = False
+        self._buffers = None
+        self._queue = None
+        self._thread = None
+
+    def open(self, buffers=None):
+        """
+        Open the source and start reading ahead.
+
+        Parameters:
+            buffers (FramePool): Pool the frames are decoded into where the
+                source supports it; the consumer releases them back.
+
+        Returns:
+            bool: False if the source could not be opened.
+        """
+        try:
+            if not self._open():
+                return False
+        except Exception as e:
+            print(f"Error opening {self}: {e}")
+            return False
+        self._buffers = buffers
+        self._queue = DropQueue(self.read_ahead, DROP_OLDEST if self.live else BLOCK, on_drop=self._drop)
+        self._thread = Thread(target=self._read_loop, name="frame-source", daemon=True)
+        self._thread.start()
+        return True
+
+    def read(self):
+        """
+        Return the next frame.
+
+        Returns:
+            tuple: (success, frame). success is False once the source has
+                ended (see finished) or failed.
+        """
+        frame = self._queue.get() if self._queue is not None else None
+        return frame is not None, frame
+
+    def release(self):
+        """Stop reading ahead and close the source."""
+        if self._queue is not None:
+            self._queue.close()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+        self._close()
+
+    def _read_loop(self):
+        interval = 1.0 / self.fps if self.fps else 0.0
+        next_frame = time.perf_counter()
+        try:
+            while not self._queue.closed:
+                if interval:
+                    delay = next_frame - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    next_frame = max(next_frame + interval, time.perf_counter() - interval)
+
+                started = time.perf_counter()
+                frame = self._grab(self._buffers.take() if self._buffers is not None else None)
+                if frame is None:
+                    self.finished = True
+                    break
+                STAGE_SECONDS.labels("capture").observe(time.perf_counter() - started)
+                self._queue.put(frame)
+        except Exception as e:
+            print(f"Error reading from {self}: {e}")
+        finally:
+            self._queue.close()
+
+    def _drop(self, frame):
+        FRAMES_DROPPED.labels("capture").inc()
+        if self._buffers is not None:
+            self._buffers.release(frame)
+
+    def _open(self):
+        return True
+
+    def _grab(self, image):
+        """Return the next frame, decoded into image where possible, or None at the end."""
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+    def __repr__(self):
+        return f"{type(self).__name__}()"
+
+
+class DeviceSource(FrameSource):
+    """A local camera, by device index."""
+
+    def __init__(self, index=0, width=Config.CAMERA_WIDTH, height=Config.CAMERA_HEIGHT, **kwargs):
+        super().__init__(**kwargs)
+        self.index = index
+        self.width = width
+        self.height = height
+        self.cap = None
+
+    def _open(self):
+        self.cap = cv2.VideoCapture(self.index)
+        if not self.cap.isOpened():
+            return False
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        return True
+
+    def _grab(self, image):
+        success, frame = self.cap.read(image)
+        if not success:
+            raise IOError("camera read failed")
+        return frame
+
+    def _close(self):
+        if self.cap is not None:
+            self.cap.release()
+
+    def __repr__(self):
+        return f"DeviceSource({self.index})"
+
+
+class StreamSource(DeviceSource):
+    """
+    A network stream (RTSP, HTTP MJPEG, ...) opened by URL.
+
+    A dropped connection is reopened up to reconnect_attempts times in a row,
+    reconnect_delay seconds apart, before the source fails.
+    """
+
+    def __init__(self, url, reconnect_attempts=3, reconnect_delay=1.0, **kwargs):
+        super().__init__(index=url, **kwargs)
+        self.reconnect_attempts = reconnect_attempts
+        self.reconnect_delay = reconnect_delay
+
+    def _grab(self, image):
+        for attempt in range(self.reconnect_attempts + 1):
+            if attempt:
+                print(f"Reconnecting to {self.index} (attempt {attempt})")
+                time.sleep(self.reconnect_delay)
+                self.cap.release()
+                self.cap = cv2.VideoCapture(self.index)
+            success, frame = self.cap.read(image)
+            if success:
+                return frame
+        raise IOError("stream read failed")
+
+    def __repr__(self):
+        return f"StreamSource({self.index!r})"
+
+
+class VideoFileSource(FrameSource):
+    """
+    A video file, played at its own frame rate unless fps is given (0 plays
+    as fast as it decodes). With loop, playback restarts at the end.
+    """
+
+    live = False
+
+    def __init__(self, path, loop=True, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.loop = loop
+        self.cap = None
+
+    def _open(self):
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            return False
+        if self.fps is None:
+            native = self.cap.get(cv2.CAP_PROP_FPS)
+            self.fps = native if 0 < native <= MAX_NATIVE_FPS else DEFAULT_FPS
+        return True
+
+    def _grab(self, image):
+        success, frame = self.cap.read(image)
+        if not success and self.loop:
+            # Rewind; a file that fails right at the start is treated as ended
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.cap.read(image)
+        return frame if success else None
+
+    def _close(self):
+        if self.cap is not None:
+            self.cap.release()
+
+    def __repr__(self):
+        return f"VideoFileSource({self.path!r})"
+
+
+class ImageDirectorySource(FrameSource):
+    """The images in a directory, in file name order, at fps frames per second."""
+
+    live = False
+
+    def __init__(self, path, loop=True, fps=DEFAULT_FPS, **kwargs):
+        super().__init__(fps=fps, **kwargs)
+        self.path = path
+        self.loop = loop
+        self.files = []
+        self.position = 0
+
+    def _open(self):
+        self.files = sorted(
+            name for name in glob.glob(os.path.join(self.path, "*"))
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        self.position = 0
+        return bool(self.files)
+
+    def _grab(self, image):
+        # Give up after a full pass without a readable image
+        for _ in range(len(self.files)):
+            if self.position >= len(self.files):
+                if not self.loop:
+                    return None
+                self.position = 0
+            name = self.files[self.position]
+            self.position += 1
+            frame = cv2.imread(name)
+            if frame is not None:
+                return frame
+            print(f"Error reading image {name}")
+        return None
+
+    def __repr__(self):
+        return f"ImageDirectorySource({self.path!r})"
+
+
+class SyntheticSource(FrameSource):
+    """
+    Generated frames of a figure moving across a textured background, at fps
+    frames per second. Needs no camera or files, e.g. for load tests.
+    """
+
+    def __init__(self, width=Config.CAMERA_WIDTH, height=Config.CAMERA_HEIGHT, fps=DEFAULT_FPS,
+                 period=60, seed=0, **kwargs):
+        super().__init__(fps=fps, **kwargs)
+        self.width = width
+        self.height = height
+        self.period = period
+        self.background = np.random.default_rng(seed).integers(0, 64, (height, width, 3), dtype=np.uint8)
+        self.count = 0
+
+    def _grab(self, image):
+        if image is None or image.shape != self.background.shape:
+            image = np.empty_like(self.background)
+        np.copyto(image, self.background)
+        width, height = self.width, self.height
+        phase = (self.count % self.period) / self.period
+        x = int(width * (0.3 + 0.4 * phase))
+        cv2.circle(image, (x, height // 4), height // 12, (200, 180, 160), -1)
+        cv2.rectangle(image, (x - width // 20, height // 3), (x + width // 20, height * 3 // 4),
+                      (90, 120, 200), -1)
+        self.count += 1
+        return image
+
+    def __repr__(self):
+        return f"SyntheticSource({self.width}x{self.height})"
+
+
+FRAME_SOURCES = ("device", "file", "images", "url", "synthetic")
+
+
+def create_frame_source(kind=None, path=None, device=None, fps=None, loop=None):
+    """
+    Build the frame source selected in Config.
+
+    Parameters:
+        kind (str): One of FRAME_SOURCES, Config.FRAME_SOURCE by default.
+        path: Video file, image directory or stream URL,
+            Config.FRAME_SOURCE_PATH by default.
+        device (int): Camera index, Config.FRAME_SOURCE_DEVICE by default.
+        fps (float): Pace of files, images and synthetic frames,
+            Config.FRAME_SOURCE_FPS by default; 0 delivers them as fast as
+            they are read.
+        loop (bool): Restart files and image directories at the end,
+            Config.FRAME_SOURCE_LOOP by default.
+
+    Returns:
+        FrameSource: The source, not yet opened.
+    """
+    kind = kind or Config.FRAME_SOURCE
+    path = path or Config.FRAME_SOURCE_PATH
+    device = Config.FRAME_SOURCE_DEVICE if device is None else device
+    fps = Config.FRAME_SOURCE_FPS if fps is None else fps
+    loop = Config.FRAME_SOURCE_LOOP if loop is None else loop
+    options = {"read_ahead": Config.FRAME_SOURCE_READ_AHEAD}
+    if kind == "device":
+        return DeviceSource(device, **options)
+    if kind == "synthetic":
+        return SyntheticSource(fps=DEFAULT_FPS if fps is None else fps, **options)
+    if kind not in FRAME_SOURCES:
+        raise ValueError(f"Unknown frame source {kind!r}, expected one of {FRAME_SOURCES}")
+    if not path:
+        raise ValueError(f"The {kind!r} frame source needs Config.FRAME_SOURCE_PATH")
+    if kind == "file":
+        return VideoFileSource(path, loop=loop, fps=fps, **options)
+    if kind == "images":
+        return ImageDirectorySource(path, loop=loop, fps=DEFAULT_FPS if fps is None else fps, **options)
+    return StreamSource(path, **options)
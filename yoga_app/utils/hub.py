@@ -0,0 +1,327 @@
+# yoga_app/utils/hub.py
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import struct
+import sys
+import time
+from threading import Lock
+
+from yoga_app.config import Config
+from yoga_app.utils.camera import PART_HEADER, PART_TRAILER
+from yoga_app.utils.camera_registry import get_camera_registry
+
+# Every message is a 4-byte length followed by the payload; a zero-length
+# message ends a stream cleanly
+LENGTH = struct.Struct("!I")
+STREAMS = ("annotated", "raw", "pose")
+
+
+class HubError(Exception):
+    """Raised when the hub can't be reached or rejected a request."""
+
+
+def _send_message(sock, payload):
+    sock.sendall(LENGTH.pack(len(payload)))
+    if payload:
+        sock.sendall(payload)
+
+
+def _read_exactly(stream, size):
+    data = stream.read(size)
+    if len(data) < size:
+        raise EOFError("Hub connection closed")
+    return data
+
+
+def _read_message(stream):
+    (size,) = LENGTH.unpack(_read_exactly(stream, LENGTH.size))
+    return _read_exactly(stream, size) if size else None
+
+
+class _HubHandler(socketserver.StreamRequestHandler):
+    """
+    Serves one connection: a JSON request line, then length-prefixed messages.
+
+    {"stream": "annotated" | "raw"} streams JPEGs, {"stream": "pose",
+    "delta": bool} streams Server-Sent Events; {"command": "stats"},
+    {"command": "cameras"} and {"command": "quality", "level": ...,
+    "auto": ...} get one JSON reply. Requests name their camera in
+    "camera", Config.DEFAULT_CAMERA if missing.
+    """
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+        hub = self.server
+        if "command" in request:
+            try:
+                reply = {"result": hub.run_command(request)}
+            except (KeyError, ValueError) as e:
+                reply = {"error": str(e)}
+            _send_message(self.request, json.dumps(reply).encode())
+            return
+
+        kind = request.get("stream")
+        if kind not in STREAMS:
+            return
+        try:
+            camera = hub.cameras.get(request.get("camera"))
+        except KeyError:
+            return
+        if kind == "pose":
+            items = camera.generate_pose_events(delta=bool(request.get("delta")))
+        else:
+            items = camera.frames(annotate=kind == "annotated")
+        hub.add_client(1)
+        try:
+            for item in items:
+                _send_message(self.request, item)
+            _send_message(self.request, b"")
+        except OSError:
+            # The web worker went away; only its subscription ends
+            pass
+        finally:
+            items.close()
+            hub.add_client(-1)
+
+
+class HubServer(socketserver.ThreadingUnixStreamServer):
+    """
+    Serves the cameras of a CameraRegistry to any number of web worker processes over a Unix domain socket.
+
+    With the app running in several worker processes, each worker would
+    otherwise open the camera and run its own pipeline. The hub owns
+    capture, inference and encoding; web workers relay what it publishes
+    (see HubClient). Every subscriber gets its own connection and thread,
+    so a web worker that dies or restarts only ends its own streams.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path, cameras):
+        self.path = path
+        self.cameras = cameras
+        self._clients = 0
+        self._lock = Lock()
+        self._remove_stale_socket(path)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        super().__init__(path, _HubHandler)
+
+    def add_client(self, change):
+        with self._lock:
+            self._clients += change
+
+    def run_command(self, request):
+        command = request["command"]
+        if command in ("stats", "cameras"):
+            if command == "cameras":
+                stats = self.cameras.get_stats()
+            else:
+                stats = self.cameras.get(request.get("camera")).get_pipeline_stats()
+            with self._lock:
+                stats["hub"] = {"clients": self._clients}
+            return stats
+        if command == "quality":
+            camera = self.cameras.get(request.get("camera"))
+            if "level" in request or "auto" in request:
+                camera.quality.set_level(level=request.get("level"), auto=request.get("auto"))
+            return camera.quality.get_state()
+        raise ValueError(f"Unknown hub command {command!r}")
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    @staticmethod
+    def _remove_stale_socket(path):
+        if not os.path.exists(path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except OSError:
+            # Left behind by a hub that didn't shut down cleanly
+            os.unlink(path)
+        else:
+            raise HubError(f"A camera hub is already listening on {path}")
+        finally:
+            probe.close()
+
+
+class _HubQuality:
+    """The hub camera's QualityController, as seen from a web worker."""
+
+    def __init__(self, client):
+        self._client = client
+
+    def set_level(self, level=None, auto=None):
+        self._client._command({"command": "quality", "level": level, "auto": auto})
+
+    def get_state(self):
+        return self._client._command({"command": "quality"})
+
+
+class HubClient:
+    """
+    Stand-in for Camera in a web worker, relaying the streams of a HubServer.
+
+    Offers the Camera methods the routes use. A stream that loses the hub
+    reconnects up to Config.HUB_RECONNECT_ATTEMPTS times, so the hub can be
+    restarted without every viewer having to reload.
+    """
+
+    def __init__(self, path, camera_id=None):
+        self.path = path
+        self.camera_id = camera_id or Config.DEFAULT_CAMERA
+        self.quality = _HubQuality(self)
+
+    def generate_frames(self, annotate=True):
+        for frame_bytes in self.frames(annotate):
+            yield PART_HEADER
+            yield frame_bytes
+            yield PART_TRAILER
+
+    def frames(self, annotate=True):
+        return self._stream({"stream": "annotated" if annotate else "raw"})
+
+    def generate_pose_events(self, delta=False):
+        return self._stream({"stream": "pose", "delta": delta})
+
+    def get_pipeline_stats(self):
+        try:
+            return self._command({"command": "stats"})
+        except HubError as e:
+            return {"running": False, "error": str(e)}
+
+    def _connect(self, request, timeout):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(timeout)
+            sock.connect(self.path)
+            sock.sendall(json.dumps(dict(request, camera=self.camera_id)).encode() + b"\n")
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _command(self, request):
+        try:
+            sock = self._connect(request, Config.HUB_TIMEOUT)
+            with sock, sock.makefile("rb") as stream:
+                reply = json.loads(_read_message(stream))
+        except (OSError, EOFError, TypeError) as e:
+            raise HubError(f"Camera hub at {self.path} is not available: {e}")
+        if "error" in reply:
+            raise ValueError(reply["error"])
+        return reply["result"]
+
+    def _stream(self, request):
+        failures = 0
+        while True:
+            try:
+                sock = self._connect(request, Config.HUB_TIMEOUT)
+            except OSError as e:
+                failures += 1
+                if failures > Config.HUB_RECONNECT_ATTEMPTS:
+                    print(f"Error: Camera hub at {self.path} is not available: {e}")
+                    return
+                time.sleep(Config.HUB_RECONNECT_DELAY)
+                continue
+
+            try:
+                # Frames may pause for a while, e.g. while the camera starts
+                sock.settimeout(None)
+                with sock.makefile("rb") as stream:
+                    while True:
+                        payload = _read_message(stream)
+                        if payload is None:
+                            return
+                        failures = 0
+                        yield payload
+            except (OSError, EOFError):
+                failures += 1
+                if failures > Config.HUB_RECONNECT_ATTEMPTS:
+                    print(f"Error: Lost the camera hub at {self.path}")
+                    return
+                time.sleep(Config.HUB_RECONNECT_DELAY)
+            finally:
+                sock.close()
+
+
+_clients = {}
+_clients_lock = Lock()
+
+
+def get_camera(camera_id=None):
+    """
+    Return the pipeline of one of the cameras this process serves.
+
+    Parameters:
+        camera_id (str): A key of Config.CAMERAS, Config.DEFAULT_CAMERA by default.
+
+    Returns:
+        A HubClient for Config.HUB_SOCKET when Config.HUB_ENABLED is set,
+        otherwise the camera's pipeline in this process's CameraRegistry.
+        Either is created on first use, so importing the routes doesn't
+        open a camera.
+
+    Raises:
+        KeyError: If Config.CAMERAS has no such camera.
+    """
+    camera_id = camera_id or Config.DEFAULT_CAMERA
+    if camera_id not in Config.CAMERAS:
+        raise KeyError(camera_id)
+    if not Config.HUB_ENABLED:
+        return get_camera_registry().get(camera_id)
+    with _clients_lock:
+        if camera_id not in _clients:
+            _clients[camera_id] = HubClient(Config.HUB_SOCKET, camera_id)
+        return _clients[camera_id]
+
+
+def get_cameras_stats():
+    """
+    Return the stats of every camera and of the shared inference scheduler.
+
+    Returns:
+        dict: See CameraRegistry.get_stats; from the hub when Config.HUB_ENABLED is set.
+    """
+    if not Config.HUB_ENABLED:
+        return get_camera_registry().get_stats()
+    try:
+        return HubClient(Config.HUB_SOCKET)._command({"command": "cameras"})
+    except HubError as e:
+        return {"running": False, "error": str(e)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the camera pipelines once and serve them to the app's web workers."
+    )
+    parser.add_argument("--socket", default=Config.HUB_SOCKET, help="Unix domain socket to listen on")
+    args = parser.parse_args(argv)
+
+    # Binds the practice log and starts inference workers, as in the web app
+    from yoga_app import create_app
+    create_app()
+    server = HubServer(args.socket, get_camera_registry())
+    # Remove the socket on a normal stop too
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"Camera hub listening on {args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+# yoga_app/utils/image_analysis.py
+import base64
+import hashlib
+import os
+import struct
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+import cv2
+import numpy as np
+
+from yoga_app.config import Config
+from yoga_app.utils.camera import draw_pose
+from yoga_app.utils.metrics import FRAMES_FAILED
+from yoga_app.utils.pose_detection import PoseDetector, array_to_landmarks, landmarks_to_array
+from yoga_app.utils.pose_pool import PosePool
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# JPEG start-of-frame markers; C4, C8 and CC share the range but aren't frames
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def image_size(data):
+    """
+    Read the dimensions of a JPEG, PNG or WebP image from its header, without decoding it.
+
+    Parameters:
+        data (bytes): The encoded image.
+
+    Returns:
+        tuple: (width, height), or None if the data isn't one of these formats
+            or its header is cut off.
+    """
+    try:
+        if data[:8] == PNG_SIGNATURE and data[12:16] == b"IHDR":
+            return struct.unpack(">II", data[16:24])
+        if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+            chunk = data[12:16]
+            if chunk == b"VP8 " and data[23:26] == b"\x9d\x01\x2a":
+                width, height = struct.unpack("<HH", data[26:30])
+                return width & 0x3FFF, height & 0x3FFF
+            if chunk == b"VP8L" and data[20] == 0x2F:
+                bits = int.from_bytes(data[21:25], "little")
+                return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b"VP8X":
+                return int.from_bytes(data[24:27], "little") + 1, int.from_bytes(data[27:30], "little") + 1
+            return None
+        if data[:2] == b"\xff\xd8":
+            i = 2
+            while i + 4 <= len(data):
+                if data[i] != 0xFF:
+                    return None
+                marker = data[i + 1]
+                if marker == 0xFF:
+                    # Fill byte
+                    i += 1
+                elif marker == 0x01 or 0xD0 <= marker <= 0xD8:
+                    # Markers without a length
+                    i += 2
+                elif marker in JPEG_SOF_MARKERS:
+                    height, width = struct.unpack(">HH", data[i + 5:i + 9])
+                    return width, height
+                else:
+                    i += 2 + struct.unpack(">H", data[i + 2:i + 4])[0]
+    except (IndexError, struct.error):
+        pass
+    return None
+
+
+class LandmarkCache:
+    """
+    Bounded LRU of pose landmarks by image key, with optional spill to disk.
+
+    Entries evicted from memory are written to spill_dir (one .npy file
+    each) when it is set, and moved back into memory when looked up again.
+    The directory keeps at most max_disk_entries files; the least recently
+    written go first. An entry of None records an image without a person.
+    """
+
+    def __init__(self, max_entries, spill_dir=None, max_disk_entries=None):
+        self.max_entries = max_entries
+        self.spill_dir = spill_dir
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "spilled": 0}
+        self._disk_entries = 0
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            self._disk_entries = sum(1 for name in os.listdir(spill_dir) if name.endswith(".npy"))
+
+    def get(self, key):
+        """
+        Look up an image's landmarks.
+
+        Returns:
+            tuple: (found, landmarks); landmarks is a (33, 4) array or None.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return True, self._entries[key]
+        found, landmarks = self._load(key)
+        with self._lock:
+            if not found:
+                self._stats["misses"] += 1
+                return False, None
+            self._stats["disk_hits"] += 1
+        self.put(key, landmarks)
+        return True, landmarks
+
+    def put(self, key, landmarks):
+        with self._lock:
+            self._entries[key] = landmarks
+            self._entries.move_to_end(key)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False))
+        for evicted_key, evicted_landmarks in evicted:
+            self._spill(evicted_key, evicted_landmarks)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["max_entries"] = self.max_entries
+            stats["disk_entries"] = self._disk_entries
+            return stats
+
+    def _path(self, key):
+        return os.path.join(self.spill_dir, f"{key}.npy")
+
+    def _load(self, key):
+        if not self.spill_dir:
+            return False, None
+        try:
+            landmarks = np.load(self._path(key))
+        except FileNotFoundError:
+            return False, None
+        except (OSError, ValueError) as e:
+            print(f"Error reading cached landmarks {key}: {e}")
+            return False, None
+        # An empty array stands for "no person found"
+        return True, landmarks if landmarks.size else None
+
+    def _spill(self, key, landmarks):
+        if not self.spill_dir:
+            return
+        path = self._path(key)
+        try:
+            exists = os.path.exists(path)
+            # Written under a temporary name so readers never see a partial file
+            with open(path + ".tmp", "wb") as f:
+                np.save(f, landmarks if landmarks is not None else np.empty(0, dtype=np.float32))
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            print(f"Error spilling cached landmarks {key}: {e}")
+            return
+        with self._lock:
+            self._stats["spilled"] += 1
+            if not exists:
+                self._disk_entries += 1
+            prune = self.max_disk_entries and self._disk_entries > self.max_disk_entries * 1.1
+        if prune:
+            self._prune()
+
+    def _prune(self):
+        """Trim the spill directory to max_disk_entries, oldest files first."""
+        paths = [entry.path for entry in os.scandir(self.spill_dir) if entry.name.endswith(".npy")]
+        paths.sort(key=lambda path: os.stat(path).st_mtime_ns)
+        removed = 0
+        for path in paths[:max(0, len(paths) - self.max_disk_entries)]:
+            try:
+                os.unlink(path)
+                removed += 1
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_entries = len(paths) - removed
+
+
+class ImageAnalyzer:
+    """
+    Pose analysis of single photos.
+
+    Photos go through Pose graphs in static-image mode, which run person
+    detection on every image instead of tracking from a previous frame.
+    Landmarks are cached by a hash of the decoded pixels and the model
+    complexity, so a photo uploaded again, re-encoded the same way or shared
+    as a reference image skips inference. The pose checks and the annotated
+    image are cheap and are redone on every request, so results follow the
+    current pose rules.
+    """
+
+    def __init__(self, workers, cache, model_complexity=None):
+        self.model_complexity = Config.MODEL_COMPLEXITY if model_complexity is None else model_complexity
+        self.pool = PosePool(
+            workers,
+            prebuild=0,
+            static_image_mode=True,
+            min_detection_confidence=Config.MIN_DETECTION_CONFIDENCE,
+            model_complexity=self.model_complexity
+        )
+        self.cache = cache
+        self.detector = PoseDetector()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-analysis")
+
+    def analyze(self, data, annotate=True):
+        """
+        Find the pose in one encoded photo.
+
+        Parameters:
+            data (bytes): A JPEG, PNG or WebP image.
+            annotate (bool): Include the photo with the skeleton and detected poses drawn on it.
+
+        Returns:
+            dict: "hash" of the decoded image, "width" and "height" of the
+                analyzed (possibly scaled down) image, "landmarks" (33
+                [x, y, z, visibility] lists, or None when no body was found),
+                "poses" (detected pose names), "cached" (whether inference
+                was skipped) and with annotate, "image": the annotated JPEG,
+                base64 encoded.
+
+        Raises:
+            ValueError: If the image can't be decoded or has more than Config.IMAGE_MAX_PIXELS pixels.
+            PoolExhausted: If no Pose graph became free within Config.INFERENCE_TIMEOUT.
+        """
+        image, key = self._decode(data)
+        return self._analyze(image, key, annotate)
+
+    def analyze_batch(self, images, annotate=True):
+        """
+        Analyze several encoded photos on the worker threads.
+
+        Identical photos are analyzed once. A photo that fails doesn't fail
+        the others.
+
+        Parameters:
+            images (list): Encoded images (bytes).
+            annotate (bool): As for analyze().
+
+        Returns:
+            list: The result of each photo in order (see analyze()), or
+                {"error": message} for a photo that couldn't be analyzed.
+        """
+        decoded = []
+        for data in images:
+            try:
+                decoded.append(self._decode(data))
+            except ValueError as e:
+                decoded.append(e)
+        futures = {}
+        for item in decoded:
+            if not isinstance(item, ValueError) and item[1] not in futures:
+                futures[item[1]] = self._executor.submit(self._analyze, item[0], item[1], annotate)
+
+        results = []
+        for item in decoded:
+            if isinstance(item, ValueError):
+                results.append({"error": str(item)})
+                continue
+            try:
+                results.append(futures[item[1]].result())
+            except Exception as e:
+                print(f"Error analyzing image {item[1]}: {e}")
+                results.append({"error": "Pose analysis failed"})
+        return results
+
+    def get_stats(self):
+        return {"cache": self.cache.get_stats(), "pool": self.pool.get_stats()}
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    def _decode(self, data):
+        """Return the decoded BGR image and its cache key."""
+        # A small file can decode into a huge image, so check the size first
+        size = image_size(data)
+        if size is None:
+            FRAMES_FAILED.labels("decode").inc()
+            raise ValueError("The uploaded file is not a JPEG, PNG or WebP image")
+        if size[0] * size[1] > Config.IMAGE_MAX_PIXELS:
+            raise ValueError(f"Images may have at most {Config.IMAGE_MAX_PIXELS} pixels, "
+                             f"this one is {size[0]}x{size[1]}")
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            FRAMES_FAILED.labels("decode").inc()
+            raise ValueError("Could not decode the uploaded image")
+        digest = hashlib.sha256()
+        digest.update(f"{image.shape}:{self.model_complexity}:".encode())
+        digest.update(image.data)
+        return image, digest.hexdigest()
+
+    def _analyze(self, image, key, annotate):
+        height, width = image.shape[:2]
+        if max(height, width) > Config.IMAGE_MAX_SIDE:
+            scale = Config.IMAGE_MAX_SIDE / max(height, width)
+            image = cv2.resize(image, (round(width * scale), round(height * scale)),
+                               interpolation=cv2.INTER_AREA)
+
+        cached, landmarks = self.cache.get(key)
+        if not cached:
+            rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            rgb_image.flags.writeable = False
+            with self.pool.pose(timeout=Config.INFERENCE_TIMEOUT) as pose:
+                results = pose.process(rgb_image)
+            landmarks = landmarks_to_array(results.pose_landmarks.landmark) if results.pose_landmarks else None
+            self.cache.put(key, landmarks)
+
+        pose_landmarks = array_to_landmarks(landmarks) if landmarks is not None else None
+        detected_poses = self.detector.detect_poses(pose_landmarks.landmark) if pose_landmarks else []
+        result = {
+            "hash": key,
+            "width": image.shape[1],
+            "height": image.shape[0],
+            "landmarks": np.round(landmarks, 4).tolist() if landmarks is not None else None,
+            "poses": detected_poses,
+            "cached": cached,
+        }
+        if annotate:
+            if pose_landmarks:
+                image = image.copy()
+                draw_pose(image, pose_landmarks, detected_poses)
+            ret, buffer = cv2.imencode('.jpg', image)
+            if not ret:
+                FRAMES_FAILED.labels("encode").inc()
+            result["image"] = base64.b64encode(buffer).decode("ascii") if ret else None
+        return result
+
+
+_analyzer = None
+_analyzer_lock = Lock()
+
+
+def get_image_analyzer():
+    """Return the process-wide ImageAnalyzer, created on first use."""
+    global _analyzer
+    with _analyzer_lock:
+        if _analyzer is None:
+            _analyzer = ImageAnalyzer(
+                Config.IMAGE_WORKERS,
+                LandmarkCache(Config.IMAGE_CACHE_SIZE, Config.IMAGE_CACHE_DIR, Config.IMAGE_CACHE_DISK_SIZE)
+            )
+        return _analyzer
@@ -0,0 +1,390 @@
+# yoga_app/utils/inference_workers.py
+import atexit
+import itertools
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing.shared_memory import SharedMemory
+from threading import Condition, Lock, Thread
+
+import cv2
+import numpy as np
+
+from yoga_app.config import Config
+from yoga_app.utils.metrics import INFERENCE_WORKER_RESTARTS
+
+
+class InferenceError(Exception):
+    """Raised when a worker could not process a frame."""
+
+
+class ModelUnavailable(InferenceError):
+    """Raised when a worker could not load the requested model complexity."""
+
+
+class WorkerCrashed(InferenceError):
+    """Raised for frames in flight on a worker that died or was restarted."""
+
+
+def _worker_main(shm_name, slot_bytes, pose_options, conn):
+    """
+    Worker process: run pose detection and the pose checks on frames in shared memory.
+
+    Every stream gets its own Pose graph in tracking mode. Requests name the
+    slot of the shared memory block holding the RGB frame; the reply carries
+    the landmarks as an array of shape (33, 4), already mapped to the full
+    frame, and the detected poses.
+    """
+    import mediapipe as mp
+    from yoga_app.utils.pose_detection import PoseDetector, landmarks_to_array
+    from yoga_app.utils.roi import remap_landmarks
+
+    # Spawned workers share the parent's resource tracker, which unlinks the
+    # block only if the parent dies without closing the service
+    shm = SharedMemory(name=shm_name)
+    detector = PoseDetector()
+    graphs = {}
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            kind = message[0]
+            if kind == "stop":
+                break
+            if kind == "ping":
+                conn.send(("pong", message[1]))
+                continue
+            if kind == "release":
+                for key in [key for key in graphs if key[0] == message[1]]:
+                    graphs.pop(key).close()
+                continue
+
+            _, seq, slot, shape, stream, complexity, box, frame_shape = message
+            try:
+                pose = graphs.get((stream, complexity))
+                if pose is None:
+                    try:
+                        pose = mp.solutions.pose.Pose(model_complexity=complexity, **pose_options)
+                    except Exception as e:
+                        conn.send(("result", seq, None, None, ("model", f"{e}")))
+                        continue
+                    # A stream uses one model at a time
+                    for key in [key for key in graphs if key[0] == stream]:
+                        graphs.pop(key).close()
+                    graphs[(stream, complexity)] = pose
+                image = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+                image.flags.writeable = False
+                results = pose.process(image)
+                landmarks = detected_poses = None
+                if results.pose_landmarks:
+                    remap_landmarks(results.pose_landmarks, box, frame_shape or shape)
+                    landmarks = landmarks_to_array(results.pose_landmarks.landmark)
+                    detected_poses = detector.detect_poses(results.pose_landmarks.landmark)
+                del image
+                conn.send(("result", seq, landmarks, detected_poses, None))
+            except Exception as e:
+                conn.send(("result", seq, None, None, ("error", f"{type(e).__name__}: {e}")))
+    finally:
+        for pose in graphs.values():
+            pose.close()
+        shm.close()
+
+
+class _Worker:
+    """Parent-side handle of one worker process and its ring of frame slots."""
+
+    def __init__(self, index, slots, slot_bytes):
+        self.index = index
+        self.slot_bytes = slot_bytes
+        self.shm = SharedMemory(create=True, size=slots * slot_bytes)
+        self.slots = slots
+        self.free = deque(range(slots))
+        self.pending = {}
+        self.lock = Lock()
+        self.slot_free = Condition(self.lock)
+        self.process = None
+        self.conn = None
+        self.reader = None
+        self.last_pong = time.monotonic()
+        self.restarts = 0
+        self.processed = 0
+        self.streams = set()
+
+    def view(self, slot, shape):
+        return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+
+
+class InferenceService:
+    """
+    A pool of worker processes running MediaPipe Pose and the pose checks.
+
+    Moving inference out of the web process keeps it off the web process's
+    GIL, and frames from different streams are processed on different cores.
+    Each worker owns a shared memory block split into `slots` frame slots;
+    process() converts the caller's BGR frame to RGB directly into a free
+    slot, so the frame is never pickled or copied again, and only the slot
+    number travels over the worker's pipe. Landmarks and pose names come
+    back over the same pipe.
+
+    Frames of one stream always go to the same worker, which keeps a Pose
+    graph per stream so tracking works as it does in process. A monitor
+    thread pings the workers every health_interval seconds and restarts any
+    that died or didn't answer for health_timeout seconds; frames in flight
+    on a restarted worker fail with WorkerCrashed.
+    """
+
+    def __init__(self, workers, slots=4, slot_bytes=1280 * 720 * 3, health_interval=2.0,
+                 health_timeout=10.0, **pose_options):
+        if workers < 1:
+            raise ValueError("InferenceService needs at least one worker")
+        self.pose_options = pose_options
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self._context = multiprocessing.get_context("spawn")
+        self._workers = [_Worker(i, slots, slot_bytes) for i in range(workers)]
+        self._assignments = {}
+        self._lock = Lock()
+        self._seq = itertools.count(1)
+        self._closed = False
+        for worker in self._workers:
+            self._start(worker)
+        self._monitor = Thread(target=self._monitor_loop, name="inference-monitor", daemon=True)
+        self._monitor.start()
+
+    def process(self, stream, frame, model_complexity=None, box=None, frame_shape=None, timeout=None):
+        """
+        Run pose detection on a frame in the stream's worker.
+
+        Parameters:
+            stream: Key of the frame sequence, e.g. "camera" or an upload session.
+            frame (np.ndarray): BGR image; larger than a slot, it is scaled down.
+            model_complexity (int): Config.MODEL_COMPLEXITY by default.
+            box (tuple): If frame is a crop, its (x0, y0, x1, y1) in the full
+                frame, so landmarks come back in full-frame coordinates.
+            frame_shape (tuple): Shape of the full frame the crop came from.
+            timeout (float): Seconds to wait for a slot and for the result.
+
+        Returns:
+            tuple: (landmarks, poses): an array of shape (33, 4) and the
+                detected pose names, or (None, None) when nobody was found.
+        """
+        if model_complexity is None:
+            model_complexity = Config.MODEL_COMPLEXITY
+        worker = self._assign(stream)
+        frame = self._fit(frame, worker.slot_bytes)
+
+        with worker.lock:
+            if not worker.slot_free.wait_for(lambda: worker.free, timeout):
+                raise TimeoutError(f"No free frame slot on inference worker {worker.index}")
+            conn = worker.conn
+            if conn is None:
+                raise WorkerCrashed(f"Inference worker {worker.index} is restarting")
+            slot = worker.free.popleft()
+            seq = next(self._seq)
+            future = Future()
+            worker.pending[seq] = (future, slot, conn)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=worker.view(slot, frame.shape))
+        try:
+            with worker.lock:
+                conn.send(("process", seq, slot, frame.shape, stream, model_complexity, box, frame_shape))
+        except (OSError, ValueError) as e:
+            self._resolve(worker, seq, error=WorkerCrashed(f"Inference worker {worker.index}: {e}"))
+        return future.result(timeout)
+
+    def release_stream(self, stream):
+        """Free the Pose graph a finished stream holds in its worker."""
+        with self._lock:
+            worker = self._assignments.pop(stream, None)
+            if worker is not None:
+                worker.streams.discard(stream)
+        if worker is not None:
+            self._send(worker, ("release", stream))
+
+    def get_stats(self):
+        """
+        Return the state of every worker.
+
+        Returns:
+            dict: Per worker ("workers"): process id, whether it is alive,
+                restarts, frames processed, frames in flight and streams assigned.
+        """
+        workers = []
+        for worker in self._workers:
+            with worker.lock:
+                workers.append({
+                    "pid": worker.process.pid if worker.process else None,
+                    "alive": bool(worker.process and worker.process.is_alive()),
+                    "restarts": worker.restarts,
+                    "processed": worker.processed,
+                    "in_flight": len(worker.pending),
+                    "streams": len(worker.streams),
+                })
+        return {"workers": workers}
+
+    def close(self):
+        """Stop the workers and free their shared memory."""
+        if self._closed:
+            return
+        self._closed = True
+        for worker in self._workers:
+            self._send(worker, ("stop",))
+        for worker in self._workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join()
+            with worker.lock:
+                conn, worker.conn = worker.conn, None
+            if conn is not None:
+                conn.close()
+            worker.reader.join(timeout=5)
+            worker.shm.close()
+            worker.shm.unlink()
+
+    def _assign(self, stream):
+        with self._lock:
+            worker = self._assignments.get(stream)
+            if worker is None:
+                worker = min(self._workers, key=lambda w: len(w.streams))
+                worker.streams.add(stream)
+                self._assignments[stream] = worker
+            return worker
+
+    @staticmethod
+    def _fit(frame, slot_bytes):
+        if frame.nbytes <= slot_bytes:
+            return frame
+        scale = (slot_bytes / frame.nbytes) ** 0.5
+        height, width = frame.shape[:2]
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+    def _start(self, worker):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(worker.shm.name, worker.slot_bytes, self.pose_options, child_conn),
+            name=f"inference-worker-{worker.index}",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+        with worker.lock:
+            worker.process = process
+            worker.conn = parent_conn
+            worker.last_pong = time.monotonic()
+        worker.reader = Thread(target=self._read_loop, args=(worker, parent_conn),
+                               name=f"inference-reader-{worker.index}", daemon=True)
+        worker.reader.start()
+
+    def _read_loop(self, worker, conn):
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            worker.last_pong = time.monotonic()
+            if message[0] == "pong":
+                continue
+            _, seq, landmarks, detected_poses, error = message
+            if error is None:
+                self._resolve(worker, seq, (landmarks, detected_poses))
+            elif error[0] == "model":
+                self._resolve(worker, seq, error=ModelUnavailable(error[1]))
+            else:
+                self._resolve(worker, seq, error=InferenceError(error[1]))
+
+        # Frames sent over this connection won't be answered any more
+        with worker.lock:
+            if worker.conn is conn:
+                worker.conn = None
+            lost = [seq for seq, item in worker.pending.items() if item[2] is conn]
+        for seq in lost:
+            self._resolve(worker, seq, error=WorkerCrashed(f"Inference worker {worker.index} exited"))
+
+    def _resolve(self, worker, seq, result=None, error=None):
+        """Complete the future of a frame and give its slot back."""
+        with worker.lock:
+            item = worker.pending.pop(seq, None)
+            if item is None:
+                return
+            worker.free.append(item[1])
+            worker.slot_free.notify()
+            if error is None:
+                worker.processed += 1
+        if error is None:
+            item[0].set_result(result)
+        else:
+            item[0].set_exception(error)
+
+    def _send(self, worker, message):
+        try:
+            with worker.lock:
+                if worker.conn is None:
+                    return False
+                worker.conn.send(message)
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def _monitor_loop(self):
+        while not self._closed:
+            time.sleep(self.health_interval)
+            for worker in self._workers:
+                if self._closed:
+                    return
+                alive = worker.process.is_alive()
+                if alive and time.monotonic() - worker.last_pong <= self.health_timeout:
+                    self._send(worker, ("ping", time.monotonic()))
+                    continue
+                print(f"Restarting inference worker {worker.index}: "
+                      f"{'not responding' if alive else f'exit code {worker.process.exitcode}'}")
+                self._restart(worker)
+
+    def _restart(self, worker):
+        if worker.process.is_alive():
+            worker.process.terminate()
+        worker.process.join(timeout=5)
+        with worker.lock:
+            conn, worker.conn = worker.conn, None
+        if conn is not None:
+            # Wakes the reader, which fails the frames that were in flight
+            conn.close()
+        worker.reader.join(timeout=5)
+        self._start(worker)
+        with worker.lock:
+            worker.restarts += 1
+        INFERENCE_WORKER_RESTARTS.inc()
+
+
+_service = None
+_service_lock = Lock()
+
+
+def get_inference_service():
+    """
+    Return the process-wide inference service, starting it on first use.
+
+    Returns:
+        InferenceService: The service, or None when Config.INFERENCE_WORKERS
+            is 0 and inference runs in the web process.
+    """
+    global _service
+    if not Config.INFERENCE_WORKERS:
+        return None
+    with _service_lock:
+        if _service is None:
+            _service = InferenceService(
+                Config.INFERENCE_WORKERS,
+                slots=Config.INFERENCE_WORKER_SLOTS,
+                slot_bytes=Config.INFERENCE_SLOT_BYTES,
+                health_interval=Config.INFERENCE_HEALTH_INTERVAL,
+                health_timeout=Config.INFERENCE_HEALTH_TIMEOUT,
+                min_detection_confidence=Config.MIN_DETECTION_CONFIDENCE,
+                min_tracking_confidence=Config.MIN_TRACKING_CONFIDENCE
+            )
+            atexit.register(_service.close)
+        return _service
@@ -0,0 +1,325 @@
+# yoga_app/utils/landmark_recording.py
+import argparse
+import itertools
+import json
+import os
+import re
+import struct
+import time
+from collections import Counter, namedtuple
+from threading import Thread
+
+import numpy as np
+
+from yoga_app.config import Config
+from yoga_app.utils.pipeline import DROP_NEWEST, DropQueue
+from yoga_app.utils.pose_detection import NUM_LANDMARKS, PoseDetector
+
+MAGIC = b"YLMREC01"
+FOOTER_MAGIC = b"YLMIDX01"
+# Header: magic, then the length of the JSON header that follows it
+PREAMBLE = struct.Struct("<8sI")
+# Footer: offset of the chunk index, number of chunks, magic
+FOOTER = struct.Struct("<QI8s")
+MAX_POSES = 64
+FLAG_PERSON = 1
+
+# One fixed-size record per frame, 248 bytes: coordinates as float16,
+# visibility quantized to 0-255 and detected poses as a bit mask over the
+# pose names in the header
+RECORD_DTYPE = np.dtype([
+    ("time", "<f8"),
+    ("poses", "<u8"),
+    ("coords", "<f2", (NUM_LANDMARKS, 3)),
+    ("visibility", "u1", (NUM_LANDMARKS,)),
+    ("flags", "u1"),
+])
+# One entry per chunk: its first record, record count and time range
+INDEX_DTYPE = np.dtype([("first", "<u8"), ("count", "<u4"), ("start", "<f8"), ("end", "<f8")])
+
+ReplayFrame = namedtuple("ReplayFrame", ["time", "landmarks", "recorded_poses", "poses"])
+
+
+class RecordingWriter:
+    """
+    Appends per-frame landmarks, timestamps and detected poses to a recording file.
+
+    append() only hands the frame to a background thread, so it is safe to
+    call from the camera loop. The writer packs frames into fixed-size
+    records and writes them in chunks of up to chunk_records, or whatever
+    has arrived after flush_interval seconds. close() writes an index of the
+    chunks and their time ranges; a recording that was never closed is still
+    readable up to its last complete record.
+
+    If the disk can't keep up, frames beyond max_pending are dropped and
+    counted rather than blocking the caller. Pose names that aren't in
+    pose_names are not recorded. The file must not exist yet; the writer
+    raises FileExistsError rather than overwrite a recording.
+    """
+
+    def __init__(self, path, pose_names, metadata=None, chunk_records=1024, flush_interval=1.0,
+                 max_pending=4096):
+        if len(pose_names) > MAX_POSES:
+            raise ValueError(f"A recording holds at most {MAX_POSES} pose names, got {len(pose_names)}")
+        self.path = path
+        self.pose_names = list(pose_names)
+        self.chunk_records = chunk_records
+        self.flush_interval = flush_interval
+        self._bits = {name: 1 << i for i, name in enumerate(self.pose_names)}
+        self._queue = DropQueue(max_pending, DROP_NEWEST)
+        self._index = []
+        self._records = 0
+
+        header = json.dumps({
+            "version": 1,
+            "pose_names": self.pose_names,
+            "record_dtype": RECORD_DTYPE.descr,
+            "created": time.time(),
+            "metadata": metadata or {},
+        }).encode()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "xb")
+        self._file.write(PREAMBLE.pack(MAGIC, len(header)) + header)
+        self._thread = Thread(target=self._write_loop, name="landmark-recorder", daemon=True)
+        self._thread.start()
+
+    def append(self, timestamp, landmarks, poses):
+        """
+        Queue one frame for writing without blocking.
+
+        Parameters:
+            timestamp (float): Capture time in seconds.
+            landmarks (np.ndarray): Array of shape (33, 4), or None without a person.
+            poses (list): Names of the detected poses.
+        """
+        self._queue.put((timestamp, landmarks, poses))
+
+    def close(self):
+        """Write the frames still queued and the chunk index, then close the file."""
+        self._queue.close()
+        self._thread.join()
+
+    def get_stats(self):
+        stats = self._queue.stats()
+        return {"records": self._records, "chunks": len(self._index), "dropped": stats["dropped"]}
+
+    def _write_loop(self):
+        chunk = np.zeros(self.chunk_records, dtype=RECORD_DTYPE)
+        filled = 0
+        last_write = time.monotonic()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is not None:
+                    self._pack(chunk[filled], *item)
+                    filled += 1
+                if filled and (item is None or filled == self.chunk_records or
+                               time.monotonic() - last_write >= self.flush_interval):
+                    self._write_chunk(chunk[:filled])
+                    filled = 0
+                    last_write = time.monotonic()
+                if item is None:
+                    break
+            index = np.array(self._index, dtype=INDEX_DTYPE)
+            offset = self._file.tell()
+            self._file.write(index.tobytes())
+            self._file.write(FOOTER.pack(offset, len(index), FOOTER_MAGIC))
+        except Exception as e:
+            print(f"Error writing landmark recording {self.path}: {e}")
+        finally:
+            self._file.close()
+
+    def _pack(self, record, timestamp, landmarks, poses):
+        record["time"] = timestamp
+        mask = 0
+        for name in poses or ():
+            mask |= self._bits.get(name, 0)
+        record["poses"] = mask
+        if landmarks is None:
+            record["flags"] = 0
+            record["coords"] = 0
+            record["visibility"] = 0
+        else:
+            record["flags"] = FLAG_PERSON
+            record["coords"] = landmarks[:, :3]
+            record["visibility"] = np.clip(np.rint(landmarks[:, 3] * 255), 0, 255)
+
+    def _write_chunk(self, records):
+        self._file.write(records.tobytes())
+        self._file.flush()
+        self._index.append((self._records, len(records), records["time"][0], records["time"][-1]))
+        self._records += len(records)
+
+
+class LandmarkRecording:
+    """
+    Read access to a recording made by RecordingWriter.
+
+    The records are memory-mapped, so opening even a long recording is
+    instant and only the frames that are used are read from disk.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, header_length = PREAMBLE.unpack(f.read(PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a landmark recording")
+            header = json.loads(f.read(header_length))
+            data_offset = PREAMBLE.size + header_length
+            size = f.seek(0, os.SEEK_END)
+            index = None
+            if size - data_offset >= FOOTER.size:
+                f.seek(size - FOOTER.size)
+                index_offset, chunks, footer_magic = FOOTER.unpack(f.read(FOOTER.size))
+                if footer_magic == FOOTER_MAGIC:
+                    f.seek(index_offset)
+                    index = np.frombuffer(f.read(chunks * INDEX_DTYPE.itemsize), dtype=INDEX_DTYPE)
+                    data_end = index_offset
+
+        if index is None:
+            # Not closed cleanly: keep every complete record
+            data_end = data_offset + (size - data_offset) // RECORD_DTYPE.itemsize * RECORD_DTYPE.itemsize
+        count = (data_end - data_offset) // RECORD_DTYPE.itemsize
+        self.header = header
+        self.pose_names = header["pose_names"]
+        self.metadata = header.get("metadata", {})
+        self.records = (
+            np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=data_offset, shape=(count,))
+            if count else np.zeros(0, dtype=RECORD_DTYPE)
+        )
+        self.index = index
+        self.complete = index is not None
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def times(self):
+        return self.records["time"]
+
+    @property
+    def has_person(self):
+        return (self.records["flags"] & FLAG_PERSON).astype(bool)
+
+    def landmarks(self, start=0, stop=None):
+        """
+        Return landmarks of a range of frames.
+
+        Returns:
+            np.ndarray: float32 array of shape (N, 33, 4) holding x, y, z and
+                visibility; frames without a person are NaN.
+        """
+        records = self.records[start:stop]
+        landmarks = np.empty((len(records), NUM_LANDMARKS, 4), dtype=np.float32)
+        landmarks[:, :, :3] = records["coords"]
+        landmarks[:, :, 3] = records["visibility"] / np.float32(255)
+        landmarks[(records["flags"] & FLAG_PERSON) == 0] = np.nan
+        return landmarks
+
+    def poses(self, start=0, stop=None):
+        """Boolean matrix of shape (N, len(pose_names)) of the recorded detections."""
+        masks = self.records["poses"][start:stop]
+        bits = np.left_shift(np.uint64(1), np.arange(len(self.pose_names), dtype=np.uint64))
+        return (masks[:, np.newaxis] & bits) != 0
+
+    def pose_names_at(self, position):
+        mask = int(self.records["poses"][position])
+        return [name for i, name in enumerate(self.pose_names) if mask >> i & 1]
+
+    def between(self, start_time, end_time):
+        """Return the (start, stop) frame range recorded between two timestamps."""
+        times = self.times
+        return (int(np.searchsorted(times, start_time, side="left")),
+                int(np.searchsorted(times, end_time, side="right")))
+
+
+class _Landmark:
+    """Stand-in for a MediaPipe landmark, so classifiers see the type they get live."""
+
+    __slots__ = ("x", "y", "z", "visibility")
+
+    def __init__(self, x, y, z, visibility):
+        self.x = x
+        self.y = y
+        self.z = z
+        self.visibility = visibility
+
+
+def replay(recording, classify=None, start=0, stop=None):
+    """
+    Feed a recording back through a classifier, without MediaPipe or a camera.
+
+    Parameters:
+        recording: A LandmarkRecording or the path of one.
+        classify: Callable taking a list of 33 landmarks with x, y, z and
+            visibility attributes and returning pose names;
+            PoseDetector().detect_poses by default.
+        start, stop: Range of frames to replay.
+
+    Yields:
+        ReplayFrame: time, landmarks (array of shape (33, 4), or None without
+            a person), the poses detected when recording and the poses the
+            classifier detects now.
+    """
+    if not isinstance(recording, LandmarkRecording):
+        recording = LandmarkRecording(recording)
+    if classify is None:
+        classify = PoseDetector().detect_poses
+
+    landmarks = recording.landmarks(start, stop)
+    person = recording.has_person[start:stop]
+    times = recording.times[start:stop]
+    for i in range(len(landmarks)):
+        recorded = recording.pose_names_at(start + i)
+        if not person[i]:
+            yield ReplayFrame(float(times[i]), None, recorded, [])
+            continue
+        frame = landmarks[i]
+        poses = classify([_Landmark(*map(float, point)) for point in frame])
+        yield ReplayFrame(float(times[i]), frame, recorded, poses)
+
+
+def open_session_recorder(name, pose_names, metadata=None):
+    """
+    Start a recording in Config.RECORDING_DIR if recording is enabled.
+
+    The file is named after the session and the current second, with a
+    counter added when a session of the same name started in that second.
+
+    Returns:
+        RecordingWriter: The writer, or None when Config.RECORDING_ENABLED is off.
+    """
+    if not Config.RECORDING_ENABLED:
+        return None
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", str(name))
+    stem = os.path.join(Config.RECORDING_DIR, f"{safe_name}-{time.strftime('%Y%m%d-%H%M%S')}")
+    for attempt in itertools.count(1):
+        path = f"{stem}.lmrec" if attempt == 1 else f"{stem}-{attempt}.lmrec"
+        try:
+            return RecordingWriter(path, pose_names, metadata)
+        except FileExistsError:
+            continue
+        except Exception as e:
+            print(f"Error starting landmark recording {path}: {e}")
+            return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-run the pose checks on a landmark recording.")
+    parser.add_argument("recording", help="Recording file (.lmrec)")
+    args = parser.parse_args(argv)
+
+    recording = LandmarkRecording(args.recording)
+    recorded, replayed, changed = Counter(), Counter(), 0
+    for frame in replay(recording):
+        recorded.update(frame.recorded_poses)
+        replayed.update(frame.poses)
+        changed += set(frame.recorded_poses) != set(frame.poses)
+    print(f"{len(recording)} frames, {int(recording.has_person.sum())} with a person, {changed} changed")
+    for name in sorted(set(recorded) | set(replayed)):
+        print(f"{name:30} recorded {recorded[name]:7}  now {replayed[name]:7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+# yoga_app/utils/metrics.py
+import bisect
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+# Seconds; spans a fast JPEG encode up to a slow heavy-model inference
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+# Seconds; a single pose rule takes microseconds
+CHECK_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 1e-3)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """A named metric with optional labels; each label combination gets its own child."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = Lock()
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+        (registry or REGISTRY).register(self)
+
+    def labels(self, *values):
+        """Return the child for one combination of label values."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        key = tuple(map(str, values))
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0
+        self._lock = Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """A value that only goes up, e.g. frames captured."""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def _render_child(self, key, child):
+        yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+class _GaugeChild(_CounterChild):
+    def __init__(self):
+        super().__init__()
+        self.function = None
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+    def set_function(self, function):
+        """Read the value from function() whenever the metrics are rendered."""
+        self.function = function
+
+    def get(self):
+        return self.function() if self.function is not None else self.value
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, e.g. active streams."""
+
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def dec(self, amount=1):
+        self._default.dec(amount)
+
+    def set(self, value):
+        self._default.set(value)
+
+    def set_function(self, function):
+        self._default.set_function(function)
+
+    def _render_child(self, key, child):
+        yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.get())}"
+
+
+class _HistogramChild:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        """Observe the duration of a with block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values, e.g. stage latencies, in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=STAGE_BUCKETS, registry=None):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def _render_child(self, key, child):
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float("inf"),), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+            yield f"{self.name}_bucket{labels} {cumulative}"
+        labels = _format_labels(self.labelnames, key)
+        yield f"{self.name}_sum{labels} {_format_value(total)}"
+        yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    """The set of metrics rendered by /metrics."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = Histogram(
+    "yoga_pipeline_stage_seconds",
+    "Time spent per frame in each camera pipeline stage.",
+    ["stage"],
+)
+POSE_CHECK_SECONDS = Histogram(
+    "yoga_pose_check_seconds",
+    "Time spent evaluating each pose rule on a frame.",
+    ["pose"],
+    buckets=CHECK_BUCKETS,
+)
+FRAMES_CAPTURED = Counter(
+    "yoga_frames_captured_total",
+    "Frames read from the camera.",
+)
+FRAMES_DROPPED = Counter(
+    "yoga_frames_dropped_total",
+    "Frames discarded by a full pipeline queue, by the stage the queue feeds.",
+    ["queue"],
+)
+FRAMES_ENCODED = Counter(
+    "yoga_frames_encoded_total",
+    "Frames encoded as JPEG, by stream.",
+    ["stream"],
+)
+FRAMES_FAILED = Counter(
+    "yoga_frames_failed_total",
+    "Frames that could not be captured, decoded, analyzed or encoded, by stage.",
+    ["stage"],
+)
+ACTIVE_STREAMS = Gauge(
+    "yoga_active_streams",
+    "Clients currently subscribed, by stream.",
+    ["stream"],
+)
+REQUEST_SECONDS = Histogram(
+    "yoga_http_request_duration_seconds",
+    "Latency of page requests, by endpoint, method and status.",
+    ["endpoint", "method", "status"],
+    buckets=REQUEST_BUCKETS,
+)
+INFERENCE_WORKER_RESTARTS = Counter(
+    "yoga_inference_worker_restarts_total",
+    "Inference worker processes restarted after crashing or hanging.",
+)
+CAMERA_FRAMES = Counter(
+    "yoga_camera_frames_total",
+    "Pose results published, by camera.",
+    ["camera"],
+)
+CAMERA_LATENCY_SECONDS = Histogram(
+    "yoga_camera_latency_seconds",
+    "Time from capture to pose result, by camera.",
+    ["camera"],
+    buckets=REQUEST_BUCKETS,
+)
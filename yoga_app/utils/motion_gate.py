@@ -0,0 +1,68 @@
+# yoga_app/utils/motion_gate.py
+import cv2
+
+
+class MotionGate:
+    """
+    Cheap change detector that decides whether a frame needs pose inference.
+
+    Each frame is shrunk to a small grayscale thumbnail and compared with the
+    thumbnail of the last frame that went through inference. While the mean
+    absolute difference stays below threshold (in gray levels, 0-255), the
+    caller can reuse its previous landmarks and poses. Comparing against the
+    last processed frame rather than the previous one means slow drift still
+    adds up and triggers inference. At least one frame in every
+    refresh_interval is processed regardless.
+    """
+
+    def __init__(self, threshold=2.0, refresh_interval=15, size=(64, 48)):
+        self.threshold = threshold
+        self.refresh_interval = refresh_interval
+        self.size = size
+        self._reference = None
+        self._small = None
+        self._gray = None
+        self._diff = None
+        self._since_refresh = 0
+        self.processed = 0
+        self.skipped = 0
+
+    def should_process(self, frame):
+        """
+        Score a BGR frame against the last processed frame.
+
+        Returns:
+            bool: True if the frame should go through inference.
+        """
+        # INTER_LINEAR only samples a few source pixels per output pixel, which
+        # is ~300x cheaper than INTER_AREA at camera resolutions; the mean over
+        # the whole thumbnail averages out the sampling noise.
+        # The thumbnails are written into arrays reused across frames
+        self._small = cv2.resize(frame, self.size, dst=self._small, interpolation=cv2.INTER_LINEAR)
+        gray = self._gray = cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+
+        if (self._reference is not None and
+                self._since_refresh < self.refresh_interval - 1):
+            self._diff = cv2.absdiff(gray, self._reference, dst=self._diff)
+            if self._diff.mean() < self.threshold:
+                self._since_refresh += 1
+                self.skipped += 1
+                return False
+
+        # Keep this thumbnail as the reference and reuse the old one next time
+        self._reference, self._gray = gray, self._reference
+        self._since_refresh = 0
+        self.processed += 1
+        return True
+
+    def reset(self):
+        """Forget the reference frame so the next frame is always processed."""
+        self._reference = None
+
+    def get_stats(self):
+        total = self.processed + self.skipped
+        return {
+            "processed": self.processed,
+            "skipped": self.skipped,
+            "skip_ratio": self.skipped / total if total else 0.0,
+        }
@@ -0,0 +1,127 @@
+# yoga_app/utils/multi_person.py
+import itertools
+import os
+
+import mediapipe as mp
+import numpy as np
+from mediapipe.tasks.python import BaseOptions, vision
+
+from yoga_app.utils.pose_detection import NUM_LANDMARKS
+from yoga_app.utils.roi import TORSO_LANDMARKS
+
+
+class MultiPoseEstimator:
+    """
+    Finds up to max_people bodies per frame with MediaPipe's PoseLandmarker.
+
+    The single-person Pose solution has no multi-person mode, so this uses
+    the tasks API, which needs a pose landmarker model bundle (.task file,
+    e.g. pose_landmarker_full.task from the MediaPipe model page) at
+    model_path. Frames must be passed in capture order.
+    """
+
+    def __init__(self, model_path, max_people, min_detection_confidence=0.5, min_tracking_confidence=0.5):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Pose landmarker model not found: {model_path}")
+        options = vision.PoseLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=model_path),
+            running_mode=vision.RunningMode.VIDEO,
+            num_poses=max_people,
+            min_pose_detection_confidence=min_detection_confidence,
+            min_pose_presence_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence,
+        )
+        self._landmarker = vision.PoseLandmarker.create_from_options(options)
+        self._last_ms = -1
+
+    def process(self, rgb_frame, timestamp):
+        """
+        Detect the people in an RGB frame.
+
+        Parameters:
+            rgb_frame (np.ndarray): The frame, RGB.
+            timestamp (float): Capture time in seconds.
+
+        Returns:
+            np.ndarray: float32 array of shape (N, 33, 4) with x, y, z and
+                visibility of each person's landmarks.
+        """
+        # The landmarker requires strictly increasing timestamps
+        timestamp_ms = max(int(timestamp * 1000), self._last_ms + 1)
+        self._last_ms = timestamp_ms
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=np.ascontiguousarray(rgb_frame))
+        result = self._landmarker.detect_for_video(image, timestamp_ms)
+
+        people = np.empty((len(result.pose_landmarks), NUM_LANDMARKS, 4), dtype=np.float32)
+        for i, person in enumerate(result.pose_landmarks):
+            people[i] = [(lm.x, lm.y, lm.z, lm.visibility or 0.0) for lm in person]
+        return people
+
+    def close(self):
+        self._landmarker.close()
+
+
+class PersonTracker:
+    """
+    Gives each person a track ID that stays the same across frames.
+
+    People are matched to the tracks of the previous frames by the distance
+    between their torso centres, closest pairs first; a person farther than
+    max_distance (in normalized frame coordinates) from every free track
+    starts a new one. A track survives max_missed frames without a match, so
+    someone briefly hidden by another person keeps their ID.
+    """
+
+    def __init__(self, max_distance=0.2, max_missed=15):
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self._ids = itertools.count(1)
+        # track id -> [torso centre, frames missed]
+        self._tracks = {}
+        self._started = 0
+
+    def update(self, people):
+        """
+        Match the people found in a frame to tracks.
+
+        Parameters:
+            people (np.ndarray): Landmarks of shape (N, 33, 4).
+
+        Returns:
+            list: The track ID of each person, in the order of people.
+        """
+        centers = people[:, TORSO_LANDMARKS, :2].mean(axis=1)
+        track_ids = list(self._tracks)
+        ids = [None] * len(people)
+
+        if len(people) and track_ids:
+            track_centers = np.array([self._tracks[track_id][0] for track_id in track_ids])
+            distances = np.linalg.norm(centers[:, np.newaxis] - track_centers[np.newaxis], axis=2)
+            taken = set()
+            pairs = min(len(people), len(track_ids))
+            for flat in np.argsort(distances, axis=None).tolist():
+                person, track = divmod(flat, len(track_ids))
+                if distances[person, track] > self.max_distance:
+                    break
+                if ids[person] is not None or track in taken:
+                    continue
+                ids[person] = track_ids[track]
+                taken.add(track)
+                if len(taken) == pairs:
+                    break
+
+        for person, track_id in enumerate(ids):
+            if track_id is None:
+                track_id = ids[person] = next(self._ids)
+                self._started += 1
+            self._tracks[track_id] = [centers[person], 0]
+        matched = set(ids)
+        for track_id in track_ids:
+            if track_id not in matched:
+                self._tracks[track_id][1] += 1
+                if self._tracks[track_id][1] > self.max_missed:
+                    del self._tracks[track_id]
+        return ids
+
+    def get_stats(self):
+        return {"tracks": len(self._tracks), "tracks_started": self._started}
@@ -0,0 +1,176 @@
+# yoga_app/utils/pipeline.py
+import time
+from collections import deque
+from threading import Condition, Lock
+
+import numpy as np
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+BLOCK = "block"
+DROP_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+
+class DropQueue:
+    """
+    Bounded hand-off queue between two pipeline stages that by default never blocks the producer.
+
+    When the queue is full, put() either discards the oldest queued item to
+    make room ("drop_oldest", keeps latency low) or discards the item being
+    put ("drop_newest", keeps frames in order of arrival). Consumers block in
+    get() until an item arrives or the queue is closed. Dropped items are
+    passed to on_drop, e.g. to recycle their frame buffers.
+
+    For offline producers that must not lose frames, the "block" policy makes
+    put() wait for room instead; only items put after close() are dropped.
+    """
+
+    def __init__(self, maxsize=1, policy=DROP_OLDEST, on_drop=None):
+        if maxsize < 1:
+            raise ValueError("DropQueue needs room for at least one item")
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy {policy!r}, expected one of {DROP_POLICIES}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.on_drop = on_drop
+        self._items = deque()
+        lock = Lock()
+        self._not_empty = Condition(lock)
+        self._not_full = Condition(lock)
+        self._closed = False
+        self._put = 0
+        self._dropped = 0
+
+    def put(self, item):
+        """Queue an item. Returns False if an item had to be dropped."""
+        dropped = None
+        with self._not_empty:
+            if self.policy == BLOCK:
+                while len(self._items) >= self.maxsize and not self._closed:
+                    self._not_full.wait()
+            if self._closed:
+                dropped = item
+            else:
+                self._put += 1
+                if len(self._items) >= self.maxsize:
+                    self._dropped += 1
+                    if self.policy == DROP_NEWEST:
+                        dropped = item
+                    else:
+                        dropped = self._items.popleft()
+                if dropped is not item:
+                    self._items.append(item)
+                    self._not_empty.notify()
+        if dropped is not None and self.on_drop is not None:
+            self.on_drop(dropped)
+        return dropped is None
+
+    def get(self, timeout=None):
+        """Return the next item, or None once the queue is closed and drained or timeout seconds pass."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._not_empty:
+            while not self._items:
+                if self._closed:
+                    return None
+                if deadline is None:
+                    self._not_empty.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    self._not_empty.wait(remaining)
+            self._not_full.notify()
+            return self._items.popleft()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def close(self):
+        """Stop accepting items and wake every waiting consumer."""
+        with self._not_empty:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def stats(self):
+        """
+        Return the queue's counters.
+
+        Returns:
+            dict: Current depth, capacity ("size"), items offered ("put") and
+                items discarded by the drop policy ("dropped").
+        """
+        with self._not_empty:
+            return {
+                "depth": len(self._items),
+                "size": self.maxsize,
+                "put": self._put,
+                "dropped": self._dropped,
+            }
+
+
+class FramePool:
+    """
+    Recycles frame-sized arrays so the camera loop doesn't allocate one per frame.
+
+    take() hands out a previously released array, or None when the pool is
+    empty, in which case the caller lets OpenCV allocate (cap.read() and the
+    dst= arguments accept None). Arrays come back through release(). At most
+    maxsize arrays are kept; more are left to the garbage collector.
+    """
+
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self._free = []
+        self._lock = Lock()
+
+    def take(self):
+        with self._lock:
+            return self._free.pop() if self._free else None
+
+    def release(self, frame):
+        with self._lock:
+            if len(self._free) < self.maxsize:
+                self._free.append(frame)
+
+
+def reuse(buffers, key, shape, dtype=np.uint8):
+    """Return the array stored under key in buffers, (re)allocating it if its shape changed."""
+    buffer = buffers.get(key)
+    if buffer is None or buffer.shape != shape:
+        buffer = buffers[key] = np.empty(shape, dtype=dtype)
+    return buffer
+
+
+class FrameStats:
+    """Frame rate and latency of a stream over its last `window` frames."""
+
+    def __init__(self, window=120):
+        self._frames = deque(maxlen=window)
+        self._lock = Lock()
+
+    def record(self, latency):
+        """Count one frame that took latency seconds from capture to result."""
+        with self._lock:
+            self._frames.append((time.monotonic(), latency))
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: "fps" over the window up to now, so it falls to 0 when
+                frames stop, and "latency_ms" median and 95th percentile.
+        """
+        with self._lock:
+            frames = list(self._frames)
+        if len(frames) < 2:
+            return {"fps": 0.0, "latency_ms": None}
+        span = time.monotonic() - frames[0][0]
+        latencies = np.array([latency for _, latency in frames]) * 1000.0
+        return {
+            "fps": round((len(frames) - 1) / span, 1) if span > 0 else 0.0,
+            "latency_ms": {
+                "median": round(float(np.median(latencies)), 1),
+                "p95": round(float(np.percentile(latencies, 95)), 1),
+            },
+        }
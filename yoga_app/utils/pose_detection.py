@@ -1,187 +1,231 @@
 # yoga_app/utils/pose_detection.py
 import mediapipe as mp
+from mediapipe.framework.formats import landmark_pb2
 import numpy as np
 import math
+import time
+from collections import Counter
+from threading import Lock
+from types import SimpleNamespace
+from yoga_app.config import Config
+from yoga_app.utils.metrics import POSE_CHECK_SECONDS
+from yoga_app.utils.pose_embedding import get_pose_index
+from yoga_app.utils.pose_features import PoseFeatures
+from yoga_app.utils.pose_rules import RuleEngine
+
+PoseLandmark = mp.solutions.pose.PoseLandmark
+NUM_LANDMARKS = len(PoseLandmark)
+# Plain integer landmark indices; enum member lookups are noticeably slower
+# in the per-frame checks.
+L = SimpleNamespace(**{landmark.name: landmark.value for landmark in PoseLandmark})
+# Skeleton edges as sorted [start, end] index pairs, for clients drawing landmarks
+POSE_CONNECTIONS = sorted([min(a, b), max(a, b)] for a, b in mp.solutions.pose.POSE_CONNECTIONS)
+
+
+def landmarks_to_array(landmarks):
+    """
+    Pack MediaPipe landmarks into a contiguous float32 array.
+
+    Parameters:
+        landmarks (list): A list of pose landmarks detected by MediaPipe.
+
+    Returns:
+        np.ndarray: Array of shape (33, 4) holding x, y, z and visibility.
+    """
+    return np.array(
+        [(lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks],
+        dtype=np.float32
+    )
+
+
+def array_to_landmarks(landmarks):
+    """
+    Turn an array of shape (33, 4) back into MediaPipe landmarks, e.g. for drawing.
+
+    Parameters:
+        landmarks (np.ndarray): x, y, z and visibility of each landmark.
+
+    Returns:
+        NormalizedLandmarkList: The landmarks as returned by Pose.process.
+    """
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z, visibility in landmarks.tolist():
+        landmark_list.landmark.add(x=x, y=y, z=z, visibility=visibility)
+    return landmark_list
+
+
+ORIENTATIONS = ("standing", "seated", "prone", "supine", "inverted")
+
+# Minimum vertical extent of thigh and shin, relative to torso length, for an
+# upright torso to count as standing rather than seated or kneeling.
+STANDING_LEG_RATIO = 0.25
+
 
 class PoseDetector:
-    def __init__(self):
+    """
+    Rule-based asana checks over MediaPipe pose landmarks.
+
+    detect_poses and classify_batch evaluate the pose rules loaded from
+    Config.POSE_RULES_DIRS (see yoga_app/rules/asanas.json). The hand-written
+    is_* checks are the reference the built-in rules were written against.
+
+    Every is_* check accepts either a list of landmarks or a PoseFeatures
+    object. Checks read all geometry from PoseFeatures, and combine conditions
+    with & and | so the same check also runs over a batch of frames.
+    """
+
+    def __init__(self, rule_dirs=None):
         self.mp_pose = mp.solutions.pose
         self.mp_drawing = mp.solutions.drawing_utils
+        self.rules = RuleEngine(
+            rule_dirs or Config.POSE_RULES_DIRS,
+            min_visibility=Config.POSE_RULES_MIN_VISIBILITY,
+            reload_interval=Config.POSE_RULES_RELOAD_INTERVAL,
+            orientations=ORIENTATIONS,
+        )
+        self._stats_lock = Lock()
+        self.reset_stage_stats()
 
     def calculate_angle(self, a, b, c):
         if not all([a, b, c]):
             return None
-        
+
         a = np.array([a.x, a.y])
         b = np.array([b.x, b.y])
         c = np.array([c.x, c.y])
-        
+
         radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
         angle = np.abs(radians * 180.0 / np.pi)
-        
+
         if angle > 180.0:
             angle = 360 - angle
-            
-        return angle
 
-    def is_tadasana(self,landmarks):
-        left_ankle = landmarks[self.mp_pose.PoseLandmark.LEFT_ANKLE.value]
-        right_ankle = landmarks[self.mp_pose.PoseLandmark.RIGHT_ANKLE.value]
-        left_knee = landmarks[self.mp_pose.PoseLandmark.LEFT_KNEE.value]
-        right_knee = landmarks[self.mp_pose.PoseLandmark.RIGHT_KNEE.value]
-        left_hip = landmarks[self.mp_pose.PoseLandmark.LEFT_HIP.value]
-        right_hip = landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP.value]
-        left_shoulder = landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        right_shoulder = landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
+        return angle
 
-        def aligned_vertical(left, right, tolerance=0.1):
-            return abs(left.x - right.x) < tolerance
+    def features(self, landmarks):
+        """Wrap landmarks in PoseFeatures unless the caller already did."""
+        if isinstance(landmarks, PoseFeatures):
+            return landmarks
+        return PoseFeatures(landmarks)
 
-        def is_above(lower, upper):
-            return upper.y < lower.y
+    def is_tadasana(self, landmarks):
+        f = self.features(landmarks)
 
-        shoulder_angle = self.calculate_angle(left_shoulder, left_hip, left_knee)
+        shoulder_angle = f.angle(L.LEFT_SHOULDER, L.LEFT_HIP, L.LEFT_KNEE)
         return (
-                aligned_vertical(left_ankle, right_ankle) and
-                aligned_vertical(left_knee, right_knee) and
-                aligned_vertical(left_hip, right_hip) and
-                aligned_vertical(left_shoulder, right_shoulder) and
-                is_above(left_ankle, left_knee) and
-                is_above(right_ankle, right_knee) and
-                is_above(left_knee, left_hip) and
-                is_above(right_knee, right_hip) and
-                (160 < shoulder_angle < 200)  # Angle check
-        )
-    def is_padahastasana(self,landmarks):
-        # Extracting landmarks
-        left_ankle = landmarks[self.mp_pose.PoseLandmark.LEFT_ANKLE.value]
-        right_ankle = landmarks[self.mp_pose.PoseLandmark.RIGHT_ANKLE.value]
-        left_knee = landmarks[self.mp_pose.PoseLandmark.LEFT_KNEE.value]
-        right_knee = landmarks[self.mp_pose.PoseLandmark.RIGHT_KNEE.value]
-        left_shoulder = landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        right_shoulder = landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
+                # Left and right sides aligned vertically
+                (f.dx(L.LEFT_ANKLE, L.RIGHT_ANKLE) < 0.1) &
+                (f.dx(L.LEFT_KNEE, L.RIGHT_KNEE) < 0.1) &
+                (f.dx(L.LEFT_HIP, L.RIGHT_HIP) < 0.1) &
+                (f.dx(L.LEFT_SHOULDER, L.RIGHT_SHOULDER) < 0.1) &
+                # Knees above ankles, hips above knees
+                (f.y(L.LEFT_KNEE) < f.y(L.LEFT_ANKLE)) &
+                (f.y(L.RIGHT_KNEE) < f.y(L.RIGHT_ANKLE)) &
+                (f.y(L.LEFT_HIP) < f.y(L.LEFT_KNEE)) &
+                (f.y(L.RIGHT_HIP) < f.y(L.RIGHT_KNEE)) &
+                (160 < shoulder_angle) & (shoulder_angle < 200)  # Angle check
+        )
+
+    def is_padahastasana(self, landmarks):
+        f = self.features(landmarks)
 
         # Check if both feet are straight (knees above ankles)
-        feet_straight = left_knee.y < left_ankle.y and right_knee.y < right_ankle.y
+        feet_straight = (
+            (f.y(L.LEFT_KNEE) < f.y(L.LEFT_ANKLE)) &
+            (f.y(L.RIGHT_KNEE) < f.y(L.RIGHT_ANKLE))
+        )
 
         # Check if the shoulders are below the knees for proper forward bend
-        body_bent_forward = left_shoulder.y > left_knee.y and right_shoulder.y > right_knee.y
+        body_bent_forward = (
+            (f.y(L.LEFT_SHOULDER) > f.y(L.LEFT_KNEE)) &
+            (f.y(L.RIGHT_SHOULDER) > f.y(L.RIGHT_KNEE))
+        )
 
         # Check if the shoulders are below the ankles to ensure the hands are reaching down
-        hands_on_floor = left_shoulder.y < left_ankle.y and right_shoulder.y < right_ankle.y
+        hands_on_floor = (
+            (f.y(L.LEFT_SHOULDER) < f.y(L.LEFT_ANKLE)) &
+            (f.y(L.RIGHT_SHOULDER) < f.y(L.RIGHT_ANKLE))
+        )
 
         # Return true only if all conditions are met
-        return feet_straight and body_bent_forward and hands_on_floor
+        return feet_straight & body_bent_forward & hands_on_floor
 
     def is_trikonasana(self, landmarks):
-        # Get key landmarks
-        left_hip = landmarks[self.mp_pose.PoseLandmark.LEFT_HIP.value]
-        right_hip = landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP.value]
-        left_shoulder = landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        right_shoulder = landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-        left_ankle = landmarks[self.mp_pose.PoseLandmark.LEFT_ANKLE.value]
-        right_ankle = landmarks[self.mp_pose.PoseLandmark.RIGHT_ANKLE.value]
-        left_elbow = landmarks[self.mp_pose.PoseLandmark.LEFT_ELBOW.value]
-        right_elbow = landmarks[self.mp_pose.PoseLandmark.RIGHT_ELBOW.value]
-        
+        f = self.features(landmarks)
+
         # Calculate angles
-        hip_angle = self.calculate_angle(left_shoulder, left_hip, left_ankle)
-        body_side_tilt = abs(left_hip.x - right_hip.x)
-        
-        # Check for wide leg stance
-        leg_width = abs(left_ankle.x - right_ankle.x)
-        
+        hip_angle = f.angle(L.LEFT_SHOULDER, L.LEFT_HIP, L.LEFT_ANKLE)
+        body_side_tilt = f.dx(L.LEFT_HIP, L.RIGHT_HIP)
+
         # Check for side bend
         body_bent_sideways = (
-            abs(left_shoulder.y - right_shoulder.y) > 0.1 and 
-            abs(left_hip.y - right_hip.y) > 0.1
+            (f.dy(L.LEFT_SHOULDER, L.RIGHT_SHOULDER) > 0.1) &
+            (f.dy(L.LEFT_HIP, L.RIGHT_HIP) > 0.1)
         )
-        
+
         return (
-            body_side_tilt > 0.2 and  # Legs are spread
-            body_bent_sideways and  # Body is bent sideways
-            (70 < hip_angle < 110)  # Moderate angle suggesting side bend
+            (body_side_tilt > 0.2) &  # Legs are spread
+            body_bent_sideways &  # Body is bent sideways
+            (70 < hip_angle) & (hip_angle < 110)  # Moderate angle suggesting side bend
         )
 
     def is_virabhadrasana_i(self, landmarks):
-        # Get key landmarks
-        left_hip = landmarks[self.mp_pose.PoseLandmark.LEFT_HIP.value]
-        right_hip = landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP.value]
-        left_knee = landmarks[self.mp_pose.PoseLandmark.LEFT_KNEE.value]
-        right_knee = landmarks[self.mp_pose.PoseLandmark.RIGHT_KNEE.value]
-        left_ankle = landmarks[self.mp_pose.PoseLandmark.LEFT_ANKLE.value]
-        right_ankle = landmarks[self.mp_pose.PoseLandmark.RIGHT_ANKLE.value]
-        left_shoulder = landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        right_shoulder = landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
+        f = self.features(landmarks)
 
         # Calculate knee angle to check lunge depth
-        knee_angle = self.calculate_angle(left_hip, left_knee, left_ankle)
-        
+        knee_angle = f.angle(L.LEFT_HIP, L.LEFT_KNEE, L.LEFT_ANKLE)
+
         # Check for forward lunge position
         is_lunged = (
-            left_knee.y > left_hip.y and  # Front knee bent
-            left_ankle.y > left_hip.y and  # Front foot forward
-            knee_angle < 120  # Deep enough lunge
+            (f.y(L.LEFT_KNEE) > f.y(L.LEFT_HIP)) &  # Front knee bent
+            (f.y(L.LEFT_ANKLE) > f.y(L.LEFT_HIP)) &  # Front foot forward
+            (knee_angle < 120)  # Deep enough lunge
         )
-        
+
         # Check for raised arms (optional, can be modified)
         arms_raised = (
-            left_shoulder.y < left_hip.y and 
-            right_shoulder.y < right_hip.y
+            (f.y(L.LEFT_SHOULDER) < f.y(L.LEFT_HIP)) &
+            (f.y(L.RIGHT_SHOULDER) < f.y(L.RIGHT_HIP))
         )
-        
-        return is_lunged and arms_raised
+
+        return is_lunged & arms_raised
 
     def is_vrksasana(self, landmarks):
-        # Get key landmarks
-        left_hip = landmarks[self.mp_pose.PoseLandmark.LEFT_HIP.value]
-        right_hip = landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP.value]
-        left_knee = landmarks[self.mp_pose.PoseLandmark.LEFT_KNEE.value]
-        right_knee = landmarks[self.mp_pose.PoseLandmark.RIGHT_KNEE.value]
-        left_ankle = landmarks[self.mp_pose.PoseLandmark.LEFT_ANKLE.value]
-        right_ankle = landmarks[self.mp_pose.PoseLandmark.RIGHT_ANKLE.value]
-        left_shoulder = landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        right_shoulder = landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
+        f = self.features(landmarks)
 
         # Check if one leg is lifted
         def is_leg_lifted(ankle, knee, hip):
-            return ankle.y > knee.y and knee.y > hip.y
-
-        # Check body alignment
-        def is_body_straight(left, right):
-            return abs(left.x - right.x) < 0.1
+            return (f.y(ankle) > f.y(knee)) & (f.y(knee) > f.y(hip))
 
         # Check for one leg standing
-        left_leg_lifted = is_leg_lifted(left_ankle, left_knee, left_hip)
-        right_leg_lifted = is_leg_lifted(right_ankle, right_knee, right_hip)
-        
+        left_leg_lifted = is_leg_lifted(L.LEFT_ANKLE, L.LEFT_KNEE, L.LEFT_HIP)
+        right_leg_lifted = is_leg_lifted(L.RIGHT_ANKLE, L.RIGHT_KNEE, L.RIGHT_HIP)
+
         # Ensure body remains mostly vertical
-        body_vertical = is_body_straight(left_shoulder, right_shoulder) and is_body_straight(left_hip, right_hip)
-        
-        return (left_leg_lifted or right_leg_lifted) and body_vertical
+        body_vertical = (
+            (f.dx(L.LEFT_SHOULDER, L.RIGHT_SHOULDER) < 0.1) &
+            (f.dx(L.LEFT_HIP, L.RIGHT_HIP) < 0.1)
+        )
+
+        return (left_leg_lifted | right_leg_lifted) & body_vertical
 
     def is_bhujangasana(self, landmarks):
         # New logic for Bhujangasana (Cobra Pose)
-        left_hip = landmarks[self.mp_pose.PoseLandmark.LEFT_HIP.value]
-        right_hip = landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP.value]
-        left_shoulder = landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        right_shoulder = landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-        
+        f = self.features(landmarks)
+
         body_stretched = (
-            left_shoulder.y < left_hip.y and
-            right_shoulder.y < right_hip.y
+            (f.y(L.LEFT_SHOULDER) < f.y(L.LEFT_HIP)) &
+            (f.y(L.RIGHT_SHOULDER) < f.y(L.RIGHT_HIP))
         )
         return body_stretched
 
     def is_dandasana(self, landmarks):
         # New logic for Dandasana (Staff Pose)
-        left_hip = landmarks[self.mp_pose.PoseLandmark.LEFT_HIP.value]
-        right_hip = landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP.value]
-        left_ankle = landmarks[self.mp_pose.PoseLandmark.LEFT_ANKLE.value]
-        right_ankle = landmarks[self.mp_pose.PoseLandmark.RIGHT_ANKLE.value]
+        f = self.features(landmarks)
+
         is_straight = (
-            left_ankle.x > left_hip.x and
-            right_ankle.x > right_hip.x
+            (f.x(L.LEFT_ANKLE) > f.x(L.LEFT_HIP)) &
+            (f.x(L.RIGHT_ANKLE) > f.x(L.RIGHT_HIP))
         )
         return is_straight
 
@@ -195,49 +239,32 @@ class PoseDetector:
         Returns:
             bool: True if the pose matches Adho Mukha Svanasana, otherwise False.
         """
-        # Extract key landmarks
-        left_wrist = landmarks[self.mp_pose.PoseLandmark.LEFT_WRIST.value]
-        right_wrist = landmarks[self.mp_pose.PoseLandmark.RIGHT_WRIST.value]
-        left_ankle = landmarks[self.mp_pose.PoseLandmark.LEFT_ANKLE.value]
-        right_ankle = landmarks[self.mp_pose.PoseLandmark.RIGHT_ANKLE.value]
-        left_hip = landmarks[self.mp_pose.PoseLandmark.LEFT_HIP.value]
-        right_hip = landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP.value]
-        left_shoulder = landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        right_shoulder = landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-        left_elbow = landmarks[self.mp_pose.PoseLandmark.LEFT_ELBOW.value]
-        right_elbow = landmarks[self.mp_pose.PoseLandmark.RIGHT_ELBOW.value]
-        left_knee = landmarks[self.mp_pose.PoseLandmark.LEFT_KNEE.value]
-        right_knee = landmarks[self.mp_pose.PoseLandmark.RIGHT_KNEE.value]
-
-        # Helper functions for clarity
-        def hips_are_highest():
-            return (
-                left_hip.y < left_shoulder.y and
-                right_hip.y < right_shoulder.y and
-                left_hip.y < left_ankle.y and
-                right_hip.y < right_ankle.y
-            )
-
-        def arms_are_straight():
-            return (
-                self.calculate_angle(left_shoulder, left_elbow, left_wrist) > 160 and
-                self.calculate_angle(right_shoulder, right_elbow, right_wrist) > 160
-            )
-
-        def legs_are_straight():
-            return (
-                self.calculate_angle(left_hip, left_knee, left_ankle) > 160 and
-                self.calculate_angle(right_hip, right_knee, right_ankle) > 160
-            )
-
-        def body_forms_v_shape():
-            return (
-                self.calculate_angle(left_wrist, left_hip, left_ankle) > 30 and
-                self.calculate_angle(right_wrist, right_hip, right_ankle) > 30
-            )
+        f = self.features(landmarks)
+
+        hips_are_highest = (
+            (f.y(L.LEFT_HIP) < f.y(L.LEFT_SHOULDER)) &
+            (f.y(L.RIGHT_HIP) < f.y(L.RIGHT_SHOULDER)) &
+            (f.y(L.LEFT_HIP) < f.y(L.LEFT_ANKLE)) &
+            (f.y(L.RIGHT_HIP) < f.y(L.RIGHT_ANKLE))
+        )
+
+        arms_are_straight = (
+            (f.angle(L.LEFT_SHOULDER, L.LEFT_ELBOW, L.LEFT_WRIST) > 160) &
+            (f.angle(L.RIGHT_SHOULDER, L.RIGHT_ELBOW, L.RIGHT_WRIST) > 160)
+        )
+
+        legs_are_straight = (
+            (f.angle(L.LEFT_HIP, L.LEFT_KNEE, L.LEFT_ANKLE) > 160) &
+            (f.angle(L.RIGHT_HIP, L.RIGHT_KNEE, L.RIGHT_ANKLE) > 160)
+        )
+
+        body_forms_v_shape = (
+            (f.angle(L.LEFT_WRIST, L.LEFT_HIP, L.LEFT_ANKLE) > 30) &
+            (f.angle(L.RIGHT_WRIST, L.RIGHT_HIP, L.RIGHT_ANKLE) > 30)
+        )
 
         # Combine all conditions
-        return hips_are_highest() and arms_are_straight() and legs_are_straight() and body_forms_v_shape()
+        return hips_are_highest & arms_are_straight & legs_are_straight & body_forms_v_shape
 
     def is_balasana(self, landmarks):
         """
@@ -249,59 +276,35 @@ class PoseDetector:
         Returns:
             bool: True if the pose matches Balasana, otherwise False.
         """
-        # Function to calculate the Euclidean distance between two points
-        def calculate_distance(point1, point2):
-            """
-            Calculate the Euclidean distance between two points.
-
-            Parameters:
-                point1, point2: Objects with x, y, z coordinates.
-
-            Returns:
-                float: The distance between the points.
-            """
-            return ((point1.x - point2.x) ** 2 + 
-                    (point1.y - point2.y) ** 2 + 
-                    (point1.z - point2.z) ** 2) ** 0.5
-
-        # Extract key landmarks
-        left_ankle = landmarks[self.mp_pose.PoseLandmark.LEFT_ANKLE.value]
-        right_ankle = landmarks[self.mp_pose.PoseLandmark.RIGHT_ANKLE.value]
-        left_knee = landmarks[self.mp_pose.PoseLandmark.LEFT_KNEE.value]
-        right_knee = landmarks[self.mp_pose.PoseLandmark.RIGHT_KNEE.value]
-        left_hip = landmarks[self.mp_pose.PoseLandmark.LEFT_HIP.value]
-        right_hip = landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP.value]
-        left_shoulder = landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        right_shoulder = landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-        nose = landmarks[self.mp_pose.PoseLandmark.NOSE.value]
+        f = self.features(landmarks)
 
         # Conditions to check:
         # 1. Knees should be bent and close to the ground
         knees_on_ground = (
-            left_knee.y > left_ankle.y and
-            right_knee.y > right_ankle.y and
-            abs(left_knee.y - right_knee.y) < 0.1  # Knees aligned horizontally
+            (f.y(L.LEFT_KNEE) > f.y(L.LEFT_ANKLE)) &
+            (f.y(L.RIGHT_KNEE) > f.y(L.RIGHT_ANKLE)) &
+            (f.dy(L.LEFT_KNEE, L.RIGHT_KNEE) < 0.1)  # Knees aligned horizontally
         )
 
         # 2. Hips should be close to the heels
         hips_near_heels = (
-            calculate_distance(left_hip, left_ankle) < 0.2 and
-            calculate_distance(right_hip, right_ankle) < 0.2
+            (f.distance(L.LEFT_HIP, L.LEFT_ANKLE) < 0.2) &
+            (f.distance(L.RIGHT_HIP, L.RIGHT_ANKLE) < 0.2)
         )
 
         # 3. Torso should be bent forward with nose close to the ground
         torso_bent_forward = (
-            calculate_distance(nose, left_knee) < 0.2 or
-            calculate_distance(nose, right_knee) < 0.2
+            (f.distance(L.NOSE, L.LEFT_KNEE) < 0.2) |
+            (f.distance(L.NOSE, L.RIGHT_KNEE) < 0.2)
         )
 
         # 4. Arms can be stretched forward or resting alongside the body
         arms_forward = (
-            left_shoulder.y < left_hip.y and
-            right_shoulder.y < right_hip.y
+            (f.y(L.LEFT_SHOULDER) < f.y(L.LEFT_HIP)) &
+            (f.y(L.RIGHT_SHOULDER) < f.y(L.RIGHT_HIP))
         )
 
-        return knees_on_ground and hips_near_heels and torso_bent_forward and arms_forward
+        return knees_on_ground & hips_near_heels & torso_bent_forward & arms_forward
 
 
     def is_setu_bandhasana(self, landmarks):
@@ -314,35 +317,28 @@ class PoseDetector:
         Returns:
             bool: True if the pose matches Setu Bandhasana, otherwise False.
         """
-        # Extract key landmarks
-        left_ankle = landmarks[self.mp_pose.PoseLandmark.LEFT_ANKLE.value]
-        right_ankle = landmarks[self.mp_pose.PoseLandmark.RIGHT_ANKLE.value]
-        left_knee = landmarks[self.mp_pose.PoseLandmark.LEFT_KNEE.value]
-        right_knee = landmarks[self.mp_pose.PoseLandmark.RIGHT_KNEE.value]
-        left_hip = landmarks[self.mp_pose.PoseLandmark.LEFT_HIP.value]
-        right_hip = landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP.value]
-        shoulders = [
-            landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value],
-            landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-        ]
+        f = self.features(landmarks)
 
         # Conditions to check:
         # 1. Knees should be bent
         knees_bent = (
-            left_knee.y < left_ankle.y and
-            right_knee.y < right_ankle.y
+            (f.y(L.LEFT_KNEE) < f.y(L.LEFT_ANKLE)) &
+            (f.y(L.RIGHT_KNEE) < f.y(L.RIGHT_ANKLE))
         )
 
         # 2. Hips should be lifted significantly above the ground
         hips_lifted = (
-            left_hip.y < left_knee.y and
-            right_hip.y < right_knee.y
+            (f.y(L.LEFT_HIP) < f.y(L.LEFT_KNEE)) &
+            (f.y(L.RIGHT_HIP) < f.y(L.RIGHT_KNEE))
         )
 
         # 3. Shoulders should remain on the ground
-        shoulders_on_ground = all(shoulder.y > left_hip.y for shoulder in shoulders)
+        shoulders_on_ground = (
+            (f.y(L.LEFT_SHOULDER) > f.y(L.LEFT_HIP)) &
+            (f.y(L.RIGHT_SHOULDER) > f.y(L.LEFT_HIP))
+        )
 
-        return knees_bent and hips_lifted and shoulders_on_ground
+        return knees_bent & hips_lifted & shoulders_on_ground
 
 
     def is_cat_cow_pose(self, landmarks):
@@ -353,37 +349,30 @@ class PoseDetector:
             landmarks (list): A list of pose landmarks detected by MediaPipe.
 
         Returns:
-            str: "Cat Pose", "Cow Pose", or "Neither" based on the detected posture.
+            str: "Cat Pose", "Cow Pose", or "Neither" based on the detected
+                posture; for a batch, an array of these labels.
         """
-        # Extract key landmarks
-        left_shoulder = landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        right_shoulder = landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-        left_hip = landmarks[self.mp_pose.PoseLandmark.LEFT_HIP.value]
-        right_hip = landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP.value]
-        nose = landmarks[self.mp_pose.PoseLandmark.NOSE.value]
+        f = self.features(landmarks)
 
         # Calculate average shoulder and hip positions
-        avg_shoulder_y = (left_shoulder.y + right_shoulder.y) / 2
-        avg_hip_y = (left_hip.y + right_hip.y) / 2
+        avg_shoulder_y = f.mid_y(L.LEFT_SHOULDER, L.RIGHT_SHOULDER)
+        avg_hip_y = f.mid_y(L.LEFT_HIP, L.RIGHT_HIP)
+        nose_y = f.y(L.NOSE)
 
         # Conditions for Cat Pose:
         is_cat_pose = (
-            avg_shoulder_y < avg_hip_y and  # Shoulders above hips
-            nose.y > avg_shoulder_y  # Head tucked down
+            (avg_shoulder_y < avg_hip_y) &  # Shoulders above hips
+            (nose_y > avg_shoulder_y)  # Head tucked down
         )
 
         # Conditions for Cow Pose:
         is_cow_pose = (
-            avg_shoulder_y > avg_hip_y and  # Shoulders below hips
-            nose.y < avg_shoulder_y  # Head lifted
+            (avg_shoulder_y > avg_hip_y) &  # Shoulders below hips
+            (nose_y < avg_shoulder_y)  # Head lifted
         )
 
-        if is_cat_pose:
-            return "Cat Pose"
-        elif is_cow_pose:
-            return "Cow Pose"
-        else:
-            return "Neither"
+        label = np.where(is_cat_pose, "Cat Pose", np.where(is_cow_pose, "Cow Pose", "Neither"))
+        return label if f.batched else str(label)
 
     def is_phalakasana(self, landmarks):
         """
@@ -395,22 +384,16 @@ class PoseDetector:
         Returns:
             bool: True if the pose matches Phalakasana, otherwise False.
         """
-        # Extract key landmarks
-        left_shoulder = landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        right_shoulder = landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-        left_hip = landmarks[self.mp_pose.PoseLandmark.LEFT_HIP.value]
-        right_hip = landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP.value]
-        left_ankle = landmarks[self.mp_pose.PoseLandmark.LEFT_ANKLE.value]
-        right_ankle = landmarks[self.mp_pose.PoseLandmark.RIGHT_ANKLE.value]
+        f = self.features(landmarks)
 
         # Calculate average positions
-        avg_shoulder_y = (left_shoulder.y + right_shoulder.y) / 2
-        avg_hip_y = (left_hip.y + right_hip.y) / 2
-        avg_ankle_y = (left_ankle.y + right_ankle.y) / 2
+        avg_shoulder_y = f.mid_y(L.LEFT_SHOULDER, L.RIGHT_SHOULDER)
+        avg_hip_y = f.mid_y(L.LEFT_HIP, L.RIGHT_HIP)
+        avg_ankle_y = f.mid_y(L.LEFT_ANKLE, L.RIGHT_ANKLE)
 
         # Conditions to check:
         # 1. Shoulders, hips, and ankles should form a straight line
-        alignment = abs(avg_shoulder_y - avg_hip_y) < 0.05 and abs(avg_hip_y - avg_ankle_y) < 0.05
+        alignment = (abs(avg_shoulder_y - avg_hip_y) < 0.05) & (abs(avg_hip_y - avg_ankle_y) < 0.05)
 
         return alignment
 
@@ -425,19 +408,15 @@ class PoseDetector:
         Returns:
             bool: True if the pose matches Dhanurasana, otherwise False.
         """
-        # Extract key landmarks
-        left_hand = landmarks[self.mp_pose.PoseLandmark.LEFT_WRIST.value]
-        right_hand = landmarks[self.mp_pose.PoseLandmark.RIGHT_WRIST.value]
-        left_ankle = landmarks[self.mp_pose.PoseLandmark.LEFT_ANKLE.value]
-        right_ankle = landmarks[self.mp_pose.PoseLandmark.RIGHT_ANKLE.value]
+        f = self.features(landmarks)
 
         # Conditions to check:
         # 1. Hands should be near ankles
         hands_on_ankles = (
-            abs(left_hand.x - left_ankle.x) < 0.1 and
-            abs(right_hand.x - right_ankle.x) < 0.1 and
-            abs(left_hand.y - left_ankle.y) < 0.1 and
-            abs(right_hand.y - right_ankle.y) < 0.1
+            (f.dx(L.LEFT_WRIST, L.LEFT_ANKLE) < 0.1) &
+            (f.dx(L.RIGHT_WRIST, L.RIGHT_ANKLE) < 0.1) &
+            (f.dy(L.LEFT_WRIST, L.LEFT_ANKLE) < 0.1) &
+            (f.dy(L.RIGHT_WRIST, L.RIGHT_ANKLE) < 0.1)
         )
 
         return hands_on_ankles
@@ -453,28 +432,22 @@ class PoseDetector:
         Returns:
             bool: True if the pose matches Ustrasana, otherwise False.
         """
-        # Extract key landmarks
-        left_hip = landmarks[self.mp_pose.PoseLandmark.LEFT_HIP.value]
-        right_hip = landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP.value]
-        left_shoulder = landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        right_shoulder = landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-        left_heel = landmarks[self.mp_pose.PoseLandmark.LEFT_HEEL.value]
-        right_heel = landmarks[self.mp_pose.PoseLandmark.RIGHT_HEEL.value]
+        f = self.features(landmarks)
 
         # Conditions to check:
         # 1. Hips should be forward relative to knees
         hips_forward = (
-            left_hip.x > left_shoulder.x and
-            right_hip.x > right_shoulder.x
+            (f.x(L.LEFT_HIP) > f.x(L.LEFT_SHOULDER)) &
+            (f.x(L.RIGHT_HIP) > f.x(L.RIGHT_SHOULDER))
         )
 
         # 2. Hands should be near the heels
         hands_to_heels = (
-            abs(left_heel.y - left_hip.y) < 0.2 and
-            abs(right_heel.y - right_hip.y) < 0.2
+            (f.dy(L.LEFT_HEEL, L.LEFT_HIP) < 0.2) &
+            (f.dy(L.RIGHT_HEEL, L.RIGHT_HIP) < 0.2)
         )
 
-        return hips_forward and hands_to_heels
+        return hips_forward & hands_to_heels
 
 
     def is_paschimottanasana(self, landmarks):
@@ -487,29 +460,22 @@ class PoseDetector:
         Returns:
             bool: True if the pose matches Paschimottanasana, otherwise False.
         """
-        # Extract key landmarks
-        left_hip = landmarks[self.mp_pose.PoseLandmark.LEFT_HIP.value]
-        right_hip = landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP.value]
-        left_knee = landmarks[self.mp_pose.PoseLandmark.LEFT_KNEE.value]
-        right_knee = landmarks[self.mp_pose.PoseLandmark.RIGHT_KNEE.value]
-        left_foot = landmarks[self.mp_pose.PoseLandmark.LEFT_FOOT_INDEX.value]
-        right_foot = landmarks[self.mp_pose.PoseLandmark.RIGHT_FOOT_INDEX.value]
-        nose = landmarks[self.mp_pose.PoseLandmark.NOSE.value]
+        f = self.features(landmarks)
 
         # Conditions to check:
         # 1. Legs should be straight
         legs_straight = (
-            left_knee.y > left_hip.y and
-            right_knee.y > right_hip.y
+            (f.y(L.LEFT_KNEE) > f.y(L.LEFT_HIP)) &
+            (f.y(L.RIGHT_KNEE) > f.y(L.RIGHT_HIP))
         )
 
         # 2. Nose should be closer to the feet than hips
         forward_bend = (
-            abs(nose.x - (left_foot.x + right_foot.x) / 2) < 0.1 and
-            nose.y < left_hip.y
+            (abs(f.x(L.NOSE) - f.mid_x(L.LEFT_FOOT_INDEX, L.RIGHT_FOOT_INDEX)) < 0.1) &
+            (f.y(L.NOSE) < f.y(L.LEFT_HIP))
         )
 
-        return legs_straight and forward_bend
+        return legs_straight & forward_bend
 
     def is_padmasana(self, landmarks):
         """
@@ -521,17 +487,13 @@ class PoseDetector:
         Returns:
             bool: True if the pose matches Padmasana, otherwise False.
         """
-        # Extract key landmarks
-        left_ankle = landmarks[self.mp_pose.PoseLandmark.LEFT_ANKLE.value]
-        right_ankle = landmarks[self.mp_pose.PoseLandmark.RIGHT_ANKLE.value]
-        left_knee = landmarks[self.mp_pose.PoseLandmark.LEFT_KNEE.value]
-        right_knee = landmarks[self.mp_pose.PoseLandmark.RIGHT_KNEE.value]
+        f = self.features(landmarks)
 
         # Conditions to check:
         # 1. Ankles are above the knees (cross-legged position)
         ankles_above_knees = (
-            left_ankle.y < left_knee.y and
-            right_ankle.y < right_knee.y
+            (f.y(L.LEFT_ANKLE) < f.y(L.LEFT_KNEE)) &
+            (f.y(L.RIGHT_ANKLE) < f.y(L.RIGHT_KNEE))
         )
 
         return ankles_above_knees
@@ -547,31 +509,23 @@ class PoseDetector:
         Returns:
             bool: True if the pose matches Navasana, otherwise False.
         """
-        # Extract key landmarks
-        left_hip = landmarks[self.mp_pose.PoseLandmark.LEFT_HIP.value]
-        right_hip = landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP.value]
-        left_knee = landmarks[self.mp_pose.PoseLandmark.LEFT_KNEE.value]
-        right_knee = landmarks[self.mp_pose.PoseLandmark.RIGHT_KNEE.value]
-        left_foot = landmarks[self.mp_pose.PoseLandmark.LEFT_FOOT_INDEX.value]
-        right_foot = landmarks[self.mp_pose.PoseLandmark.RIGHT_FOOT_INDEX.value]
-        left_shoulder = landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        right_shoulder = landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
+        f = self.features(landmarks)
 
         # Conditions to check:
         # 1. Knees and feet are above hips
         knees_above_hips = (
-            left_knee.y < left_hip.y and
-            right_knee.y < right_hip.y and
-            left_foot.y < left_hip.y and
-            right_foot.y < right_hip.y
+            (f.y(L.LEFT_KNEE) < f.y(L.LEFT_HIP)) &
+            (f.y(L.RIGHT_KNEE) < f.y(L.RIGHT_HIP)) &
+            (f.y(L.LEFT_FOOT_INDEX) < f.y(L.LEFT_HIP)) &
+            (f.y(L.RIGHT_FOOT_INDEX) < f.y(L.RIGHT_HIP))
         )
         # 2. Shoulders are above hips (straight back)
         shoulders_above_hips = (
-            left_shoulder.y < left_hip.y and
-            right_shoulder.y < right_hip.y
+            (f.y(L.LEFT_SHOULDER) < f.y(L.LEFT_HIP)) &
+            (f.y(L.RIGHT_SHOULDER) < f.y(L.RIGHT_HIP))
         )
 
-        return knees_above_hips and shoulders_above_hips
+        return knees_above_hips & shoulders_above_hips
 
 
     def is_matsyasana(self, landmarks):
@@ -584,21 +538,19 @@ class PoseDetector:
         Returns:
             bool: True if the pose matches Matsyasana, otherwise False.
         """
-        # Extract key landmarks
-        head = landmarks[self.mp_pose.PoseLandmark.NOSE.value]
-        chest = (landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value].y + 
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value].y) / 2
-        hips = (landmarks[self.mp_pose.PoseLandmark.LEFT_HIP.value].y + 
-                landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP.value].y) / 2
+        f = self.features(landmarks)
+
+        chest = f.mid_y(L.LEFT_SHOULDER, L.RIGHT_SHOULDER)
+        hips = f.mid_y(L.LEFT_HIP, L.RIGHT_HIP)
 
         # Conditions to check:
         # 1. Chest is significantly higher than hips (arched back)
         arched_chest = chest < hips
 
         # 2. Head is near the floor
-        head_low = head.y > hips
+        head_low = f.y(L.NOSE) > hips
 
-        return arched_chest and head_low
+        return arched_chest & head_low
 
 
     def is_kapotasana(self, landmarks):
@@ -611,25 +563,21 @@ class PoseDetector:
         Returns:
             bool: True if the pose matches Kapotasana, otherwise False.
         """
-        # Extract key landmarks
-        left_knee = landmarks[self.mp_pose.PoseLandmark.LEFT_KNEE.value]
-        right_knee = landmarks[self.mp_pose.PoseLandmark.RIGHT_KNEE.value]
-        left_foot = landmarks[self.mp_pose.PoseLandmark.LEFT_FOOT_INDEX.value]
-        right_foot = landmarks[self.mp_pose.PoseLandmark.RIGHT_FOOT_INDEX.value]
+        f = self.features(landmarks)
 
         # Conditions to check:
         # 1. One leg is extended back
         one_leg_extended = (
-            abs(left_knee.x - right_foot.x) > 0.3 or
-            abs(right_knee.x - left_foot.x) > 0.3
+            (f.dx(L.LEFT_KNEE, L.RIGHT_FOOT_INDEX) > 0.3) |
+            (f.dx(L.RIGHT_KNEE, L.LEFT_FOOT_INDEX) > 0.3)
         )
         # 2. One knee bent forward
         knee_bent_forward = (
-            left_knee.x < right_foot.x or
-            right_knee.x < left_foot.x
+            (f.x(L.LEFT_KNEE) < f.x(L.RIGHT_FOOT_INDEX)) |
+            (f.x(L.RIGHT_KNEE) < f.x(L.LEFT_FOOT_INDEX))
         )
 
-        return one_leg_extended and knee_bent_forward
+        return one_leg_extended & knee_bent_forward
 
     def is_savasana(self, landmarks):
         """
@@ -641,17 +589,13 @@ class PoseDetector:
         Returns:
             bool: True if the pose matches Savasana, otherwise False.
         """
-        # Extract key landmarks
-        left_shoulder = landmarks[self.mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        right_shoulder = landmarks[self.mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-        left_hip = landmarks[self.mp_pose.PoseLandmark.LEFT_HIP.value]
-        right_hip = landmarks[self.mp_pose.PoseLandmark.RIGHT_HIP.value]
+        f = self.features(landmarks)
 
         # Conditions to check:
         # 1. Shoulders and hips are aligned and body is flat
         body_flat = (
-            abs(left_shoulder.y - left_hip.y) < 0.05 and
-            abs(right_shoulder.y - right_hip.y) < 0.05
+            (f.dy(L.LEFT_SHOULDER, L.LEFT_HIP) < 0.05) &
+            (f.dy(L.RIGHT_SHOULDER, L.RIGHT_HIP) < 0.05)
         )
 
         return body_flat
@@ -667,19 +611,18 @@ class PoseDetector:
         Returns:
             bool: True if the pose matches Ardha Chandrasana, otherwise False.
         """
-        # Extract key landmarks
-        left_foot = landmarks[self.mp_pose.PoseLandmark.LEFT_FOOT_INDEX.value]
-        right_foot = landmarks[self.mp_pose.PoseLandmark.RIGHT_FOOT_INDEX.value]
-        left_hand = landmarks[self.mp_pose.PoseLandmark.LEFT_WRIST.value]
-        right_hand = landmarks[self.mp_pose.PoseLandmark.RIGHT_WRIST.value]
+        f = self.features(landmarks)
 
         # Conditions to check:
         # 1. One foot is off the ground
-        single_leg_balance = abs(left_foot.y - right_foot.y) > 0.3
+        single_leg_balance = f.dy(L.LEFT_FOOT_INDEX, L.RIGHT_FOOT_INDEX) > 0.3
         # 2. One arm is extended upward
-        arm_raised = right_hand.y < right_foot.y or left_hand.y < left_foot.y
+        arm_raised = (
+            (f.y(L.RIGHT_WRIST) < f.y(L.RIGHT_FOOT_INDEX)) |
+            (f.y(L.LEFT_WRIST) < f.y(L.LEFT_FOOT_INDEX))
+        )
 
-        return single_leg_balance and arm_raised
+        return single_leg_balance & arm_raised
 
 
     def get_pose_checks(self):
@@ -706,3 +649,228 @@ class PoseDetector:
             "Savasana": self.is_savasana,
             "Ardha Chandrasana": self.is_ardha_chandrasana,
         }
+
+    def classify_orientation(self, landmarks):
+        """
+        Coarsely classify body orientation from torso and leg geometry.
+
+        Parameters:
+            landmarks (list): A list of pose landmarks detected by MediaPipe.
+
+        Returns:
+            str: One of ORIENTATIONS.
+        """
+        f = self.features(landmarks)
+
+        torso_dx = f.mid_x(L.LEFT_SHOULDER, L.RIGHT_SHOULDER) - f.mid_x(L.LEFT_HIP, L.RIGHT_HIP)
+        torso_dy = f.mid_y(L.LEFT_SHOULDER, L.RIGHT_SHOULDER) - f.mid_y(L.LEFT_HIP, L.RIGHT_HIP)
+
+        if abs(torso_dy) >= abs(torso_dx):
+            if torso_dy > 0:
+                # Shoulders below hips
+                return "inverted"
+            thigh_drop = f.mid_y(L.LEFT_KNEE, L.RIGHT_KNEE) - f.mid_y(L.LEFT_HIP, L.RIGHT_HIP)
+            shin_drop = f.mid_y(L.LEFT_ANKLE, L.RIGHT_ANKLE) - f.mid_y(L.LEFT_KNEE, L.RIGHT_KNEE)
+            min_drop = STANDING_LEG_RATIO * abs(torso_dy)
+            if thigh_drop > min_drop and shin_drop > min_drop:
+                return "standing"
+            return "seated"
+
+        # Torso is horizontal: the face points up when lying on the back, so the
+        # nose sits above the ears; on the front it is level with or below them.
+        if f.y(L.NOSE) < f.mid_y(L.LEFT_EAR, L.RIGHT_EAR):
+            return "supine"
+        return "prone"
+
+    def detect_poses(self, landmarks):
+        """
+        Run the pose rules registered for the frame's body orientation.
+
+        The orientation stage runs first; only rules listing that orientation
+        are evaluated, all sharing one PoseFeatures. Rules whose landmarks are
+        not visible enough are skipped.
+
+        Parameters:
+            landmarks (list): A list of pose landmarks detected by MediaPipe.
+
+        Returns:
+            list: Names of the poses whose rule matched.
+        """
+        features = self.features(landmarks)
+        orientation = self.classify_orientation(features)
+        group = self.rules.rules_for(orientation)
+
+        detected_poses = []
+        hidden = 0
+        for rule in group:
+            if not rule.is_visible(features):
+                hidden += 1
+                continue
+            started = time.perf_counter()
+            matched = rule(features)
+            POSE_CHECK_SECONDS.labels(rule.name).observe(time.perf_counter() - started)
+            if matched:
+                detected_poses.append(rule.name)
+
+        with self._stats_lock:
+            self._stage_stats["orientation"][orientation] += 1
+            self._stage_stats["checks_run"] += len(group) - hidden
+            self._stage_stats["checks_skipped"] += len(self.rules.rules) - len(group)
+            self._stage_stats["checks_hidden"] += hidden
+        return detected_poses
+
+    def nearest_poses(self, landmarks, k=None):
+        """
+        Recognize the pose by nearest neighbours in the reference pose index.
+
+        Parameters:
+            landmarks: A list of pose landmarks detected by MediaPipe, or an
+                array of shape (33, 4).
+            k (int): Number of poses to return, Config.POSE_INDEX_NEIGHBOURS by default.
+
+        Returns:
+            list: (pose name, distance) pairs, closest first, or None when
+                there is no index at Config.POSE_INDEX_PATH.
+        """
+        index = get_pose_index()
+        if index is None:
+            return None
+        if not isinstance(landmarks, np.ndarray):
+            landmarks = landmarks_to_array(landmarks)
+        return index.query(landmarks, k or Config.POSE_INDEX_NEIGHBOURS)
+
+    def get_stage_stats(self):
+        """
+        Return counters for the hierarchical classifier.
+
+        Returns:
+            dict: Frames per orientation ("orientation"), the number of pose
+                rules evaluated ("checks_run"), skipped by the orientation stage
+                ("checks_skipped") and skipped for low landmark visibility
+                ("checks_hidden").
+        """
+        with self._stats_lock:
+            stats = dict(self._stage_stats)
+            stats["orientation"] = dict(stats["orientation"])
+            return stats
+
+    def reset_stage_stats(self):
+        with self._stats_lock:
+            self._stage_stats = {
+                "orientation": Counter({orientation: 0 for orientation in ORIENTATIONS}),
+                "checks_run": 0,
+                "checks_skipped": 0,
+                "checks_hidden": 0,
+            }
+
+    def classify_batch(self, landmarks):
+        """
+        Evaluate the pose rules over a batch of frames with array operations.
+
+        Like detect_poses, each frame only runs the rules registered for its
+        body orientation, so a row matches detect_poses on that frame. The
+        stage counters of get_stage_stats() are left alone.
+
+        Parameters:
+            landmarks (np.ndarray): Array of shape (N, 33, 4) holding x, y, z and
+                visibility for each landmark of N frames.
+
+        Returns:
+            np.ndarray: Boolean matrix of shape (N, num_poses). Column j holds the
+                result of the j-th rule in self.rules.names for every frame;
+                frames of another orientation or where the rule's landmarks
+                are not visible enough are False.
+        """
+        self.rules.reload_if_changed()
+        # Features widen coordinates to float64, so thresholds compare exactly
+        # as they do for a single frame of landmark objects.
+        pts = self._landmark_batch(landmarks)
+        features = PoseFeatures(pts)
+        orientation = self.classify_orientation_batch(features)
+        rules = self.rules.rules
+        scores = np.zeros((pts.shape[0], len(rules)), dtype=bool)
+        for column, rule in enumerate(rules):
+            applies = self._applies(rule, orientation)
+            if applies.any():
+                scores[:, column] = rule(features) & rule.is_visible(features) & applies
+        return scores
+
+    def classify_orientation_batch(self, landmarks):
+        """
+        classify_orientation over a batch of landmarks with array operations.
+
+        Parameters:
+            landmarks: Array of shape (N, 33, 4), or PoseFeatures of one.
+
+        Returns:
+            np.ndarray: Index into ORIENTATIONS of each row.
+        """
+        f = landmarks if isinstance(landmarks, PoseFeatures) else PoseFeatures(self._landmark_batch(landmarks))
+
+        torso_dx = f.mid_x(L.LEFT_SHOULDER, L.RIGHT_SHOULDER) - f.mid_x(L.LEFT_HIP, L.RIGHT_HIP)
+        torso_dy = f.mid_y(L.LEFT_SHOULDER, L.RIGHT_SHOULDER) - f.mid_y(L.LEFT_HIP, L.RIGHT_HIP)
+        thigh_drop = f.mid_y(L.LEFT_KNEE, L.RIGHT_KNEE) - f.mid_y(L.LEFT_HIP, L.RIGHT_HIP)
+        shin_drop = f.mid_y(L.LEFT_ANKLE, L.RIGHT_ANKLE) - f.mid_y(L.LEFT_KNEE, L.RIGHT_KNEE)
+        min_drop = STANDING_LEG_RATIO * np.abs(torso_dy)
+
+        index = ORIENTATIONS.index
+        upright = np.where(
+            torso_dy > 0,
+            index("inverted"),
+            np.where((thigh_drop > min_drop) & (shin_drop > min_drop), index("standing"), index("seated"))
+        )
+        lying = np.where(f.y(L.NOSE) < f.mid_y(L.LEFT_EAR, L.RIGHT_EAR), index("supine"), index("prone"))
+        return np.where(np.abs(torso_dy) >= np.abs(torso_dx), upright, lying)
+
+    def detect_poses_batch(self, landmarks):
+        """
+        detect_poses for several people at once.
+
+        Every rule is evaluated once over the whole batch rather than once
+        per person, so the cost per frame grows much slower than the number
+        of people. Results match detect_poses on each row.
+
+        Parameters:
+            landmarks (np.ndarray): Array of shape (N, 33, 4).
+
+        Returns:
+            list: For each row, the names of the poses whose rule matched.
+        """
+        self.rules.reload_if_changed()
+        pts = self._landmark_batch(landmarks)
+        features = PoseFeatures(pts)
+        orientation = self.classify_orientation_batch(features)
+        present = {ORIENTATIONS[i] for i in set(orientation.tolist())}
+        detected_poses = [[] for _ in range(len(pts))]
+        run = hidden = 0
+        rules = self.rules.rules
+        for rule in rules:
+            if present.isdisjoint(rule.orientations):
+                continue
+            applies = self._applies(rule, orientation)
+            visible = applies & rule.is_visible(features)
+            run += int(visible.sum())
+            hidden += int(applies.sum()) - int(visible.sum())
+            for row in np.flatnonzero(rule(features) & visible):
+                detected_poses[row].append(rule.name)
+
+        with self._stats_lock:
+            self._stage_stats["orientation"].update(ORIENTATIONS[i] for i in orientation)
+            self._stage_stats["checks_run"] += run
+            self._stage_stats["checks_skipped"] += len(pts) * len(rules) - run - hidden
+            self._stage_stats["checks_hidden"] += hidden
+        return detected_poses
+
+    @staticmethod
+    def _applies(rule, orientation):
+        """Mask of the rows whose orientation (see classify_orientation_batch) the rule is registered for."""
+        return np.array([o in rule.orientations for o in ORIENTATIONS])[orientation]
+
+    @staticmethod
+    def _landmark_batch(landmarks):
+        pts = np.ascontiguousarray(landmarks, dtype=np.float32)
+        if pts.ndim == 2:
+            pts = pts[np.newaxis]
+        if pts.ndim != 3 or pts.shape[1:] != (NUM_LANDMARKS, 4):
+            raise ValueError(f"Expected landmarks of shape (N, {NUM_LANDMARKS}, 4), got {pts.shape}")
+        return pts
@@ -0,0 +1,222 @@
+# yoga_app/utils/pose_embedding.py
+import argparse
+import glob
+import os
+from threading import Lock
+
+import mediapipe as mp
+import numpy as np
+from scipy.spatial import cKDTree
+
+from yoga_app.config import Config
+
+PoseLandmark = mp.solutions.pose.PoseLandmark
+
+# Landmarks that describe the body's shape. Face, hand and foot details add
+# dimensions (and noise) without separating asanas any better.
+EMBEDDING_LANDMARKS = [
+    PoseLandmark.NOSE,
+    PoseLandmark.LEFT_SHOULDER, PoseLandmark.RIGHT_SHOULDER,
+    PoseLandmark.LEFT_ELBOW, PoseLandmark.RIGHT_ELBOW,
+    PoseLandmark.LEFT_WRIST, PoseLandmark.RIGHT_WRIST,
+    PoseLandmark.LEFT_HIP, PoseLandmark.RIGHT_HIP,
+    PoseLandmark.LEFT_KNEE, PoseLandmark.RIGHT_KNEE,
+    PoseLandmark.LEFT_ANKLE, PoseLandmark.RIGHT_ANKLE,
+]
+_INDICES = np.array([landmark.value for landmark in EMBEDDING_LANDMARKS])
+
+
+def _mirror_order():
+    position = {landmark.name: i for i, landmark in enumerate(EMBEDDING_LANDMARKS)}
+    order = []
+    for landmark in EMBEDDING_LANDMARKS:
+        name = landmark.name
+        if name.startswith("LEFT_"):
+            name = "RIGHT_" + name[len("LEFT_"):]
+        elif name.startswith("RIGHT_"):
+            name = "LEFT_" + name[len("RIGHT_"):]
+        order.append(position[name])
+    return np.array(order)
+
+
+_MIRROR = _mirror_order()
+_HIPS = [EMBEDDING_LANDMARKS.index(PoseLandmark.LEFT_HIP), EMBEDDING_LANDMARKS.index(PoseLandmark.RIGHT_HIP)]
+_SHOULDERS = [EMBEDDING_LANDMARKS.index(PoseLandmark.LEFT_SHOULDER), EMBEDDING_LANDMARKS.index(PoseLandmark.RIGHT_SHOULDER)]
+
+# Torso length is scaled up so that it roughly matches the body's extent, as in
+# MediaPipe's pose classification sample.
+TORSO_SIZE_MULTIPLIER = 2.5
+
+# Reference samples fetched per requested pose by a query's first search;
+# the search widens while it finds fewer than k distinct poses, up to
+# MAX_NEIGHBOURS samples so a query never walks the whole tree.
+NEIGHBOURS_PER_POSE = 8
+MAX_NEIGHBOURS = 1024
+
+
+def pose_embedding(landmarks, mirror=False):
+    """
+    Turn landmarks into a translation- and scale-invariant pose embedding.
+
+    The body landmarks are centred on the hip midpoint and divided by the body
+    size, the larger of the scaled torso length and the farthest landmark from
+    the centre.
+
+    Parameters:
+        landmarks (np.ndarray): Array of shape (33, 4) or (N, 33, 4).
+        mirror (bool): Embed the left/right mirror image of the pose instead.
+
+    Returns:
+        np.ndarray: float32 array of shape (26,) or (N, 26).
+    """
+    pts = np.asarray(landmarks, dtype=np.float32)
+    single = pts.ndim == 2
+    if single:
+        pts = pts[np.newaxis]
+
+    xy = pts[:, _INDICES, :2]
+    if mirror:
+        xy = xy[:, _MIRROR] * np.array([-1.0, 1.0], dtype=np.float32)
+
+    center = xy[:, _HIPS].mean(axis=1, keepdims=True)
+    xy = xy - center
+    torso = np.linalg.norm(xy[:, _SHOULDERS].mean(axis=1), axis=1)
+    extent = np.linalg.norm(xy, axis=2).max(axis=1)
+    size = np.maximum(torso * TORSO_SIZE_MULTIPLIER, extent)
+    embedding = (xy / np.maximum(size, 1e-6)[:, None, None]).reshape(len(xy), -1)
+
+    return embedding[0] if single else embedding
+
+
+class PoseIndex:
+    """
+    Nearest-neighbour lookup of pose embeddings against labeled reference poses.
+
+    Every reference sample is indexed together with its mirror image, so a
+    pose done on the left side matches references recorded on the right.
+    """
+
+    def __init__(self, embeddings, label_ids, labels):
+        self.embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        self.label_ids = np.asarray(label_ids, dtype=np.int32)
+        self.labels = list(labels)
+        self.tree = cKDTree(self.embeddings)
+
+    def __len__(self):
+        return len(self.embeddings)
+
+    @classmethod
+    def build(cls, samples):
+        """
+        Build an index from labeled landmark recordings.
+
+        Parameters:
+            samples (iterable): (label, landmarks) pairs, where landmarks is an
+                array of shape (33, 4) or (N, 33, 4).
+
+        Returns:
+            PoseIndex: The index.
+        """
+        labels, embeddings, label_ids = [], [], []
+        for label, landmarks in samples:
+            if label not in labels:
+                labels.append(label)
+            pts = np.asarray(landmarks, dtype=np.float32).reshape(-1, 33, 4)
+            for mirror in (False, True):
+                embeddings.append(pose_embedding(pts, mirror=mirror))
+                label_ids.append(np.full(len(pts), labels.index(label), dtype=np.int32))
+        if not embeddings:
+            raise ValueError("Cannot build a pose index without samples")
+        return cls(np.concatenate(embeddings), np.concatenate(label_ids), labels)
+
+    @classmethod
+    def from_directory(cls, root):
+        """
+        Build an index from root/<label>/*.npy landmark recordings.
+
+        Each .npy file holds an array of shape (N, 33, 4); the name of its
+        directory is the pose label.
+        """
+        samples = []
+        for label in sorted(os.listdir(root)):
+            for path in sorted(glob.glob(os.path.join(root, label, "*.npy"))):
+                samples.append((label, np.load(path)))
+        return cls.build(samples)
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            embeddings=self.embeddings,
+            label_ids=self.label_ids,
+            labels=np.array(self.labels),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["embeddings"], data["label_ids"], data["labels"].tolist())
+
+    def query(self, landmarks, k=3):
+        """
+        Find the closest poses to a frame of landmarks.
+
+        Parameters:
+            landmarks (np.ndarray): Array of shape (33, 4).
+            k (int): Maximum number of distinct poses to return.
+
+        Returns:
+            list: Up to min(k, number of poses) (label, distance) pairs,
+                closest first. The distance of a pose is that of its nearest
+                reference sample. Poses with no sample among the nearest
+                MAX_NEIGHBOURS are left out.
+        """
+        embedding = pose_embedding(landmarks)
+        k = min(k, len(self.labels))
+        limit = min(len(self), max(MAX_NEIGHBOURS, k * NEIGHBOURS_PER_POSE))
+        neighbours = k * NEIGHBOURS_PER_POSE
+        while True:
+            # The nearest samples may all belong to a few poses with many
+            # references; search twice as far until k poses turn up
+            neighbours = min(limit, neighbours)
+            distances, indices = self.tree.query(embedding, k=neighbours)
+            label_ids = self.label_ids[np.atleast_1d(indices)]
+            matches = {}
+            for distance, label_id in zip(np.atleast_1d(distances).tolist(), label_ids.tolist()):
+                if label_id not in matches:
+                    matches[label_id] = distance
+                    if len(matches) == k:
+                        break
+            if len(matches) == k or neighbours == limit:
+                return [(self.labels[label_id], distance) for label_id, distance in matches.items()]
+            neighbours *= 2
+
+
+_index = None
+_index_loaded = False
+_index_lock = Lock()
+
+
+def get_pose_index():
+    """Return the process-wide PoseIndex loaded from Config.POSE_INDEX_PATH, or None if there is none."""
+    global _index, _index_loaded
+    with _index_lock:
+        if not _index_loaded:
+            if Config.POSE_INDEX_PATH and os.path.exists(Config.POSE_INDEX_PATH):
+                _index = PoseIndex.load(Config.POSE_INDEX_PATH)
+            _index_loaded = True
+        return _index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a reference pose index from labeled landmark recordings.")
+    parser.add_argument("recordings", help="Directory containing one sub-directory of .npy recordings per pose label")
+    parser.add_argument("-o", "--output", required=True, help="Where to write the index (.npz)")
+    args = parser.parse_args(argv)
+
+    index = PoseIndex.from_directory(args.recordings)
+    index.save(args.output)
+    print(f"Indexed {len(index)} embeddings for {len(index.labels)} poses into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
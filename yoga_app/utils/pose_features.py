@@ -0,0 +1,112 @@
+# yoga_app/utils/pose_features.py
+import numpy as np
+
+
+class PoseFeatures:
+    """
+    Geometric features of pose landmarks, computed lazily and at most once.
+
+    Pose checks read joint angles, midpoints, distances and alignment deltas
+    from this object instead of walking the landmarks themselves, so a quantity
+    shared by several checks is only computed the first time it is asked for.
+
+    The features can be built from a single frame of MediaPipe landmarks, in
+    which case every value is a scalar, or from a landmark array of shape
+    (N, 33, 4), in which case every value is a float64 array of shape (N,).
+    Landmarks are addressed by their integer index (see PoseLandmark).
+    """
+
+    def __init__(self, landmarks):
+        self.landmarks = landmarks
+        self.batched = isinstance(landmarks, np.ndarray)
+        self._points = {}
+        self._cache = {}
+
+    def point(self, index):
+        """Return the (x, y, z) coordinates of the landmark at index."""
+        point = self._points.get(index)
+        if point is None:
+            if self.batched:
+                coords = self.landmarks[:, index, :3].astype(np.float64)
+                point = (coords[:, 0], coords[:, 1], coords[:, 2])
+            else:
+                lm = self.landmarks[index]
+                point = (lm.x, lm.y, lm.z)
+            self._points[index] = point
+        return point
+
+    def visible(self, indices, threshold):
+        """Whether every landmark in indices has visibility >= threshold."""
+        if self.batched:
+            return np.all(self.landmarks[:, indices, 3] >= threshold, axis=1)
+        landmarks = self.landmarks
+        return all(landmarks[index].visibility >= threshold for index in indices)
+
+    def x(self, index):
+        point = self._points.get(index)
+        return (point or self.point(index))[0]
+
+    def y(self, index):
+        point = self._points.get(index)
+        return (point or self.point(index))[1]
+
+    def dx(self, a, b):
+        """Horizontal alignment delta |a.x - b.x|."""
+        key = ("dx", a, b) if a < b else ("dx", b, a)
+        value = self._cache.get(key)
+        if value is None:
+            value = self._cache[key] = abs(self.point(a)[0] - self.point(b)[0])
+        return value
+
+    def dy(self, a, b):
+        """Vertical alignment delta |a.y - b.y|."""
+        key = ("dy", a, b) if a < b else ("dy", b, a)
+        value = self._cache.get(key)
+        if value is None:
+            value = self._cache[key] = abs(self.point(a)[1] - self.point(b)[1])
+        return value
+
+    def mid_x(self, a, b):
+        key = ("mid_x", a, b) if a < b else ("mid_x", b, a)
+        value = self._cache.get(key)
+        if value is None:
+            value = self._cache[key] = (self.point(a)[0] + self.point(b)[0]) / 2
+        return value
+
+    def mid_y(self, a, b):
+        key = ("mid_y", a, b) if a < b else ("mid_y", b, a)
+        value = self._cache.get(key)
+        if value is None:
+            value = self._cache[key] = (self.point(a)[1] + self.point(b)[1]) / 2
+        return value
+
+    def distance(self, a, b):
+        """Euclidean distance between two landmarks in x, y and z."""
+        key = ("distance", a, b) if a < b else ("distance", b, a)
+        value = self._cache.get(key)
+        if value is None:
+            pa, pb = self.point(a), self.point(b)
+            value = self._cache[key] = (
+                (pa[0] - pb[0]) ** 2 + (pa[1] - pb[1]) ** 2 + (pa[2] - pb[2]) ** 2
+            ) ** 0.5
+        return value
+
+    def angle(self, a, b, c):
+        """
+        Angle in degrees at landmark b formed by landmarks a and c.
+
+        Matches PoseDetector.calculate_angle: the result is folded into [0, 180].
+        The angle is symmetric in a and c, so both orders share a cache slot.
+        """
+        key = ("angle", a, b, c) if a < c else ("angle", c, b, a)
+        value = self._cache.get(key)
+        if value is None:
+            pa, pb, pc = self.point(a), self.point(b), self.point(c)
+            radians = np.arctan2(pc[1] - pb[1], pc[0] - pb[0]) - np.arctan2(pa[1] - pb[1], pa[0] - pb[0])
+            value = np.abs(radians * 180.0 / np.pi)
+            if self.batched:
+                value = np.where(value > 180.0, 360 - value, value)
+            elif value > 180.0:
+                value = 360 - value
+            self._cache[key] = value
+        return value
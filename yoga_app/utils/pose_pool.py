@@ -0,0 +1,157 @@
+# yoga_app/utils/pose_pool.py
+import time
+from contextlib import contextmanager
+from threading import Condition, Lock
+
+import mediapipe as mp
+import numpy as np
+
+from yoga_app.config import Config
+
+
+class PoolExhausted(Exception):
+    """Raised when no Pose instance became free within the checkout timeout."""
+
+
+class PosePool:
+    """
+    A fixed set of pre-initialized MediaPipe Pose graphs shared by all streams.
+
+    Building a Pose graph loads the model and sets up the calculator graph,
+    which takes far longer than processing a frame. The pool pays that cost
+    once per instance; streams check an instance out, use it in tracking mode
+    and return it, at which point its tracking state is reset for the next
+    user. Instances beyond the first prebuild are built on first checkout.
+    """
+
+    def __init__(self, size, warm=False, prebuild=None, **pose_options):
+        if size < 1:
+            raise ValueError("PosePool needs at least one instance")
+        self.size = size
+        self.warm = warm
+        self.pose_options = pose_options
+        self._free = [self._create() for _ in range(size if prebuild is None else prebuild)]
+        self._built = len(self._free)
+        self._available = Condition(Lock())
+        self._stats = {
+            "checkouts": 0,
+            "waited": 0,
+            "timeouts": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "busy_seconds": 0.0,
+        }
+        self._checked_out = {}
+        self._created = time.monotonic()
+
+    def _create(self):
+        pose = mp.solutions.pose.Pose(**self.pose_options)
+        if self.warm:
+            # The first frame through a graph allocates its buffers
+            pose.process(np.zeros((Config.CAMERA_HEIGHT, Config.CAMERA_WIDTH, 3), dtype=np.uint8))
+            pose.reset()
+        return pose
+
+    def checkout(self, timeout=None):
+        """
+        Take a Pose instance out of the pool, waiting for one if all are in use.
+
+        Parameters:
+            timeout (float): Seconds to wait; None waits forever, 0 never waits.
+
+        Returns:
+            The Pose instance. Give it back with checkin().
+        """
+        started = time.monotonic()
+        pose = None
+        with self._available:
+            if not self._free and self._built < self.size:
+                self._built += 1
+            else:
+                if not self._free:
+                    self._stats["waited"] += 1
+                    if not self._available.wait_for(lambda: self._free, timeout):
+                        self._stats["timeouts"] += 1
+                        raise PoolExhausted(f"All {self.size} pose graphs are in use")
+                pose = self._free.pop()
+        if pose is None:
+            # Build outside the lock so returning instances isn't held up
+            try:
+                pose = self._create()
+            except Exception:
+                with self._available:
+                    self._built -= 1
+                raise
+        with self._available:
+            now = time.monotonic()
+            wait = now - started
+            self._stats["checkouts"] += 1
+            self._stats["wait_seconds"] += wait
+            self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], wait)
+            self._checked_out[id(pose)] = now
+            return pose
+
+    def checkin(self, pose):
+        """Reset a Pose instance's tracking state and return it to the pool."""
+        pose.reset()
+        with self._available:
+            self._stats["busy_seconds"] += time.monotonic() - self._checked_out.pop(id(pose))
+            self._free.append(pose)
+            self._available.notify()
+
+    @contextmanager
+    def pose(self, timeout=None):
+        """Check out a Pose instance for the duration of a with block."""
+        pose = self.checkout(timeout)
+        try:
+            yield pose
+        finally:
+            self.checkin(pose)
+
+    def get_stats(self):
+        """
+        Return the pool's counters.
+
+        Returns:
+            dict: Pool size, instances in use, checkouts, checkouts that had
+                to wait ("waited") or gave up ("timeouts"), total and maximum
+                wait in seconds, and utilization: the fraction of instance time
+                spent checked out since the pool was built.
+        """
+        with self._available:
+            now = time.monotonic()
+            stats = dict(self._stats)
+            busy = stats["busy_seconds"] + sum(now - since for since in self._checked_out.values())
+            stats["size"] = self.size
+            stats["built"] = self._built
+            stats["in_use"] = len(self._checked_out)
+            stats["utilization"] = busy / (self.size * max(now - self._created, 1e-9))
+            return stats
+
+
+_pools = {}
+_pool_lock = Lock()
+
+
+def get_pose_pool(model_complexity=None):
+    """
+    Return the process-wide pool for a model complexity, creating it on first use.
+
+    The pool for Config.MODEL_COMPLEXITY builds all of its instances up front;
+    pools for other complexities, used when the quality controller switches
+    models, build theirs as they are checked out.
+    """
+    if model_complexity is None:
+        model_complexity = Config.MODEL_COMPLEXITY
+    with _pool_lock:
+        pool = _pools.get(model_complexity)
+        if pool is None:
+            pool = _pools[model_complexity] = PosePool(
+                Config.POSE_POOL_SIZE,
+                warm=Config.POSE_POOL_WARM,
+                prebuild=None if model_complexity == Config.MODEL_COMPLEXITY else 0,
+                min_detection_confidence=Config.MIN_DETECTION_CONFIDENCE,
+                min_tracking_confidence=Config.MIN_TRACKING_CONFIDENCE,
+                model_complexity=model_complexity
+            )
+        return pool
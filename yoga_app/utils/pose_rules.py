@@ -0,0 +1,308 @@
+# yoga_app/utils/pose_rules.py
+import glob
+import json
+import operator
+import os
+import time
+from threading import Lock
+
+import mediapipe as mp
+
+from yoga_app.utils.pose_features import PoseFeatures
+
+LANDMARK_INDEX = {landmark.name: landmark.value for landmark in mp.solutions.pose.PoseLandmark}
+
+COMPARISONS = {
+    "lt": operator.lt,
+    "le": operator.le,
+    "gt": operator.gt,
+    "ge": operator.ge,
+}
+
+# Feature operands and the number of landmarks each one takes. They map one to
+# one onto PoseFeatures methods, so rules share the per-frame feature cache.
+FEATURES = {
+    "dx": 2,
+    "dy": 2,
+    "mid_x": 2,
+    "mid_y": 2,
+    "distance": 2,
+    "angle": 3,
+}
+
+AXES = {"x": 0, "y": 1, "z": 2}
+
+
+class RuleError(ValueError):
+    """Raised when a pose rule file cannot be parsed or compiled."""
+
+
+class PoseRule:
+    """
+    A pose rule compiled from its JSON definition.
+
+    Calling the rule with PoseFeatures returns whether the pose matches. The
+    same rule works on a single frame (returns a bool) and on a batch of
+    frames (returns a boolean array of shape (N,)).
+    """
+
+    def __init__(self, name, orientations, landmarks, min_visibility, predicate, source):
+        self.name = name
+        self.orientations = orientations
+        self.landmarks = landmarks
+        self.min_visibility = min_visibility
+        self.predicate = predicate
+        self.source = source
+
+    def is_visible(self, features):
+        return features.visible(self.landmarks, self.min_visibility)
+
+    def __call__(self, features):
+        return self.predicate(features)
+
+    def __repr__(self):
+        return f"PoseRule({self.name!r}, source={self.source!r})"
+
+
+def _landmark(name, allowed, where):
+    if name not in LANDMARK_INDEX:
+        raise RuleError(f"{where}: unknown landmark {name!r}")
+    if name not in allowed:
+        raise RuleError(f"{where}: landmark {name!r} is not listed in the rule's landmarks")
+    return LANDMARK_INDEX[name]
+
+
+def _compile_operand(spec, allowed, where):
+    """Compile a number, "LANDMARK.axis" string or feature object to a callable."""
+    if isinstance(spec, bool):
+        raise RuleError(f"{where}: invalid operand {spec!r}")
+    if isinstance(spec, (int, float)):
+        return lambda f: spec
+
+    if isinstance(spec, str):
+        name, _, axis = spec.partition(".")
+        if axis not in AXES:
+            raise RuleError(f"{where}: expected LANDMARK.x, .y or .z, got {spec!r}")
+        index, column = _landmark(name, allowed, where), AXES[axis]
+        return lambda f: f.point(index)[column]
+
+    if isinstance(spec, dict) and len(spec) == 1:
+        (kind, args), = spec.items()
+        if kind == "abs_diff":
+            if not isinstance(args, list) or len(args) != 2:
+                raise RuleError(f"{where}: abs_diff takes two operands")
+            a, b = (_compile_operand(arg, allowed, where) for arg in args)
+            return lambda f: abs(a(f) - b(f))
+        if kind in FEATURES:
+            if not isinstance(args, list) or len(args) != FEATURES[kind]:
+                raise RuleError(f"{where}: {kind} takes {FEATURES[kind]} landmarks")
+            indices = [_landmark(name, allowed, where) for name in args]
+            method = getattr(PoseFeatures, kind)
+            return lambda f: method(f, *indices)
+
+    raise RuleError(f"{where}: invalid operand {spec!r}")
+
+
+def _compile_condition(spec, allowed, where):
+    """Compile a condition object to a predicate over PoseFeatures."""
+    if not isinstance(spec, dict) or len(spec) != 1:
+        raise RuleError(f"{where}: a condition must be an object with a single key, got {spec!r}")
+    (kind, args), = spec.items()
+    if not isinstance(args, list):
+        raise RuleError(f"{where}: arguments of {kind!r} must be a list")
+
+    if kind in ("all", "any"):
+        if not args:
+            raise RuleError(f"{where}: {kind!r} needs at least one condition")
+        children = [_compile_condition(child, allowed, where) for child in args]
+        return _all_of(children) if kind == "all" else _any_of(children)
+
+    if kind in COMPARISONS:
+        if len(args) != 2:
+            raise RuleError(f"{where}: {kind!r} takes two operands")
+        compare = COMPARISONS[kind]
+        a, b = (_compile_operand(arg, allowed, where) for arg in args)
+        return lambda f: compare(a(f), b(f))
+
+    if kind == "between":
+        if len(args) != 3:
+            raise RuleError(f"{where}: 'between' takes a value, a lower and an upper bound")
+        value, low, high = (_compile_operand(arg, allowed, where) for arg in args)
+
+        def between(f):
+            v = value(f)
+            return (low(f) < v) & (v < high(f))
+        return between
+
+    raise RuleError(f"{where}: unknown condition {kind!r}")
+
+
+def _all_of(children):
+    def predicate(f):
+        result = children[0](f)
+        for child in children[1:]:
+            # Single frames short-circuit; batches combine element-wise.
+            if not f.batched and not result:
+                return result
+            result = result & child(f)
+        return result
+    return predicate
+
+
+def _any_of(children):
+    def predicate(f):
+        result = children[0](f)
+        for child in children[1:]:
+            if not f.batched and result:
+                return result
+            result = result | child(f)
+        return result
+    return predicate
+
+
+def compile_rule(spec, source="<rule>", min_visibility=0.5, orientations=()):
+    """
+    Compile one rule definition into a PoseRule.
+
+    Parameters:
+        spec (dict): The rule, with "name", "landmarks", "all" and optionally
+            "orientations" and "min_visibility".
+        source (str): Where the rule came from, used in error messages.
+        min_visibility (float): Default visibility threshold for the rule's landmarks.
+        orientations (tuple): Allowed orientation names; empty allows any.
+
+    Returns:
+        PoseRule: The compiled rule.
+    """
+    if not isinstance(spec, dict) or not isinstance(spec.get("name"), str):
+        raise RuleError(f"{source}: every rule needs a string 'name'")
+    where = f"{source}: rule {spec['name']!r}"
+
+    landmarks = spec.get("landmarks")
+    if not isinstance(landmarks, list) or not landmarks:
+        raise RuleError(f"{where}: 'landmarks' must list the landmarks the rule uses")
+    for name in landmarks:
+        if name not in LANDMARK_INDEX:
+            raise RuleError(f"{where}: unknown landmark {name!r}")
+
+    rule_orientations = tuple(spec.get("orientations", orientations))
+    unknown = [o for o in rule_orientations if orientations and o not in orientations]
+    if unknown:
+        raise RuleError(f"{where}: unknown orientations {unknown}")
+
+    conditions = spec.get("all")
+    if not isinstance(conditions, list) or not conditions:
+        raise RuleError(f"{where}: 'all' must be a non-empty list of conditions")
+
+    return PoseRule(
+        name=spec["name"],
+        orientations=rule_orientations or tuple(orientations),
+        landmarks=[LANDMARK_INDEX[name] for name in landmarks],
+        min_visibility=float(spec.get("min_visibility", min_visibility)),
+        predicate=_compile_condition({"all": conditions}, set(landmarks), where),
+        source=source,
+    )
+
+
+def load_rule_file(path, min_visibility=0.5, orientations=()):
+    """Load and compile every rule in a JSON file holding a list of rules."""
+    try:
+        with open(path) as rule_file:
+            specs = json.load(rule_file)
+    except (OSError, json.JSONDecodeError) as e:
+        raise RuleError(f"{path}: {e}") from e
+    if isinstance(specs, dict):
+        specs = [specs]
+    if not isinstance(specs, list):
+        raise RuleError(f"{path}: expected a rule object or a list of rules")
+    return [compile_rule(spec, path, min_visibility, orientations) for spec in specs]
+
+
+class RuleEngine:
+    """
+    Pose rules loaded from JSON files in one or more directories.
+
+    Files are read in directory order and alphabetically within a directory.
+    A rule whose name was already defined replaces the earlier definition in
+    place, so later directories can override built-in rules.
+
+    Rule files are checked for changes at most every reload_interval seconds
+    (None disables hot reloading). A file that fails to compile is reported
+    and the previously loaded rules stay active.
+    """
+
+    def __init__(self, rule_dirs, min_visibility=0.5, reload_interval=None, orientations=()):
+        self.rule_dirs = list(rule_dirs)
+        self.min_visibility = min_visibility
+        self.reload_interval = reload_interval
+        self.orientations = tuple(orientations)
+        self._reload_lock = Lock()
+        self._next_check = 0.0
+        self._mtimes = {}
+        self._install(self._load())
+
+    @property
+    def rules(self):
+        return self._snapshot[0]
+
+    @property
+    def names(self):
+        return [rule.name for rule in self.rules]
+
+    def rules_for(self, orientation):
+        """Rules registered for an orientation, in catalog order."""
+        self.reload_if_changed()
+        rules, groups = self._snapshot
+        return groups.get(orientation, rules)
+
+    def reload_if_changed(self):
+        """Reload the rules if any rule file was added, removed or modified."""
+        if self.reload_interval is None:
+            return False
+        now = time.monotonic()
+        if now < self._next_check or not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            self._next_check = now + self.reload_interval
+            mtimes = self._scan()
+            if mtimes == self._mtimes:
+                return False
+            try:
+                self._install(self._load())
+            except RuleError as e:
+                print(f"Error reloading pose rules: {e}")
+                # Don't retry until the files change again
+                self._mtimes = mtimes
+                return False
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def _scan(self):
+        mtimes = {}
+        for rule_dir in self.rule_dirs:
+            for path in sorted(glob.glob(os.path.join(rule_dir, "*.json"))):
+                try:
+                    mtimes[path] = os.stat(path).st_mtime_ns
+                except OSError:
+                    continue
+        return mtimes
+
+    def _load(self):
+        mtimes = self._scan()
+        rules = {}
+        for path in mtimes:
+            for rule in load_rule_file(path, self.min_visibility, self.orientations):
+                rules[rule.name] = rule
+        return mtimes, tuple(rules.values())
+
+    def _install(self, loaded):
+        mtimes, rules = loaded
+        groups = {
+            orientation: tuple(rule for rule in rules if orientation in rule.orientations)
+            for orientation in self.orientations
+        }
+        # Publish rules and groups as one tuple so readers on other threads
+        # never see a mix of two loads.
+        self._snapshot = (rules, groups)
+        self._mtimes = mtimes
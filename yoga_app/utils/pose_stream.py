@@ -0,0 +1,84 @@
+# yoga_app/utils/pose_stream.py
+import base64
+import json
+
+import numpy as np
+
+# Delta frames carry landmark changes as int8 multiples of 1 / DELTA_SCALE,
+# i.e. steps of about half a pixel on a 640 pixel wide frame. A change too
+# large to fit falls back to a key frame.
+DELTA_SCALE = 1024
+DELTA_LIMIT = 127
+
+
+class PoseStreamEncoder:
+    """
+    Encode pose results as compact Server-Sent Events for one client.
+
+    Landmarks travel as base64 of a little-endian (33, 4) array of x, y, z and
+    visibility. Key frames ("k": 1) hold float16 values. With delta=True, the
+    following frames hold int8 differences from the client's previous values
+    ("k": 0), which the client adds to its copy; the encoder tracks the values
+    the client reconstructs so rounding errors never accumulate.
+
+    In multi-person mode, "people" lists every tracked person with their
+    track ID, poses and landmarks, always as float16 key frames; the
+    top-level fields repeat the person with the lowest track ID.
+
+    With a reference pose index installed, "nearest" lists the closest
+    reference poses as [name, distance] pairs.
+    """
+
+    def __init__(self, delta=False):
+        self.delta = delta
+        self._previous = None
+
+    def encode(self, frame_id, timestamp, landmarks, poses, people=None, nearest=None):
+        """
+        Encode one pose result as an SSE message.
+
+        Parameters:
+            frame_id (int): Sequence number of the frame.
+            timestamp (float): Capture time in seconds since the epoch.
+            landmarks (np.ndarray): Array of shape (33, 4), or None when no
+                body was detected.
+            poses (list): Names of the detected poses.
+            people (list): (track ID, landmarks, poses) of each person in
+                multi-person mode, None otherwise.
+            nearest (list): (pose name, distance) pairs from
+                PoseDetector.nearest_poses, or None to leave them out.
+
+        Returns:
+            bytes: The event, ready to be written to the response.
+        """
+        message = {"id": frame_id, "t": round(timestamp, 3), "poses": poses or []}
+        if landmarks is None:
+            self._previous = None
+            message["landmarks"] = None
+        else:
+            message["k"], data = self._encode_landmarks(np.asarray(landmarks, dtype=np.float64))
+            message["landmarks"] = base64.b64encode(data).decode("ascii")
+        if people is not None:
+            message["people"] = [
+                {
+                    "id": int(track_id),
+                    "poses": person_poses or [],
+                    "landmarks": base64.b64encode(np.asarray(person, dtype="<f2").tobytes()).decode("ascii"),
+                }
+                for track_id, person, person_poses in people
+            ]
+        if nearest is not None:
+            message["nearest"] = [[name, round(distance, 4)] for name, distance in nearest]
+        return b"event: pose\ndata: " + json.dumps(message, separators=(",", ":")).encode() + b"\n\n"
+
+    def _encode_landmarks(self, landmarks):
+        if self.delta and self._previous is not None:
+            steps = np.rint((landmarks - self._previous) * DELTA_SCALE)
+            if np.abs(steps).max() <= DELTA_LIMIT:
+                steps = steps.astype(np.int8)
+                self._previous = self._previous + steps / DELTA_SCALE
+                return 0, steps.tobytes()
+
+        values = landmarks.astype("<f2")
+        self._previous = values.astype(np.float64)
+        return 1, values.tobytes()
@@ -0,0 +1,255 @@
+# yoga_app/utils/practice_log.py
+import atexit
+import itertools
+import sys
+import time
+from datetime import datetime, timezone
+from threading import Event, Lock, Thread
+
+from sqlalchemy import event, insert, update
+
+from yoga_app.config import Config
+from yoga_app.models import PoseEvent, PracticeSession, db
+from yoga_app.utils.pipeline import DropQueue
+
+
+def _utc(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in Config.SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def configure_sqlite(engine):
+    """Apply Config.SQLITE_PRAGMAS to every new connection of a SQLite engine."""
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+
+
+class _OpenSession:
+    """Writer-side state of a practice session: its database id and the holds in progress."""
+
+    def __init__(self, key, user_id, source, started_at):
+        self.key = key
+        self.user_id = user_id
+        self.source = source
+        self.started_at = started_at
+        self.ended_at = None
+        self.db_id = None
+        self.frames = 0
+        # pose -> [first seen, last seen, frames]
+        self.holds = {}
+
+
+class PracticeLog:
+    """
+    Persists practice sessions and the asanas held in them, off the request and camera threads.
+
+    Callers only queue messages: start_session(), record() once per analyzed
+    frame and end_session(). A background thread coalesces the per-frame
+    detections of each session into hold intervals: a pose counts as held
+    until it has been missing for Config.PRACTICE_HOLD_GAP seconds, and holds
+    shorter than Config.PRACTICE_MIN_HOLD_SECONDS are discarded as flicker.
+    Finished holds become PoseEvent rows, written together with new and
+    ended PracticeSession rows in one transaction per batch, at most every
+    Config.PRACTICE_FLUSH_INTERVAL seconds or Config.PRACTICE_BATCH_SIZE rows.
+    When the writer falls behind, frames beyond Config.PRACTICE_MAX_PENDING
+    are dropped; session starts and ends never are.
+
+    Like db, the log is bound to the app with init_app(); until then every
+    call is a no-op, so the camera pipeline also runs without an app.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._queue = None
+        self._thread = None
+        self._keys = itertools.count(1)
+        self._stats_lock = Lock()
+        self._stats = {"sessions": 0, "events": 0, "batches": 0, "failed_batches": 0}
+        self._pending_frames = 0
+        self._dropped_frames = 0
+
+    def init_app(self, app):
+        self.app = app
+        with app.app_context():
+            configure_sqlite(db.engine)
+        if self._thread is None:
+            # Unbounded and in order: losing a start or end would lose a whole
+            # session, so only record() drops, and only frames
+            self._queue = DropQueue(sys.maxsize)
+            self._thread = Thread(target=self._write_loop, name="practice-log", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def start_session(self, source, user_id=None):
+        """
+        Begin a practice session.
+
+        Returns:
+            The key to pass to record() and end_session(), or None while no
+            app is bound.
+        """
+        if self._queue is None:
+            return None
+        key = next(self._keys)
+        self._queue.put(("start", key, time.time(), (user_id, source)))
+        return key
+
+    def record(self, key, timestamp, poses):
+        """Queue the poses detected in one frame of a session, unless Config.PRACTICE_MAX_PENDING are queued."""
+        if key is None:
+            return
+        with self._stats_lock:
+            if self._pending_frames >= Config.PRACTICE_MAX_PENDING:
+                self._dropped_frames += 1
+                return
+            self._pending_frames += 1
+        self._queue.put(("frame", key, timestamp, tuple(poses or ())))
+
+    def end_session(self, key):
+        if key is not None:
+            self._queue.put(("end", key, time.time(), None))
+
+    def flush(self, timeout=Config.PRACTICE_FLUSH_TIMEOUT):
+        """Wait until everything queued so far is committed. Returns False on timeout."""
+        if self._queue is None:
+            return True
+        done = Event()
+        self._queue.put(("flush", None, None, done))
+        return done.wait(timeout)
+
+    def close(self):
+        """End every open session, write what is queued and stop the writer."""
+        if self._queue is not None:
+            self._queue.close()
+            self._thread.join()
+
+    def get_stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats["dropped"] = self._dropped_frames
+        stats["pending"] = self._queue.stats()["depth"] if self._queue is not None else 0
+        return stats
+
+    def _write_loop(self):
+        sessions = {}
+        new, ended, events, waiting = [], [], [], []
+        last_commit = time.monotonic()
+        while True:
+            item = self._queue.get(timeout=Config.PRACTICE_FLUSH_INTERVAL)
+            closing = item is None and self._queue.closed
+            if item is not None:
+                kind, key, timestamp, value = item
+                if kind == "frame":
+                    with self._stats_lock:
+                        self._pending_frames -= 1
+                if kind == "flush":
+                    waiting.append(value)
+                elif kind == "start":
+                    session = sessions[key] = _OpenSession(key, value[0], value[1], timestamp)
+                    new.append(session)
+                elif key in sessions:
+                    session = sessions[key]
+                    if kind == "frame":
+                        self._track(session, timestamp, value, events)
+                    else:
+                        self._end(session, timestamp, events)
+                        ended.append(session)
+                        del sessions[key]
+            if closing:
+                for session in sessions.values():
+                    self._end(session, time.time(), events)
+                    ended.append(session)
+
+            due = time.monotonic() - last_commit >= Config.PRACTICE_FLUSH_INTERVAL
+            if closing or waiting or len(events) >= Config.PRACTICE_BATCH_SIZE or (due and (new or ended or events)):
+                if new or ended or events:
+                    self._commit(new, ended, events)
+                new, ended, events = [], [], []
+                last_commit = time.monotonic()
+                for done in waiting:
+                    done.set()
+                waiting = []
+            if closing:
+                break
+
+    def _track(self, session, timestamp, poses, events):
+        session.frames += 1
+        for pose in poses:
+            hold = session.holds.get(pose)
+            if hold is None:
+                session.holds[pose] = [timestamp, timestamp, 1]
+            else:
+                hold[1] = timestamp
+                hold[2] += 1
+        for pose, hold in list(session.holds.items()):
+            if timestamp - hold[1] > Config.PRACTICE_HOLD_GAP:
+                self._finish_hold(session, pose, events)
+
+    def _end(self, session, timestamp, events):
+        for pose in list(session.holds):
+            self._finish_hold(session, pose, events)
+        session.ended_at = timestamp
+
+    def _finish_hold(self, session, pose, events):
+        started, last_seen, frames = session.holds.pop(pose)
+        if last_seen - started >= Config.PRACTICE_MIN_HOLD_SECONDS:
+            events.append((session, pose, started, last_seen, frames))
+
+    def _commit(self, new, ended, events):
+        with self.app.app_context():
+            try:
+                rows = {}
+                for session in new:
+                    rows[session.key] = PracticeSession(
+                        user_id=session.user_id,
+                        source=session.source,
+                        started_at=_utc(session.started_at),
+                    )
+                db.session.add_all(rows.values())
+                # Assigns the ids the events refer to
+                db.session.flush()
+                for session in new:
+                    session.db_id = rows[session.key].id
+                # Sessions whose row was lost in a failed batch can't take events
+                ended = [session for session in ended if session.db_id is not None]
+                events = [item for item in events if item[0].db_id is not None]
+                for session in ended:
+                    db.session.execute(
+                        update(PracticeSession).where(PracticeSession.id == session.db_id).values(
+                            ended_at=_utc(session.ended_at), frames=session.frames
+                        )
+                    )
+                if events:
+                    db.session.execute(insert(PoseEvent), [
+                        {
+                            "session_id": session.db_id,
+                            "user_id": session.user_id,
+                            "pose": pose,
+                            "started_at": _utc(started),
+                            "ended_at": _utc(last_seen),
+                            "duration_seconds": last_seen - started,
+                            "frames": frames,
+                        }
+                        for session, pose, started, last_seen, frames in events
+                    ])
+                db.session.commit()
+                with self._stats_lock:
+                    self._stats["sessions"] += len(new)
+                    self._stats["events"] += len(events)
+                    self._stats["batches"] += 1
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error saving practice sessions: {e}")
+                with self._stats_lock:
+                    self._stats["failed_batches"] += 1
+            finally:
+                db.session.remove()
+
+
+practice_log = PracticeLog()
@@ -0,0 +1,166 @@
+# yoga_app/utils/quality.py
+import time
+from collections import deque
+from threading import Lock
+
+
+class QualityController:
+    """
+    Picks the pose model complexity and inference resolution from a latency budget.
+
+    levels is a ladder of (model_complexity, width) pairs from best to
+    cheapest. The controller keeps an exponential moving average of the
+    per-frame inference latency. When the average exceeds the target frame
+    time it steps one level down the ladder; when it falls below
+    upgrade_ratio * target it steps one level up. After any switch it waits
+    cooldown_frames frames before switching again, so the measurement
+    reflects the new setting, and the gap between the two thresholds keeps
+    it from oscillating between neighbouring levels.
+
+    While auto is off the level only changes through set_level(). Levels
+    whose model could not be loaded are skipped once reported through
+    mark_unavailable().
+    """
+
+    def __init__(self, levels, target_ms, start_level=0, upgrade_ratio=0.6,
+                 cooldown_frames=30, smoothing=0.1, auto=True, history=100):
+        if not levels:
+            raise ValueError("QualityController needs at least one level")
+        self.levels = [tuple(level) for level in levels]
+        self.target_ms = target_ms
+        self.upgrade_ratio = upgrade_ratio
+        self.cooldown_frames = cooldown_frames
+        self.smoothing = smoothing
+        self.auto = auto
+        self.level = self._check_level(start_level)
+        self.events = deque(maxlen=history)
+        self._latency_ms = None
+        self._frames_since_switch = 0
+        self._unavailable = set()
+        self._lock = Lock()
+
+    @property
+    def model_complexity(self):
+        return self.levels[self.level][0]
+
+    @property
+    def width(self):
+        return self.levels[self.level][1]
+
+    def record(self, latency):
+        """
+        Feed the inference latency of one frame and adapt the level.
+
+        Parameters:
+            latency (float): Seconds spent on inference for the frame.
+
+        Returns:
+            bool: True if the level changed.
+        """
+        with self._lock:
+            latency_ms = latency * 1000.0
+            if self._latency_ms is None:
+                self._latency_ms = latency_ms
+            else:
+                self._latency_ms += self.smoothing * (latency_ms - self._latency_ms)
+            self._frames_since_switch += 1
+
+            if not self.auto or self._frames_since_switch < self.cooldown_frames:
+                return False
+            if self._latency_ms > self.target_ms:
+                level = self._next_level(1)
+                if level is not None:
+                    self._switch(level, "over budget")
+                    return True
+            elif self._latency_ms < self.target_ms * self.upgrade_ratio:
+                level = self._next_level(-1)
+                if level is not None:
+                    self._switch(level, "under budget")
+                    return True
+            return False
+
+    def mark_unavailable(self, model_complexity, fallback_complexity):
+        """
+        Stop using a model complexity that failed to load.
+
+        The controller moves to the level closest to the current one that
+        uses fallback_complexity, the model still in use.
+        """
+        with self._lock:
+            self._unavailable.add(model_complexity)
+            candidates = [i for i, level in enumerate(self.levels) if level[0] == fallback_complexity]
+            if candidates:
+                fallback = min(candidates, key=lambda i: abs(i - self.level))
+                if fallback != self.level:
+                    self._switch(fallback, f"model complexity {model_complexity} unavailable")
+
+    def set_level(self, level=None, auto=None):
+        """
+        Change the level and/or turn adaptation on or off, e.g. from the admin endpoint.
+
+        Raises:
+            ValueError: If level isn't an index into the levels or auto isn't a bool.
+        """
+        if auto is not None and not isinstance(auto, bool):
+            raise ValueError("Auto must be true or false")
+        with self._lock:
+            if level is not None:
+                self._check_level(level)
+            if auto is not None:
+                self.auto = auto
+            if level is not None and level != self.level:
+                # An explicit choice gets another attempt at loading the model
+                self._unavailable.discard(self.levels[level][0])
+                self._switch(level, "manual")
+
+    def get_state(self):
+        """
+        Return the current settings and recent switch events.
+
+        Returns:
+            dict: Current level with its model complexity and width, whether
+                adaptation is on, smoothed latency and target in ms, the
+                ladder of levels and up to `history` switch events, oldest first.
+        """
+        with self._lock:
+            return {
+                "level": self.level,
+                "model_complexity": self.model_complexity,
+                "width": self.width,
+                "auto": self.auto,
+                "latency_ms": self._latency_ms,
+                "target_ms": self.target_ms,
+                "levels": [list(level) for level in self.levels],
+                "events": list(self.events),
+            }
+
+    def _next_level(self, step):
+        # Called with self._lock held
+        level = self.level + step
+        while 0 <= level < len(self.levels):
+            if self.levels[level][0] not in self._unavailable:
+                return level
+            level += step
+        return None
+
+    def _check_level(self, level):
+        # bool is an int, but true/false aren't levels
+        if isinstance(level, bool) or not isinstance(level, int) or not 0 <= level < len(self.levels):
+            raise ValueError(f"Level must be an integer between 0 and {len(self.levels) - 1}")
+        return level
+
+    def _switch(self, level, reason):
+        # Called with self._lock held
+        self.events.append({
+            "time": time.time(),
+            "from": self.level,
+            "to": level,
+            "model_complexity": self.levels[level][0],
+            "width": self.levels[level][1],
+            "latency_ms": self._latency_ms,
+            "reason": reason,
+        })
+        self.level = level
+        self._frames_since_switch = 0
+        # Start measuring the new level from scratch
+        self._latency_ms = None
@@ -0,0 +1,119 @@
+# yoga_app/utils/roi.py
+import numpy as np
+
+from yoga_app.utils.pose_detection import L
+
+# Landmarks whose visibility decides whether the person is still tracked
+TORSO_LANDMARKS = [L.LEFT_SHOULDER, L.RIGHT_SHOULDER, L.LEFT_HIP, L.RIGHT_HIP]
+
+
+def remap_landmarks(pose_landmarks, box, frame_shape):
+    """
+    Map landmarks found in a crop back to full-frame normalized coordinates, in place.
+
+    Parameters:
+        pose_landmarks: MediaPipe landmarks found in the crop.
+        box (tuple): The crop as (x0, y0, x1, y1) in pixels, or None for the full frame.
+        frame_shape (tuple): Shape of the full frame.
+    """
+    if box is None:
+        return
+    height, width = frame_shape[:2]
+    x0, y0, x1, y1 = box
+    scale_x, scale_y = (x1 - x0) / width, (y1 - y0) / height
+    offset_x, offset_y = x0 / width, y0 / height
+    for lm in pose_landmarks.landmark:
+        lm.x = lm.x * scale_x + offset_x
+        lm.y = lm.y * scale_y + offset_y
+        # z uses roughly the same scale as x
+        lm.z = lm.z * scale_x
+
+
+class RoiTracker:
+    """
+    Crops inference input to a padded square around the person found in earlier frames.
+
+    After a frame with a confidently tracked person, the bounding box of the
+    visible landmarks is padded by `padding` times its size on every side and
+    squared off; the next frames are cropped to that region before inference.
+    The region only moves when the person gets close to its edge, so the
+    model sees a stable image between moves. Landmarks found in the crop are
+    mapped back to full-frame normalized coordinates with remap().
+
+    Without landmarks, or when the mean visibility of the torso landmarks
+    drops below min_visibility, the next frame uses the full frame again.
+    Regions covering more than max_area_ratio of the frame aren't worth
+    cropping and also use the full frame.
+    """
+
+    def __init__(self, padding=0.5, min_visibility=0.5, max_area_ratio=0.7):
+        self.padding = padding
+        self.min_visibility = min_visibility
+        self.max_area_ratio = max_area_ratio
+        self.box = None
+        self.cropped = 0
+        self.full = 0
+        self.fallbacks = 0
+
+    def crop(self, frame):
+        """
+        Return the part of a frame to run inference on.
+
+        Returns:
+            tuple: (image, box), where box is (x0, y0, x1, y1) in pixels, or
+                None when the image is the full frame.
+        """
+        box = self.box
+        if box is None:
+            self.full += 1
+            return frame, None
+        x0, y0, x1, y1 = box
+        self.cropped += 1
+        return frame[y0:y1, x0:x1], box
+
+    def remap(self, pose_landmarks, box, frame_shape):
+        """Map landmarks found in a crop back to full-frame normalized coordinates, in place."""
+        remap_landmarks(pose_landmarks, box, frame_shape)
+
+    def update(self, landmarks, frame_shape):
+        """
+        Pick the region for the next frame.
+
+        Parameters:
+            landmarks (np.ndarray): Full-frame landmarks of shape (33, 4) from
+                the last inference, or None if nobody was found.
+            frame_shape (tuple): Shape of the full frame.
+        """
+        if landmarks is None or landmarks[TORSO_LANDMARKS, 3].mean() < self.min_visibility:
+            if self.box is not None:
+                self.fallbacks += 1
+            self.box = None
+            return
+
+        height, width = frame_shape[:2]
+        visible = landmarks[landmarks[:, 3] >= self.min_visibility]
+        if len(visible) == 0:
+            visible = landmarks
+        x_min, y_min = visible[:, 0].min() * width, visible[:, 1].min() * height
+        x_max, y_max = visible[:, 0].max() * width, visible[:, 1].max() * height
+
+        if self.box is not None:
+            # Keep the region while the person stays clear of its edges
+            x0, y0, x1, y1 = self.box
+            margin = self.padding / 2 * max(x_max - x_min, y_max - y_min)
+            if (x_min - margin >= x0 and y_min - margin >= y0 and
+                    x_max + margin <= x1 and y_max + margin <= y1):
+                return
+
+        size = max(x_max - x_min, y_max - y_min) * (1 + 2 * self.padding)
+        side_x, side_y = min(size, width), min(size, height)
+        if side_x * side_y > self.max_area_ratio * width * height:
+            self.box = None
+            return
+        center_x, center_y = (x_min + x_max) / 2, (y_min + y_max) / 2
+        x0 = int(np.clip(center_x - side_x / 2, 0, width - side_x))
+        y0 = int(np.clip(center_y - side_y / 2, 0, height - side_y))
+        self.box = (x0, y0, x0 + int(side_x), y0 + int(side_y))
+
+    def get_stats(self):
+        return {"cropped": self.cropped, "full": self.full, "fallbacks": self.fallbacks}
@@ -0,0 +1,82 @@
+# yoga_app/utils/scheduler.py
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from threading import Condition
+
+
+class FairScheduler:
+    """
+    Shares a fixed number of concurrent inference slots between cameras.
+
+    A camera holds a slot while it runs inference on one frame. With more
+    cameras waiting than slots free, the camera whose last turn is oldest
+    goes next, so each camera gets an equal share of the capacity instead
+    of the fastest thread taking most of it. Frames a camera captures while
+    it waits are dropped by its pipeline queue, so an oversubscribed host
+    lowers every camera's frame rate evenly.
+    """
+
+    def __init__(self, slots):
+        if slots < 1:
+            raise ValueError("FairScheduler needs at least one slot")
+        self.slots = slots
+        self._free = slots
+        self._waiting = []
+        self._cond = Condition()
+        self._last_turn = {}
+        self._turns = defaultdict(int)
+        self._wait_seconds = defaultdict(float)
+
+    @contextmanager
+    def slot(self, client):
+        """
+        Hold an inference slot for client for the duration of the block.
+
+        Parameters:
+            client: Key of the caller, e.g. a camera ID; one caller per key at a time.
+        """
+        started = time.monotonic()
+        with self._cond:
+            self._waiting.append(client)
+            while not (self._free and self._next() == client):
+                self._cond.wait()
+            self._waiting.remove(client)
+            self._free -= 1
+            self._turns[client] += 1
+            self._last_turn[client] = time.monotonic()
+            self._wait_seconds[client] += self._last_turn[client] - started
+            # Another slot may still be free for the next waiting client
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._free += 1
+                self._cond.notify_all()
+
+    def get_stats(self):
+        """
+        Return slot usage and per-client turns.
+
+        Returns:
+            dict: "slots", "busy" and "waiting" counts, and for each client
+                ("clients") its turns and mean wait before a turn in ms.
+        """
+        with self._cond:
+            return {
+                "slots": self.slots,
+                "busy": self.slots - self._free,
+                "waiting": len(self._waiting),
+                "clients": {
+                    str(client): {
+                        "turns": turns,
+                        "mean_wait_ms": round(self._wait_seconds[client] / turns * 1000.0, 2),
+                    }
+                    for client, turns in self._turns.items()
+                },
+            }
+
+    def _next(self):
+        # Called with self._cond held: the waiting client whose last turn is oldest
+        return min(self._waiting, key=lambda client: self._last_turn.get(client, 0.0))
@@ -0,0 +1,247 @@
+# yoga_app/utils/upload_sessions.py
+import time
+from threading import Lock
+
+import cv2
+import numpy as np
+
+from yoga_app.config import Config
+from yoga_app.utils.inference_workers import InferenceError, get_inference_service
+from yoga_app.utils.landmark_recording import open_session_recorder
+from yoga_app.utils.metrics import ACTIVE_STREAMS, FRAMES_FAILED
+from yoga_app.utils.motion_gate import MotionGate
+from yoga_app.utils.pose_detection import PoseDetector, landmarks_to_array
+from yoga_app.utils.pose_pool import PoolExhausted, get_pose_pool
+from yoga_app.utils.practice_log import practice_log
+
+
+class AdmissionError(Exception):
+    """Raised when a frame is refused; carries the HTTP status and a retry hint."""
+
+    def __init__(self, message, status, retry_after):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class InferenceSession:
+    """
+    Pose tracking state for one remote user.
+
+    The session holds a Pose instance from the shared pool in tracking mode,
+    so consecutive frames from the same user are cheaper and steadier than
+    independent images. close() returns it to the pool. With an inference
+    service, the session's frames go to one of its workers instead, which
+    keeps the tracking state.
+    """
+
+    def __init__(self, key, pool, pose_names=(), service=None):
+        self.key = key
+        self.pool = pool
+        self.service = service
+        self.stream = f"upload-{key}"
+        self.pose = pool.checkout(timeout=0) if service is None else None
+        self.recorder = open_session_recorder(f"upload-{key}", pose_names)
+        self.practice_session = practice_log.start_session("upload", user_id=key)
+        self.motion_gate = None
+        if Config.MOTION_GATE_ENABLED:
+            self.motion_gate = MotionGate(Config.MOTION_GATE_THRESHOLD, Config.MOTION_GATE_REFRESH_FRAMES)
+        self.last_result = None
+        self.lock = Lock()
+        self.last_frame = 0.0
+        self.last_seen = time.monotonic()
+        self.frames = 0
+
+    def close(self):
+        if self.pose is not None:
+            self.pool.checkin(self.pose)
+            self.pose = None
+        if self.service is not None:
+            self.service.release_stream(self.stream)
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+        practice_log.end_session(self.practice_session)
+        self.practice_session = None
+
+    def record(self, result):
+        timestamp = time.time()
+        if self.recorder is not None:
+            landmarks = result["landmarks"]
+            self.recorder.append(timestamp, None if landmarks is None else np.array(landmarks), result["poses"])
+        practice_log.record(self.practice_session, timestamp, result["poses"])
+
+
+class UploadSessionManager:
+    """
+    Admission control for frames uploaded by browsers.
+
+    At most max_sessions users hold a Pose instance from the pool at a time;
+    a new user is refused (503) while the host or the pool is full. Each session accepts at most max_fps
+    frames per second and one frame at a time; faster clients are refused
+    (429). Sessions that send nothing for session_timeout seconds are closed
+    to make room for others.
+    """
+
+    def __init__(self, max_sessions, max_fps, session_timeout, pool=None, service=None):
+        self.max_sessions = max_sessions
+        self.pool = pool or get_pose_pool()
+        self.service = service or get_inference_service()
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.session_timeout = session_timeout
+        self.detector = PoseDetector()
+        self._sessions = {}
+        self._lock = Lock()
+        self._rejected = {"busy": 0, "rate": 0, "full": 0}
+        self._processed = 0
+        self._skipped = 0
+        ACTIVE_STREAMS.labels("upload").set_function(lambda: len(self._sessions))
+
+    def analyze(self, key, data):
+        """
+        Run pose detection on one encoded frame for a session.
+
+        Parameters:
+            key: Identifies the user's session.
+            data (bytes): A JPEG, PNG or WebP image.
+
+        Returns:
+            dict: "landmarks" (33 [x, y, z, visibility] lists, or None when no
+                body was found), "poses" (detected pose names), "nearest"
+                ([name, distance] pairs of the closest reference poses, or
+                None without a body or a pose index) and "frame" (the
+                session's frame counter).
+        """
+        session = self._admit(key)
+        try:
+            image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                FRAMES_FAILED.labels("decode").inc()
+                raise ValueError("Could not decode the uploaded frame")
+
+            session.frames += 1
+            # While the user holds still, reuse the previous result
+            if (session.motion_gate is not None and session.last_result is not None
+                    and not session.motion_gate.should_process(image)):
+                self._skipped += 1
+                session.record(session.last_result)
+                return dict(session.last_result, frame=session.frames)
+
+            try:
+                landmarks, detected_poses = self._process(session, image)
+            except Exception:
+                # The gate took this frame as its reference; make the next one run inference
+                if session.motion_gate is not None:
+                    session.motion_gate.reset()
+                raise
+            self._processed += 1
+            nearest = None
+            if landmarks is not None:
+                nearest = self.detector.nearest_poses(landmarks)
+                landmarks = np.round(landmarks, 4).tolist()
+            if nearest is not None:
+                nearest = [[name, round(distance, 4)] for name, distance in nearest]
+            session.last_result = {
+                "frame": session.frames, "landmarks": landmarks, "poses": detected_poses, "nearest": nearest
+            }
+            session.record(session.last_result)
+            return session.last_result
+        finally:
+            session.last_seen = time.monotonic()
+            session.lock.release()
+
+    def _process(self, session, image):
+        """Return the landmarks array (or None) and the detected poses of a decoded frame."""
+        if session.service is not None:
+            try:
+                landmarks, detected_poses = session.service.process(
+                    session.stream, image, timeout=Config.INFERENCE_TIMEOUT
+                )
+            except (InferenceError, TimeoutError) as e:
+                FRAMES_FAILED.labels("inference").inc()
+                raise AdmissionError(f"Pose inference failed: {e}", 503, 1.0)
+            return landmarks, detected_poses or []
+
+        rgb_frame = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        rgb_frame.flags.writeable = False
+        results = session.pose.process(rgb_frame)
+        if not results.pose_landmarks:
+            return None, []
+        return (landmarks_to_array(results.pose_landmarks.landmark),
+                self.detector.detect_poses(results.pose_landmarks.landmark))
+
+    def close_session(self, key):
+        with self._lock:
+            session = self._sessions.pop(key, None)
+        if session is not None:
+            with session.lock:
+                session.close()
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "rejected": dict(self._rejected),
+                "frames_processed": self._processed,
+                "frames_skipped": self._skipped,
+            }
+
+    def _admit(self, key):
+        """Return the caller's session with its lock held, or raise AdmissionError."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(key)
+            if session is None:
+                if len(self._sessions) >= self.max_sessions:
+                    self._rejected["full"] += 1
+                    raise AdmissionError("Too many active sessions", 503, self.session_timeout)
+                try:
+                    session = InferenceSession(key, self.pool, self.detector.rules.names, self.service)
+                except PoolExhausted:
+                    self._rejected["full"] += 1
+                    raise AdmissionError("No pose graph is free", 503, self.session_timeout)
+                self._sessions[key] = session
+
+            if not session.lock.acquire(blocking=False):
+                self._rejected["busy"] += 1
+                raise AdmissionError("Previous frame is still being processed", 429, self.min_interval)
+            wait = session.last_frame + self.min_interval - now
+            if wait > 0:
+                session.lock.release()
+                self._rejected["rate"] += 1
+                raise AdmissionError("Frame rate limit exceeded", 429, wait)
+            session.last_frame = now
+            session.last_seen = now
+            return session
+
+    def _expire(self, now):
+        # Called with self._lock held
+        for key, session in list(self._sessions.items()):
+            if now - session.last_seen > self.session_timeout and session.lock.acquire(blocking=False):
+                del self._sessions[key]
+                session.close()
+                session.lock.release()
+
+
+_manager = None
+_manager_lock = Lock()
+
+
+def get_upload_sessions():
+    """
+    Return the process-wide UploadSessionManager, created on first use.
+
+    Building it takes Pose graphs from the pool and connects to the
+    inference service, which importing the routes shouldn't do.
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = UploadSessionManager(
+                max_sessions=Config.UPLOAD_MAX_SESSIONS,
+                max_fps=Config.UPLOAD_MAX_FPS,
+                session_timeout=Config.UPLOAD_SESSION_TIMEOUT
+            )
+        return _manager